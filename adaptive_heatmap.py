@@ -0,0 +1,81 @@
+"""
+Adaptive Heatmap Detail
+
+Picks the heatmap resolution and refresh interval (submit every N frames) that
+fit a target frame time, from measured per-frame logic / render cost and the
+worker's heatmap cost. While paused it ramps up to full detail one step at a
+time instead of following the budget.
+"""
+
+# Resolution levels, low -> high (same 10:7 aspect as the heatmap panels)
+LEVELS = [(60, 42), (100, 70), (150, 105), (200, 140), (300, 210)]
+
+
+class AdaptiveHeatmapController:
+    def __init__(self, target_frame_sec, levels=LEVELS, max_interval=6,
+                 adjust_every=30, headroom=0.9, smoothing=0.1):
+        self.target = target_frame_sec
+        self.levels = list(levels)
+        self.max_interval = max_interval
+        self.adjust_every = adjust_every # frames between decisions (hysteresis)
+        self.headroom = headroom         # fraction of the frame budget we plan to use
+        self.alpha = smoothing           # EMA factor for measurements
+
+        self.level = len(self.levels) - 1
+        self.interval = 1
+        self._frame = 0
+        self._base_ema = None     # logic + render seconds per frame (main thread)
+        self._hm_px_ema = None    # heatmap seconds per pixel (worker, all maps)
+
+    @property
+    def size(self):
+        return self.levels[self.level]
+
+    def should_refresh(self):
+        """True on frames where a new heatmap snapshot should be submitted."""
+        return self._frame % self.interval == 0
+
+    def _ema(self, old, new):
+        return new if old is None else old + self.alpha * (new - old)
+
+    def record(self, logic_sec, render_sec, heatmap_sec=None, heatmap_pixels=None):
+        """Feeds one frame of measurements. heatmap_* describe the last finished worker job."""
+        self._base_ema = self._ema(self._base_ema, logic_sec + render_sec)
+        if heatmap_sec and heatmap_pixels:
+            self._hm_px_ema = self._ema(self._hm_px_ema, heatmap_sec / heatmap_pixels)
+
+    def _fits(self, level, interval):
+        w, h = self.levels[level]
+        cost = self._base_ema + self._hm_px_ema * w * h / interval
+        return cost <= self.target * self.headroom
+
+    def choose(self):
+        """Most detailed (pixels per frame, then fewest skipped frames) setting within budget."""
+        if self._base_ema is None or self._hm_px_ema is None:
+            return self.level, self.interval
+        candidates = sorted(
+            ((lv, iv) for lv in range(len(self.levels)) for iv in range(1, self.max_interval + 1)),
+            key=lambda c: (-self.levels[c[0]][0] * self.levels[c[0]][1] / c[1], c[1]),
+        )
+        for lv, iv in candidates:
+            if self._fits(lv, iv):
+                return lv, iv
+        return 0, self.max_interval
+
+    def update(self, paused):
+        """Call once per frame after record(); adjusts detail every adjust_every frames."""
+        self._frame += 1
+        if self._frame % self.adjust_every:
+            return
+        if paused:
+            # Ramp towards full detail: refresh every frame first, then raise resolution
+            if self.interval > 1:
+                self.interval -= 1
+            elif self.level < len(self.levels) - 1:
+                self.level += 1
+            return
+        self.level, self.interval = self.choose()
+
+    def describe(self):
+        w, h = self.size
+        return f"HM {w}x{h} /{self.interval}"
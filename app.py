@@ -1,94 +1,134 @@
-
 import streamlit as st
-import time
+import os
+import uuid
 import pandas as pd
 import altair as alt
-import numpy as np
 
 # Import our Logic and Params
-import sim_params as CFG
-import sim_logic as Logic
-from db_manager import DBManager
+import config as CFG
+import scenario as Scenario
+import heatmap as Heatmap
+from sim_rooms import RoomServer
+from sim_client import SimClient, RemoteRoom
+from input_pad import input_pad, new_move
+from db_manager import get_db_manager
 
 st.set_page_config(page_title="Soccer Sim Web", layout="wide")
 
-# Initialize Session State
-if "running" not in st.session_state: st.session_state["running"] = False
-if "recording" not in st.session_state: st.session_state["recording"] = False
-if "rec_data" not in st.session_state: st.session_state["rec_data"] = []
-if "rec_start_time" not in st.session_state: st.session_state["rec_start_time"] = 0
-if "ball" not in st.session_state: st.session_state["ball"] = Logic.Pose2D(0.0, 0.0)
-if "passer" not in st.session_state: st.session_state["passer"] = Logic.Pose2D(0.1, 0.0)
-if "striker" not in st.session_state: st.session_state["striker"] = Logic.Pose2D(-3.0, 3.0)
-if "opp_user" not in st.session_state: st.session_state["opp_user"] = Logic.Pose2D(-1.8, 0.5)
-if "game_stats" not in st.session_state: st.session_state["game_stats"] = {"goals": 0, "fails": 0}
-
-db = DBManager()
+# Initial setup (scenarios/dashboard.json, compiled once and cached on disk)
+DASHBOARD_SCENARIO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios", "dashboard.json")
+UI_REFRESH_SEC = 0.1     # live view refresh while running; the sim ticks on its own at CFG.SIM["dt"]
+PAUSED_REFRESH_SEC = 2.0 # while paused (keeps the room subscription alive, shows others' changes)
+ROOM_WORKERS = 2         # threads computing costmaps, shared by all rooms
+SIM_SERVICE = os.environ.get("SIM_SERVICE") # "host:port" of a sim_service.py: thin client instead of local rooms
+
+@st.cache_resource
+def get_rooms(scenario_path=DASHBOARD_SCENARIO):
+    # Long-lived engines (one per room) for the whole server process, ticked by a bounded pool.
+    # Same striker speed as the service / PyGame engines (sim_engine.STRIKER_SPEED), so a
+    # scenario plays the same in every front end.
+    return RoomServer(lambda name: Scenario.load_scenario(scenario_path), max_workers=ROOM_WORKERS,
+                      dt=CFG.SIM["dt"])
+
+# Every tab gets a private room unless it joins a shared one (?room=<name>)
+if "session_id" not in st.session_state: st.session_state["session_id"] = uuid.uuid4().hex[:8]
+session_id = st.session_state["session_id"]
+
+st.sidebar.title("👥 Room")
+room_name = st.sidebar.text_input("Shared room (empty = private)", st.query_params.get("room", "")).strip()
+if room_name != st.query_params.get("room", ""):
+    if room_name: st.query_params["room"] = room_name
+    else: del st.query_params["room"]
+shared = bool(room_name)
+
+def get_remote_room(name):
+    # One service connection per tab and room (the service tracks control per connection)
+    remote = st.session_state.get("remote_room")
+    if remote is None or remote.name != name or not remote.client.connected:
+        if remote is not None: remote.loop.close()
+        remote = st.session_state["remote_room"] = RemoteRoom(SimClient(SIM_SERVICE, room=name, rate=1.0 / UI_REFRESH_SEC))
+    return remote
+
+name = room_name if shared else f"private-{session_id}"
+room = get_remote_room(name) if SIM_SERVICE else get_rooms().get(name)
+room.touch(session_id)
+sim = room.loop
+engine = sim.engine
+
+@st.cache_resource
+def get_db():
+    # Tables are created once per process; Firebase is set up lazily by the first save
+    return get_db_manager()
+
+db = get_db()
 
 st.title("⚽️ Soccer Simulation Dashboard")
 
-# Initialize Slider State
-if "def_x" not in st.session_state: st.session_state["def_x"] = float(st.session_state["opp_user"].x)
-if "def_y" not in st.session_state: st.session_state["def_y"] = float(st.session_state["opp_user"].y)
-
-# Sidebar - Parameters
+# Sidebar - Parameters (edit the engine's params in place)
 st.sidebar.title("🛠 Logic Settings")
-st_params = CFG.ST_PARAMS.copy()
-pass_params = CFG.PASS_PARAMS.copy()
+st_params = engine.st_params
+pass_params = engine.pass_params
+
+def param_slider(params, key, label, min_value, max_value):
+    # Params are read by the tick thread (or the service): only write actual edits
+    value = st.slider(label, min_value, max_value, float(params[key]))
+    if value != params[key]:
+        sim.set_param(params, key, value)
+    return value
 
 # --- Defender Pass Params ---
 with st.sidebar.expander("🛡️ Defender Pass Params", expanded=False):
     st.markdown("**Selection & Thresholds**")
-    pass_params["min_pass_threshold"] = st.slider("Min Pass Dist", 0.0, 5.0, float(pass_params["min_pass_threshold"]))
-    pass_params["max_pass_threshold"] = st.slider("Max Pass Dist", 1.0, 10.0, float(pass_params["max_pass_threshold"]))
-    pass_params["score_threshold"] = st.slider("Score Threshold", -10.0, 20.0, float(pass_params["score_threshold"]))
+    param_slider(pass_params, "min_pass_threshold", "Min Pass Dist", 0.0, 5.0)
+    param_slider(pass_params, "max_pass_threshold", "Max Pass Dist", 1.0, 10.0)
+    param_slider(pass_params, "score_threshold", "Score Threshold", -10.0, 20.0)
     
     st.markdown("**Teammate Selection Weights**")
-    pass_params["tm_select_w_dist"] = st.slider("TM Select Dist W", 0.0, 5.0, float(pass_params["tm_select_w_dist"]))
-    pass_params["tm_select_w_x"] = st.slider("TM Select X W", 0.0, 5.0, float(pass_params["tm_select_w_x"]))
+    param_slider(pass_params, "tm_select_w_dist", "TM Select Dist W", 0.0, 5.0)
+    param_slider(pass_params, "tm_select_w_x", "TM Select X W", 0.0, 5.0)
 
     st.markdown("**Score Weights**")
-    pass_params["base_score"] = st.slider("Base Score", 0.0, 20.0, float(pass_params["base_score"]))
-    pass_params["w_abs_dx"] = st.slider("W Abs Dx", 0.0, 5.0, float(pass_params["w_abs_dx"]))
-    pass_params["w_abs_dy"] = st.slider("W Abs Dy", 0.0, 5.0, float(pass_params["w_abs_dy"]))
-    pass_params["w_x"] = st.slider("W X (Forward)", 0.0, 5.0, float(pass_params["w_x"]))
-    pass_params["w_y"] = st.slider("W Y (Center)", 0.0, 5.0, float(pass_params["w_y"]))
+    param_slider(pass_params, "base_score", "Base Score", 0.0, 20.0)
+    param_slider(pass_params, "w_abs_dx", "W Abs Dx", 0.0, 5.0)
+    param_slider(pass_params, "w_abs_dy", "W Abs Dy", 0.0, 5.0)
+    param_slider(pass_params, "w_x", "W X (Forward)", 0.0, 5.0)
+    param_slider(pass_params, "w_y", "W Y (Center)", 0.0, 5.0)
 
     st.markdown("**Opponent Avoiding**")
-    pass_params["opp_path_margin"] = st.slider("Opp Path Margin", 0.1, 3.0, float(pass_params["opp_path_margin"]))
-    pass_params["opp_penalty"] = st.slider("Opp Penalty", 0.0, 50.0, float(pass_params["opp_penalty"]))
-    pass_params["opp_memory_sec"] = st.slider("Opp Memory (s)", 0.0, 10.0, float(pass_params["opp_memory_sec"]))
+    param_slider(pass_params, "receive_pass_margin", "Opp Path Margin", 0.1, 3.0)
+    param_slider(pass_params, "opp_penalty", "Opp Penalty", 0.0, 50.0)
+    param_slider(pass_params, "opp_memory_sec", "Opp Memory (s)", 0.0, 10.0)
 
     st.markdown("**Grid Search**")
-    pass_params["grid_step"] = st.slider("Grid Step (Def)", 0.1, 1.0, float(pass_params["grid_step"]))
+    param_slider(pass_params, "costmap_step", "Grid Step (Def)", 0.1, 1.0)
 
 
 # --- Striker Off-Ball Params ---
 with st.sidebar.expander("⚡️ Striker Logic Params", expanded=True):
     st.markdown("**Positioning Goals**")
-    st_params["dist_from_goal"] = st.slider("Dist From Goal", 0.0, 10.0, float(st_params["dist_from_goal"]))
+    param_slider(st_params, "dist_from_goal", "Dist From Goal", 0.0, 10.0)
     
     st.markdown("**Base Weights**")
-    st_params["base_x_weight"] = st.slider("Base X W", 0.0, 10.0, float(st_params["base_x_weight"]))
-    st_params["center_y_weight"] = st.slider("Center Y W", 0.0, 10.0, float(st_params["center_y_weight"]))
-    st_params["forward_weight"] = st.slider("Forward W", 0.0, 10.0, float(st_params["forward_weight"]))
-    st_params["ball_dist_weight"] = st.slider("Ball Dist W", 0.0, 10.0, float(st_params["ball_dist_weight"]))
+    param_slider(st_params, "base_x_weight", "Base X W", 0.0, 10.0)
+    param_slider(st_params, "center_y_weight", "Center Y W", 0.0, 10.0)
+    param_slider(st_params, "forward_weight", "Forward W", 0.0, 10.0)
+    param_slider(st_params, "ball_dist_weight", "Ball Dist W", 0.0, 10.0)
     
     st.markdown("**Defender Avoidance**")
-    st_params["defender_dist_weight"] = st.slider("Def Dist W", 0.0, 50.0, float(st_params["defender_dist_weight"]))
-    st_params["defender_dist_cap"] = st.slider("Def Dist Cap", 0.5, 10.0, float(st_params["defender_dist_cap"]))
-    st_params["symmetry_weight"] = st.slider("Symmetry W", 0.0, 20.0, float(st_params["symmetry_weight"]))
+    param_slider(st_params, "defender_dist_weight", "Def Dist W", 0.0, 50.0)
+    param_slider(st_params, "defender_dist_cap", "Def Dist Cap", 0.5, 10.0)
+    param_slider(st_params, "symmetry_weight", "Symmetry W", 0.0, 20.0)
     
     st.markdown("**Path Penalties**")
-    st_params["path_margin"] = st.slider("Path Margin", 0.1, 3.0, float(st_params["path_margin"]))
-    st_params["pass_penalty_weight"] = st.slider("Pass Path Pen", 0.0, 50.0, float(st_params["pass_penalty_weight"]))
-    st_params["shot_penalty_weight"] = st.slider("Shot Path Pen", 0.0, 50.0, float(st_params["shot_penalty_weight"]))
-    st_params["movement_penalty_weight"] = st.slider("Move Path Pen", 0.0, 50.0, float(st_params["movement_penalty_weight"]))
-    st_params["opp_memory_sec"] = st.slider("Opp Memory (s) [ST]", 0.0, 10.0, float(st_params["opp_memory_sec"]))
+    param_slider(st_params, "path_margin", "Path Margin", 0.1, 3.0)
+    param_slider(st_params, "pass_penalty_weight", "Pass Path Pen", 0.0, 50.0)
+    param_slider(st_params, "shot_penalty_weight", "Shot Path Pen", 0.0, 50.0)
+    param_slider(st_params, "movement_penalty_weight", "Move Path Pen", 0.0, 50.0)
+    param_slider(st_params, "opp_memory_sec", "Opp Memory (s) [ST]", 0.0, 10.0)
 
     st.markdown("**Stability**")
-    st_params["hysteresis_x_weight"] = st.slider("Hysteresis X", 0.0, 10.0, float(st_params["hysteresis_x_weight"]))
-    st_params["hysteresis_y_weight"] = st.slider("Hysteresis Y", 0.0, 10.0, float(st_params["hysteresis_y_weight"]))
+    param_slider(st_params, "hysteresis_x_weight", "Hysteresis X", 0.0, 10.0)
+    param_slider(st_params, "hysteresis_y_weight", "Hysteresis Y", 0.0, 10.0)
 
 # Layout
 col_ctrl, col_stat = st.columns([1, 2])
@@ -97,228 +137,212 @@ with col_ctrl:
     
     # 1. Sim Control
     c1, c2 = st.columns(2)
-    if not st.session_state["running"]:
+    if not sim.running:
         if c1.button("▶️ START", use_container_width=True):
-            st.session_state["running"] = True
+            sim.set_running(True)
             st.rerun()
     else:
         if c1.button("⏹ STOP", use_container_width=True):
-            st.session_state["running"] = False
-            st.session_state["recording"] = False
+            sim.set_running(False) # also ends a recording, which is dropped unsaved
             st.rerun()
 
     # 2. Recording
-    if st.session_state["running"]:
-        if not st.session_state["recording"]:
+    if sim.running:
+        if not sim.recording:
             if c2.button("⏺ RECORD", use_container_width=True):
-                st.session_state["recording"] = True
-                st.session_state["rec_data"] = []
-                st.session_state["rec_start_time"] = time.time()
+                # Ticks stream to SQLite while recording (bounded memory, kept if the app dies);
+                # a sim service records into its own db
+                sim.start_recording(None if SIM_SERVICE else db.start_recording())
                 st.rerun()
         else:
             if c2.button("💾 SAVE", use_container_width=True, type="primary"):
-                st.session_state["recording"] = False
-                duration = time.time() - st.session_state["rec_start_time"]
-                run_id = db.save_run(duration, st.session_state["rec_data"], pass_params, st_params)
-                st.success(f"Run {run_id} Saved!")
+                run_id = sim.save_recording()
+                if run_id is None:
+                    st.error("Saving the run failed (see the log)")
+                else:
+                    st.success(f"Run {run_id} Saved!")
+                    st.rerun()
+
+    # 3. Defender control (shared rooms: only the controlling session's input is applied)
+    if shared:
+        viewers = room.viewers()
+        if room.is_controller(session_id):
+            st.caption(f"🕹 You control the defender in '{room.name}' ({viewers} watching)")
+        else:
+            st.caption(f"👀 Watching '{room.name}' ({viewers} watching), another session controls the defender")
+            if st.button("Take control", use_container_width=True):
+                if not room.claim_control(session_id):
+                    st.warning("The controlling session is still active")
                 st.rerun()
 
-# 3. Defender Control (Joystick)
-
+# Live parts re-render on their own (fast while running); the rest of the page
+# reruns only on interaction.
+rendered_running = sim.running
+live_every = UI_REFRESH_SEC if rendered_running else PAUSED_REFRESH_SEC
 
-
-
-
-with col_stat:
+@st.fragment(run_every=live_every)
+def live_metrics():
+    state = room.snapshot(session_id)
+    if sim.running != rendered_running:
+        st.rerun() # started / stopped (e.g. by another session in the room): switch refresh rate
     c1, c2, c3 = st.columns(3)
-    c1.metric("Goals", st.session_state["game_stats"]["goals"])
-    c2.metric("Interceptions", st.session_state["game_stats"]["fails"])
-    if st.session_state["recording"]:
+    c1.metric("Goals", state.goals)
+    c2.metric("Interceptions", state.fails)
+    if sim.recording:
         c3.warning("🔴 RECORDING... (Press SAVE to Upload)")
 
-# --- Simulation Logic ---
-# --- Simulation Logic ---
-def run_simulation_step():
-    ball = st.session_state["ball"]
-    striker = st.session_state["striker"]
-    opp_user = st.session_state["opp_user"]
-    passer = st.session_state["passer"]
-    
-    opponents = [Logic.Opponent(Logic.Pose2D(-3.8, 0.5), 0.0), Logic.Opponent(opp_user, 0.0)]
-    
-    # AI Logic
-    best_pos, best_score = Logic.compute_striker_costmap(striker, ball, opponents, st_params)
-    target = Logic.Pose2D(best_pos[0], best_pos[1])
-    
-    dt = 0.1
-    speed = 0.5
-    striker = Logic.move_towards(striker, target, speed, dt)
-    st.session_state["striker"] = striker
-    
-    # Pass Logic
-    teammates = [Logic.Teammate(1, passer), Logic.Teammate(2, striker)]
-    pfound = False
-    pass_target = Logic.Pose2D(0,0)
-    
-    best_tm = Logic.select_best_teammate(ball, teammates, 1, pass_params)
-    if best_tm:
-        ptx, pty, psc = Logic.compute_pass_costmap(ball, best_tm.pos, opponents, pass_params)
-        if psc >= pass_params["score_threshold"]:
-            pfound = True
-            pass_target = Logic.Pose2D(ptx, pty)
-            
-            # Simple Scoring Interaction
-            d_def = np.hypot(striker.x - opp_user.x, striker.y - opp_user.y)
-            # In real logic we wait, here we just show feedback
-            
-    return best_pos, best_score, pfound, pass_target
-
-# Run 1 Step
-if st.session_state["running"]:
-    best_pos, best_score, pfound, pass_target = run_simulation_step()
-else:
-    # Static placeholders for view when paused
-    # We still need to calculate best_pos to show where the AI *would* go, or just show last state
-    # For simplicity, let's just run logic or use dummy
-    ball = st.session_state["ball"]
-    striker = st.session_state["striker"]
-    opp_user = st.session_state["opp_user"]
-    
-    # Calculate map just for visualization (no movement)
-    opponents = [Logic.Opponent(Logic.Pose2D(-3.8, 0.5), 0.0), Logic.Opponent(opp_user, 0.0)]
-    best_pos, best_score = Logic.compute_striker_costmap(striker, ball, opponents, st_params)
-    pfound = False
-    pass_target = Logic.Pose2D(0,0)
-
-
-# Logging
-if st.session_state["recording"] and st.session_state["running"]:
-    st.session_state["rec_data"].append({
-        "t": time.time(),
-        "ofb_score": float(best_score),
-        "striker": (float(st.session_state["striker"].x), float(st.session_state["striker"].y))
-    })
+with col_stat:
+    live_metrics()
 
 # --- Altair Visuals (Rich Field) ---
-
-# 1. Background (Green Field)
-domain_x = [-5.0, 5.0]
-domain_y = [-3.5, 3.5]
-# Note: mark_rect with pixel values is tricky. 
-# Better: Just set the chart background in config or use a huge point.
-# Let's use standard domain encoding.
-field_bg = alt.Chart(pd.DataFrame({'x': [-5, 5], 'y': [-3.5, 3.5]})).mark_rect(color='#228B22', opacity=0.3).encode(
-    x='x', y='y'
-)
-
-# 2. Field Lines
-lines_data = [
-    # Borders
-    {'x1': -5, 'y1': -3.5, 'x2': 5, 'y2': -3.5},
-    {'x1': -5, 'y1': 3.5, 'x2': 5, 'y2': 3.5},
-    {'x1': -5, 'y1': -3.5, 'x2': -5, 'y2': 3.5},
-    {'x1': 5, 'y1': -3.5, 'x2': 5, 'y2': 3.5},
-    # Center Line
-    {'x1': 0, 'y1': -3.5, 'x2': 0, 'y2': 3.5},
-]
-lines_df = pd.DataFrame(lines_data)
-field_lines = alt.Chart(lines_df).mark_rule(color='white', strokeWidth=2).encode(
-    x='x1', x2='x2', y='y1', y2='y2'
-)
-
-# 3. Entities
-s = st.session_state["striker"]
-p = st.session_state["passer"]
-b = st.session_state["ball"]
-u = st.session_state["opp_user"]
-
-entities = [
-    {"x": s.x, "y": s.y, "type": "Striker (AI)", "color": "#00FFFF", "size": 300, "shape": "circle"},
-    {"x": p.x, "y": p.y, "type": "Passer", "color": "#0000FF", "size": 200, "shape": "square"},
-    {"x": b.x, "y": b.y, "type": "Ball", "color": "#FFA500", "size": 150, "shape": "circle"},
-    {"x": u.x, "y": u.y, "type": "Defender (You)", "color": "#FF0000", "size": 400, "shape": "diamond"},
-    {"x": -3.8, "y": 0.5, "type": "GK", "color": "#8B0000", "size": 200, "shape": "cross"},
-]
-if st.session_state["running"]:
-    entities.append({"x": best_pos[0], "y": best_pos[1], "type": "Target", "color": "#FFFFFF", "size": 100, "shape": "cross"})
-    if pfound:
-         entities.append({"x": pass_target.x, "y": pass_target.y, "type": "Pass Target", "color": "#FFFF00", "size": 100, "shape": "triangle"})
-
-ent_df = pd.DataFrame(entities)
-players = alt.Chart(ent_df).mark_point(filled=True).encode(
-    x=alt.X('x', scale=alt.Scale(domain=[-5.5, 5.5])),
-    y=alt.Y('y', scale=alt.Scale(domain=[-4, 4])),
-    color=alt.Color('color', scale=None),
-    size=alt.Size('size', scale=None),
-    shape=alt.Shape('shape', scale=None),
-    tooltip=['type']
-)
-
-# Combine Layers
-# Order: Lines -> Players (Background handled by theme or style usually, but here lines give structure)
-chart = (field_lines + players).properties(
-    width=700, height=500,
-    title=f"Field View (Score: {best_score:.2f})" if st.session_state["running"] else "Field View (Paused)"
-).configure_view(
-    strokeWidth=0,
-    fill='#228B22' # Set Chart Background to Green
-).configure_axis(
-    grid=False,
-    domain=False
-)
-
-st.altair_chart(chart, width="stretch")
-
-# --- Keyboard Control (WASD) ---
-st.markdown("### ⌨️ Keyboard Control")
-from st_keyup import st_keyup as keyup
-
-# Create a columns layout
-c_joy, c_key = st.columns(2)
-
-with c_joy:
-    st.caption("Joystick")
-    from st_joystick import st_joystick as joystick
-    joystick_data = joystick()
-    
-    if joystick_data and "frontPosition" in joystick_data:
-        raw_x = joystick_data["frontPosition"].get("x", 0.0)
-        raw_y = joystick_data["frontPosition"].get("y", 0.0)
-        jx = raw_x / 50.0
-        jy = -(raw_y / 50.0)
-        
-        if abs(jx) > 0.1 or abs(jy) > 0.1:
-            step = CFG.SIM["user_step"]
-            st.session_state["opp_user"].x += jx * step * 0.5
-            st.session_state["opp_user"].y += jy * step * 0.5
-            st.session_state["opp_user"].x = Logic.clamp(st.session_state["opp_user"].x, -5.0, 5.0)
-            st.session_state["opp_user"].y = Logic.clamp(st.session_state["opp_user"].y, -3.5, 3.5)
-            st.rerun()
-
-with c_key:
-    st.caption("Keyboard (Focus input below)")
-    # debounce=100ms helps responsiveness vs rerun flood
-    key_input = keyup("wasd_input", label="Type WASD", debounce=50)
-    
-    if key_input:
-        last_char = key_input[-1].lower() if len(key_input) > 0 else ""
-        step = CFG.SIM["user_step"] * 2.0 # Higher step for single taps
-        
-        if last_char == 'w': st.session_state["opp_user"].y += step
-        elif last_char == 's': st.session_state["opp_user"].y -= step
-        elif last_char == 'a': st.session_state["opp_user"].x -= step
-        elif last_char == 'd': st.session_state["opp_user"].x += step
-        
-        # Clamp
-        st.session_state["opp_user"].x = Logic.clamp(st.session_state["opp_user"].x, -5.0, 5.0)
-        st.session_state["opp_user"].y = Logic.clamp(st.session_state["opp_user"].y, -3.5, 3.5)
-        
-        if len(key_input) > 10: # Clear buffer
-             st.rerun() # This might be tricky, keyup maintains state. 
-             # Ideally we want a non-text method.
-
-
-# Loop
-if st.session_state["running"]:
-    time.sleep(0.05)
-    st.rerun()
+# The spec (field layers + the dynamic layers' encodings) is built once per process.
+# Dynamic layers read the named dataset LIVE_DATA: each tick appends its rows with
+# add_rows (tagged with the tick) and the layers only show the newest tick, so a
+# refresh sends a few rows instead of the whole chart.
+LIVE_DATA = "live"
+LIVE_RESET_ROWS = 4000 # full rerun (chart with only the current tick) after this many appended rows
+NAN = float("nan")
+
+@st.cache_resource
+def field_chart_spec():
+    # 1. Background: the view fill (configure_view below)
+
+    # 2. Field Lines
+    lines_data = [
+        # Borders
+        {'x1': -5, 'y1': -3.5, 'x2': 5, 'y2': -3.5},
+        {'x1': -5, 'y1': 3.5, 'x2': 5, 'y2': 3.5},
+        {'x1': -5, 'y1': -3.5, 'x2': -5, 'y2': 3.5},
+        {'x1': 5, 'y1': -3.5, 'x2': 5, 'y2': 3.5},
+        # Center Line
+        {'x1': 0, 'y1': -3.5, 'x2': 0, 'y2': 3.5},
+    ]
+    lines_df = pd.DataFrame(lines_data)
+    field_lines = alt.Chart(lines_df).mark_rule(color='white', strokeWidth=2).encode(
+        x='x1', x2='x2', y='y1', y2='y2'
+    )
+
+    # 3. Dynamic layers (rows of the newest tick only)
+    live = alt.Chart(alt.Data(name=LIVE_DATA)).transform_joinaggregate(
+        last_tick='max(tick)'
+    ).transform_filter('datum.tick == datum.last_tick')
+    x = alt.X('x:Q', scale=alt.Scale(domain=[-5.5, 5.5]))
+    y = alt.Y('y:Q', scale=alt.Scale(domain=[-4, 4]))
+
+    pass_line = live.transform_filter("datum.kind == 'pass'").mark_rule(color='#FFFF00', strokeDash=[6, 4]).encode(
+        x=x, y=y, x2='x2:Q', y2='y2:Q'
+    )
+    players = live.transform_filter("datum.kind == 'entity'").mark_point(filled=True).encode(
+        x=x, y=y,
+        color=alt.Color('color:N', scale=None),
+        size=alt.Size('size:Q', scale=None),
+        shape=alt.Shape('shape:N', scale=None),
+        tooltip=['type:N']
+    )
+    label = live.transform_filter("datum.kind == 'label'").mark_text(
+        align='left', baseline='top', color='white', fontSize=14
+    ).encode(x=x, y=y, text='type:N')
+
+    # Combine Layers
+    # Order: Lines -> Pass -> Players -> Label (background is the view fill)
+    return alt.layer(field_lines, pass_line, players, label).properties(
+        width=700, height=500, title="Field View"
+    ).configure_view(
+        strokeWidth=0,
+        fill='#228B22' # Set Chart Background to Green
+    ).configure_axis(
+        grid=False,
+        domain=False
+    )
+
+def live_row(tick, kind, x, y, type="", color="", size=NAN, shape="", x2=NAN, y2=NAN):
+    # One fixed column set for every row (the dataset is a single Arrow table)
+    return {"tick": tick, "kind": kind, "x": x, "y": y, "x2": x2, "y2": y2,
+            "type": type, "color": color, "size": size, "shape": shape}
+
+def live_rows(state, running, tick):
+    s, p, b, u = state.striker, state.passer, state.ball, state.opp_user
+    rows = [
+        live_row(tick, "entity", s.x, s.y, "Striker (AI)", "#00FFFF", 300, "circle"),
+        live_row(tick, "entity", p.x, p.y, "Passer", "#0000FF", 200, "square"),
+        live_row(tick, "entity", b.x, b.y, "Ball", "#FFA500", 150, "circle"),
+        live_row(tick, "entity", u.x, u.y, "Defender (You)", "#FF0000", 400, "diamond"),
+    ] + [
+        live_row(tick, "entity", ox, oy, "GK" if i == 0 else f"Opponent {i + 1}", "#8B0000", 200, "cross")
+        for i, (ox, oy) in enumerate(state.opponents)
+    ]
+    if running:
+        rows.append(live_row(tick, "entity", state.best_pos[0], state.best_pos[1], "Target", "#FFFFFF", 100, "cross"))
+        if state.flight_target:
+            (sx, sy), (tx, ty) = state.flight_start, state.flight_target
+            rows.append(live_row(tick, "pass", sx, sy, x2=tx, y2=ty))
+            rows.append(live_row(tick, "entity", tx, ty, "Pass Target", "#FFFF00", 100, "triangle"))
+    title = f"Score: {state.ofb_score:.2f}" if running else "Paused"
+    rows.append(live_row(tick, "label", -5.4, 3.9, title))
+    return pd.DataFrame(rows)
+
+def snapshot():
+    # The loop's per-tick published copy: polling never waits for a running tick
+    snap = sim.published()
+    return snap.state, snap.running, snap.tick
+
+# Full run: the chart element with the current tick's rows
+state, running, tick = snapshot()
+field_el = st.altair_chart(field_chart_spec().properties(
+    datasets={LIVE_DATA: live_rows(state, running, tick).to_dict("records")}
+), width="stretch")
+st.session_state["live_tick"] = tick
+st.session_state["live_appended"] = 0
+
+@st.fragment(run_every=live_every)
+def live_field():
+    # Appends to the element above (created outside the fragment, so it persists)
+    state, running, tick = snapshot()
+    if tick == st.session_state["live_tick"]:
+        return # no new tick since the last push
+    if st.session_state["live_appended"] >= LIVE_RESET_ROWS:
+        st.rerun() # drop the accumulated rows
+    rows = live_rows(state, running, tick)
+    field_el.add_rows(**{LIVE_DATA: rows})
+    st.session_state["live_tick"] = tick
+    st.session_state["live_appended"] += len(rows)
+
+live_field()
+
+# --- Score Heatmaps (decision costmaps of the engine, as small PNGs) ---
+HEATMAP_SIZE = (150, 105) # half the pygame panel; the browser scales it up
+HEATMAP_DISPLAY_W = 300
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def heatmap_png(version, _grid, bounds):
+    # Keyed by the world-state / param hash: paused views and repeat renders hit the
+    # cache, and identical bytes keep the same media URL (the browser doesn't refetch).
+    return Heatmap.costmap_png(_grid, bounds, *HEATMAP_SIZE)
+
+@st.fragment(run_every=live_every)
+def live_heatmaps():
+    # State, grids and their versions of one tick, without the engine lock
+    snap = sim.published()
+    maps = [("Striker Optimization", *snap.grids["striker"], snap.state.striker_bounds),
+            ("Pass Decision", *snap.grids["pass"], snap.state.pass_bounds)]
+    for col, (title, version, grid, bounds) in zip(st.columns(2), maps):
+        min_x, max_x, min_y, max_y = bounds
+        col.image(heatmap_png(version, grid, bounds), width=HEATMAP_DISPLAY_W,
+                  caption=f"{title}  x [{min_x:.1f}, {max_x:.1f}]  y [{min_y:.1f}, {max_y:.1f}]")
+
+live_heatmaps()
+
+# --- Defender Control (buffered in the browser, applied on the room's next tick) ---
+st.markdown("### 🕹 Defender Control")
+INPUT_SEND_MS = 150 # at most one summed move per interval
+
+@st.fragment
+def control_pad():
+    # Only this fragment reruns when a move arrives; the live fragments pick up the result
+    step = CFG.SIM["user_step"]
+    value = input_pad("defender_pad", speed=step / CFG.SIM["dt"], tap_step=step * 2.0, send_every_ms=INPUT_SEND_MS)
+    move = new_move(value, st.session_state, "pad_seq")
+    if move:
+        room.move_user(session_id, *move) # queued, clamped to the field view by the engine
+
+control_pad()
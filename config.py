@@ -165,6 +165,54 @@ INITIAL_OPPONENTS = [
 # Parameters for Robot Agents
 ROBOT_RADIUS = 0.35 # Used for collision/drawing
 
+# Scenario Files (JSON / TOML)
+# Alternative setups live in SCENARIO["dir"] instead of commented-out lines above.
+# The initial positions above stay the built-in default scenario.
+SCENARIO = {
+    "dir": "scenarios",
+    "cache_dir": ".scenario_cache", # Compiled scenarios (keyed by content hash)
+    "field_x_limit": 5.0,           # Same limits as the user clamp
+    "field_y_limit": 3.5,
+}
+# Viewed area (min_x, max_x, min_y, max_y): the user opponent is clamped to it,
+# costmap windows are clipped to it and the field views draw it
+VIEW_BOUNDS = (-SCENARIO["field_x_limit"], SCENARIO["field_x_limit"],
+               -SCENARIO["field_y_limit"], SCENARIO["field_y_limit"])
+
+# PyGame param panel: (param key, label, min, max) per column, top to bottom
+PARAM_SLIDERS = {
+    "st": [
+        ("base_x_weight", "Base X", 0.0, 20.0),
+        ("center_y_weight", "Center Y", 0.0, 10.0),
+        ("defender_dist_weight", "Def Dist W", 0.0, 50.0),
+        ("defender_dist_cap", "Def Dist Cap", 1.0, 10.0),
+        ("hysteresis_x_weight", "Hysteresis X", 0.0, 10.0),
+        ("hysteresis_y_weight", "Hysteresis Y", 0.0, 10.0),
+        ("symmetry_weight", "Symmetry W", 0.0, 30.0),
+        ("ball_dist_weight", "Ball Dist W", 0.0, 20.0),
+        ("forward_weight", "Forward Bias", 0.0, 20.0),
+        ("penalty_weight", "Gen Penalty", 0.0, 30.0),
+        ("path_margin", "Path Margin", 0.1, 5.0),
+        ("pass_penalty_weight", "Pass Path Pen", 0.0, 50.0),
+        ("shot_penalty_weight", "Shot Path Pen", 0.0, 50.0),
+        ("movement_penalty_weight", "Move Path Pen", 0.0, 50.0),
+    ],
+    "pass": [
+        ("min_pass_threshold", "Min Pass Dist", 0.0, 5.0),
+        ("max_pass_threshold", "Max Pass Dist", 2.0, 10.0),
+        ("tm_select_w_dist", "TM Sel Dist", 0.0, 5.0),
+        ("tm_select_w_x", "TM Sel X", 0.0, 5.0),
+        ("base_score", "Pass Base Scr", 0.0, 20.0),
+        ("w_abs_dx", "Pass X W", 0.0, 5.0),
+        ("w_abs_dy", "Pass Y W", 0.0, 5.0),
+        ("w_x", "Pass Fwd Bias", 0.0, 5.0),
+        ("w_y", "Pass Cnt Bias", 0.0, 5.0),
+        ("opp_penalty", "Pass Block Pen", 0.0, 50.0),
+        ("score_threshold", "Pass Thresh", 0.0, 20.0),
+        ("receive_pass_margin", "Recv Pass Marg", 0.1, 5.0),
+    ],
+}
+
 # ============================================================
 # 3) Simulation Settings
 # ============================================================
@@ -173,3 +221,15 @@ SIM = {
     "player_speed": 0.5,       # Robot speed (m/s)
     "user_step": 0.05,         # Manual control step size
 }
+
+# ============================================================
+# 4) Ball Flight / Pass Execution
+# ============================================================
+BALL_PARAMS = {
+    "pass_speed": 3.0,         # Initial ball speed when kicked (m/s)
+    "decel": 0.6,              # Rolling friction deceleration (m/s^2)
+    "capture_radius": 0.35,    # Opponent controls the ball within this distance (m, ~ROBOT_RADIUS)
+    "reaction_time": 0.2,      # Opponent delay before reacting to a kick (s)
+    "path_samples": 16,        # Points checked along each pass for interception
+    "reset_delay": 0.5,        # Wait before the ball returns to the passer (s)
+}
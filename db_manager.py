@@ -2,6 +2,8 @@ import sqlite3
 import json
 import time
 import os
+import queue
+import threading
 
 # Firebase Imports
 try:
@@ -18,17 +20,111 @@ KEY_PATH = "soccer-db-f6361-firebase-adminsdk-fbsvc-4e7e5b06ca.json"
 # IMPORTANT: Set this to your Firebase Database URL
 FIREBASE_DB_URL = "https://soccer-db-f6361-default-rtdb.firebaseio.com/"
 
+# SQLite tuning for the persistent connections: WAL lets readers run during a
+# write, NORMAL only fsyncs at checkpoints (a crash can lose the last commits,
+# never corrupt the file), negative cache_size is KiB of page cache.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16384",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+READ_PRAGMAS = (
+    "PRAGMA cache_size=-16384",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA query_only=ON",
+)
+
+# Streaming recorder (RunRecorder): ticks buffered before append() blocks the
+# sim, the longest append() blocks before ticks are dropped, ticks per write
+# transaction, and the longest a tick waits to be written
+REC_QUEUE_SIZE = 4096
+REC_PUT_TIMEOUT_SEC = 1.0
+REC_BATCH = 256
+REC_FLUSH_SEC = 0.5
+RECORDING_NOTE = "Recording"  # runs still being recorded (or cut off by a crash)
+REC_STALE_SEC = 300.0         # open runs without a new tick for this long are recovered on startup
+
+# query_runs: outcome columns of sim_runs by filter / sort name, and allowed comparisons
+RUN_METRICS = {
+    "id": "id", "timestamp": "timestamp", "duration": "duration",
+    "score": "total_striker_score", "pass_success_rate": "pass_success_rate", "note": "note",
+}
+QUERY_OPS = ("=", "!=", "<", "<=", ">", ">=")
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+def get_db_manager(db_name=DB_NAME):
+    """Process-wide DBManager per database file (tables are created once)."""
+    with _managers_lock:
+        if db_name not in _managers:
+            _managers[db_name] = DBManager(db_name)
+        return _managers[db_name]
+
 class DBManager:
     def __init__(self, db_name=DB_NAME):
         self.db_name = db_name
         self.firebase_app = None
+
+        # One write connection for the whole process, shared by all threads
+        # (Streamlit sessions, recorder, cloud thread) and serialized by _lock.
+        # Reads use a read-only connection per thread (_reader), which WAL lets
+        # run next to the writer without taking _lock.
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_name, check_same_thread=False, isolation_level=None) # explicit transactions
+        for pragma in SQLITE_PRAGMAS:
+            self._conn.execute(pragma)
+        self._local = threading.local()
+        self._readers = {} # thread -> its read connection
         self.init_db()
-        self.init_firebase()
+
+        # Cloud: initialized lazily on a background thread by the first save that
+        # needs it (Firebase setup + the time drift probe can block for seconds),
+        # then uploads run on that thread in save order.
+        self._cloud_queue = queue.Queue()
+        self._cloud_thread = None
+        self._cloud_lock = threading.Lock()
+        self._cloud_cond = threading.Condition()
+        self._cloud_pending = 0
+
+    def transaction(self):
+        """Context manager: (cursor) inside one transaction, committed on exit / rolled back on error."""
+        return _Transaction(self)
+
+    def _reader(self):
+        """This thread's read-only connection (opened on first use)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            uri = "file:" + os.path.abspath(self.db_name) + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False) # closed by whichever thread prunes it
+            for pragma in READ_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            with self._lock:
+                # Streamlit runs every rerun on a new thread: drop readers of finished ones
+                for thread in [t for t in self._readers if not t.is_alive()]:
+                    self._readers.pop(thread).close()
+                self._readers[threading.current_thread()] = conn
+        return conn
+
+    def close(self):
+        with self._lock:
+            for conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
+            self._conn.close()
 
     def init_db(self):
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
+        with self.transaction() as cursor:
+            migrated = self._create_tables(cursor)
+        if migrated:
+            with self._lock:
+                self._conn.execute("VACUUM") # give the blob pages back
+
+    def _create_tables(self, cursor):
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS sim_runs (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -50,6 +146,7 @@ class DBManager:
             )
         ''')
         
+        # Legacy: one JSON blob per run, migrated to sim_ticks on startup
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS sim_logs (
                 run_id INTEGER,
@@ -57,9 +154,55 @@ class DBManager:
                 FOREIGN KEY(run_id) REFERENCES sim_runs(id)
             )
         ''')
-        
-        conn.commit()
-        conn.close()
+
+        # One typed row per recorded tick: slices of a run are an index range scan
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sim_ticks (
+                run_id INTEGER NOT NULL,
+                t REAL NOT NULL,
+                ofb_score REAL,
+                striker_x REAL,
+                striker_y REAL,
+                FOREIGN KEY(run_id) REFERENCES sim_runs(id)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sim_ticks_run_t ON sim_ticks (run_id, t)')
+
+        # Params of a run / runs by param value (run_id last: the filter subqueries never touch the table)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sim_params_run ON sim_params (run_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sim_params_key_value ON sim_params (param_key, param_value, run_id)')
+        migrated = self._migrate_logs(cursor)
+        self._recover_runs(cursor)
+        return migrated
+
+    def _migrate_logs(self, cursor):
+        """Moves JSON blob logs (sim_logs) into sim_ticks, once. Returns the number of runs moved."""
+        rows = cursor.execute('SELECT rowid, run_id, log_json FROM sim_logs').fetchall()
+        if not rows:
+            return 0
+        n_runs = n_ticks = 0
+        for rowid, run_id, log_json in rows:
+            try:
+                log_data = json.loads(log_json or "[]")
+            except ValueError:
+                print(f"[DB] Run {run_id}: unreadable log blob kept in sim_logs")
+                continue
+            n_ticks += self._insert_ticks(cursor, run_id, log_data)
+            cursor.execute('DELETE FROM sim_logs WHERE rowid = ?', (rowid,))
+            n_runs += 1
+        if n_runs:
+            print(f"[DB] Migrated {n_runs} blob logs ({n_ticks} ticks) to sim_ticks")
+        return n_runs
+
+    @staticmethod
+    def _tick_row(run_id, row):
+        sx, sy = row.get('striker') or (None, None)
+        return (run_id, float(row['t']), float(row['ofb_score']), sx, sy)
+
+    def _insert_ticks(self, cursor, run_id, log_data):
+        cursor.executemany('INSERT INTO sim_ticks VALUES (?, ?, ?, ?, ?)',
+                           [self._tick_row(run_id, row) for row in log_data])
+        return len(log_data)
 
     def init_firebase(self):
         if not FIREBASE_AVAILABLE: return
@@ -119,7 +262,7 @@ class DBManager:
         try:
             import requests
             import email.utils
-            from datetime import datetime, timedelta
+            from datetime import timedelta
             
             print("[DB] Checking System Time vs Google Time...")
             resp = requests.head("https://www.google.com", timeout=2)
@@ -134,14 +277,14 @@ class DBManager:
 
                 if abs(drift) > 300: # Calibration if > 5 mins off
                     print(f"[DB] CRITICAL: Large Time Drift ({drift:.1f}s) Detected!")
-                    print("[DB] Monkey-patching time.time() to fix Firebase Auth...")
-                    
-                    # Monkey Patch time.time
-                    _orig_time = time.time
-                    time.time = lambda: _orig_time() + drift
-                    
-                    # Note: We cannot easily patch datetime.utcnow as it's a built-in C method
-                    # But google.auth mostly uses time.time() for JWT timestamps.
+                    print("[DB] Shifting the Firebase Auth clock...")
+
+                    # Only google-auth's clock (JWT iat / exp): init runs lazily on the cloud
+                    # thread, and patching time.time here would make the timestamps of
+                    # recordings / saves running on other threads jump mid-session.
+                    from google.auth import _helpers as auth_helpers
+                    _auth_utcnow = auth_helpers.utcnow
+                    auth_helpers.utcnow = lambda: _auth_utcnow() + timedelta(seconds=drift)
         except Exception as e:
             print(f"[DB] Time Check Failed (Non-critical?): {e}")
 
@@ -173,43 +316,127 @@ class DBManager:
         else:
             print(f"[DB] {KEY_PATH} not found. Local only mode.")
 
-    def save_run(self, duration, log_data, config_pass, config_st):
+    def save_run(self, duration, log_data, config_pass, config_st, pass_success_rate=0.0):
         """
         Saves a completed simulation run to Local SQLite AND Firebase (if connected).
+        pass_success_rate: received / executed passes during the recording.
         """
         # 1. Local Save
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
+        timestamp = time.time()
+        with self.transaction() as cursor:
+            run_id, avg_score = self._insert_run(cursor, timestamp, duration, log_data, config_pass, config_st,
+                                                 pass_success_rate)
+        print(f"[DB] Local Run saved with ID: {run_id}")
         
+        # 2. Cloud Save (background, returns right away)
+        self._sync_cloud(run_id, timestamp, duration, avg_score, config_pass, config_st, log_data)
+        return run_id
+
+    def _sync_cloud(self, run_id, timestamp, duration, avg_score, config_pass, config_st, log_data):
+        if FIREBASE_AVAILABLE:
+            print("[DB] Queued Cloud Sync...")
+            self._queue_cloud((run_id, timestamp, duration, avg_score, dict(config_pass), dict(config_st), log_data))
+        else:
+            self.upload_to_firebase(run_id, timestamp, duration, avg_score, config_pass, config_st, log_data)
+
+    def start_recording(self):
+        """
+        Opens a run and returns a RunRecorder streaming its ticks to sim_ticks.
+        The run is saved with recorder.finish(); if the process dies first, the
+        ticks written so far are kept and the run is recovered on the next start.
+        """
+        with self.transaction() as cursor:
+            cursor.execute('INSERT INTO sim_runs (timestamp, note) VALUES (?, ?)', (time.time(), RECORDING_NOTE))
+            run_id = cursor.lastrowid
+        return RunRecorder(self, run_id)
+
+    def _finalize_run(self, run_id, duration, config_pass, config_st, pass_success_rate, note="Auto-saved run"):
+        """Fills in a streamed run's metadata (score from its ticks) and params. Returns (timestamp, avg score)."""
+        with self.transaction() as cursor:
+            timestamp, avg_score = cursor.execute(
+                'SELECT r.timestamp, (SELECT AVG(ofb_score) FROM sim_ticks WHERE run_id = r.id) '
+                'FROM sim_runs r WHERE r.id = ?', (run_id,)).fetchone()
+            avg_score = avg_score or 0.0
+            cursor.execute('''
+                UPDATE sim_runs SET duration = ?, total_striker_score = ?, pass_success_rate = ?, note = ?
+                WHERE id = ?
+            ''', (duration, avg_score, float(pass_success_rate), note, run_id))
+            params = [(run_id, 'PASS', k, float(v)) for k, v in config_pass.items()]
+            params += [(run_id, 'ST', k, float(v)) for k, v in config_st.items()]
+            cursor.executemany('INSERT INTO sim_params VALUES (?, ?, ?, ?)', params)
+        return timestamp, avg_score
+
+    def _recover_runs(self, cursor):
+        """
+        Closes runs left open by a crash: duration and score from the ticks that
+        made it to disk. Only runs idle for REC_STALE_SEC, so a recording still
+        streaming from another process is left alone.
+        """
+        rows = cursor.execute('''
+            SELECT r.id, MAX(t.t) - MIN(t.t), AVG(t.ofb_score) FROM sim_runs r
+            LEFT JOIN sim_ticks t ON t.run_id = r.id WHERE r.note = ? GROUP BY r.id
+            HAVING COALESCE(MAX(t.t), r.timestamp) < ?
+        ''', (RECORDING_NOTE, time.time() - REC_STALE_SEC)).fetchall()
+        for run_id, duration, avg_score in rows:
+            cursor.execute('UPDATE sim_runs SET duration = ?, total_striker_score = ?, note = ? WHERE id = ?',
+                           (duration or 0.0, avg_score or 0.0, "Recovered run (not saved)", run_id))
+        if rows:
+            print(f"[DB] Recovered {len(rows)} unfinished recordings")
+
+    def save_runs(self, runs):
+        """
+        Batch ingest (local only, no cloud upload): runs are (duration, log_data,
+        config_pass, config_st, pass_success_rate) tuples, written in one transaction.
+        Returns the new run ids.
+        """
         timestamp = time.time()
+        with self.transaction() as cursor:
+            ids = [self._insert_run(cursor, timestamp, *run)[0] for run in runs]
+        print(f"[DB] Local batch saved: {len(ids)} runs")
+        return ids
+
+    def _insert_run(self, cursor, timestamp, duration, log_data, config_pass, config_st, pass_success_rate=0.0):
         avg_score = 0.0
         if len(log_data) > 0:
             avg_score = sum(float(row['ofb_score']) for row in log_data) / len(log_data)
-            
+
         cursor.execute('''
             INSERT INTO sim_runs (timestamp, duration, total_striker_score, pass_success_rate, note)
             VALUES (?, ?, ?, ?, ?)
-        ''', (timestamp, duration, avg_score, 0.0, "Auto-saved run"))
-        
+        ''', (timestamp, duration, avg_score, float(pass_success_rate), "Auto-saved run"))
         run_id = cursor.lastrowid
-        
-        for k, v in config_pass.items():
-            cursor.execute('INSERT INTO sim_params VALUES (?, ?, ?, ?)', (run_id, 'PASS', k, float(v)))
-        for k, v in config_st.items():
-            cursor.execute('INSERT INTO sim_params VALUES (?, ?, ?, ?)', (run_id, 'ST', k, float(v)))
-            
-        log_json = json.dumps(log_data)
-        cursor.execute('INSERT INTO sim_logs VALUES (?, ?)', (run_id, log_json))
-        
-        conn.commit()
-        conn.close()
-        print(f"[DB] Local Run saved with ID: {run_id}")
-        
-        # 2. Cloud Save
-        print("[DB] Attempting Cloud Sync...")
-        self.upload_to_firebase(run_id, timestamp, duration, avg_score, config_pass, config_st, log_data)
 
-        return run_id
+        params = [(run_id, 'PASS', k, float(v)) for k, v in config_pass.items()]
+        params += [(run_id, 'ST', k, float(v)) for k, v in config_st.items()]
+        cursor.executemany('INSERT INTO sim_params VALUES (?, ?, ?, ?)', params)
+
+        self._insert_ticks(cursor, run_id, log_data)
+        return run_id, avg_score
+
+    def _queue_cloud(self, job):
+        with self._cloud_cond:
+            self._cloud_pending += 1
+        self._cloud_queue.put(job)
+        with self._cloud_lock:
+            if self._cloud_thread is None:
+                self._cloud_thread = threading.Thread(target=self._cloud_worker, name="db-cloud", daemon=True)
+                self._cloud_thread.start()
+
+    def _cloud_worker(self):
+        self.init_firebase() # once, before the first upload
+        while True:
+            job = self._cloud_queue.get()
+            try:
+                self.upload_to_firebase(*job)
+            finally:
+                with self._cloud_cond:
+                    self._cloud_pending -= 1
+                    self._cloud_cond.notify_all()
+
+    def flush(self, timeout=None):
+        """Waits for queued cloud uploads (e.g. before the process exits). True if none are left."""
+        with self._cloud_cond:
+            return self._cloud_cond.wait_for(lambda: self._cloud_pending == 0, timeout)
 
     def upload_to_firebase(self, local_id, timestamp, duration, score, cfg_pass, cfg_st, logs):
         if not self.firebase_app:
@@ -241,9 +468,217 @@ class DBManager:
 
     def get_runs(self, limit=10):
         # Local view only
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM sim_runs ORDER BY id DESC LIMIT ?', (limit,))
-        rows = cursor.fetchall()
-        conn.close()
-        return rows
+        return self._reader().execute('SELECT * FROM sim_runs ORDER BY id DESC LIMIT ?', (limit,)).fetchall()
+
+    @staticmethod
+    def _param_ref(name):
+        """'forward_weight' (any type) or 'ST.forward_weight' / 'PASS.opp_penalty' -> (sql, args)."""
+        ptype, _, key = name.rpartition(".")
+        if ptype:
+            return "param_key = ? AND param_type = ?", [key, ptype.upper()]
+        return "param_key = ?", [key]
+
+    def query_runs(self, where=(), order_by="id", descending=True, limit=None, params=None,
+                   include_unfinished=False):
+        """
+        Runs filtered / sorted by outcome metrics and param values, as a pandas
+        DataFrame (one row per run, index run id) with the run columns plus one
+        "TYPE.key" column per param.
+
+            db.query_runs([("forward_weight", ">", 3), ("score", ">", 5)], order_by="score")
+
+        where: (name, op, value) terms, all must hold. name is a RUN_METRICS key
+        or a param key, optionally qualified by type ("ST.forward_weight").
+        order_by: the same kind of name. params: only pivot these param names
+        (default all). Param filters use idx_sim_params_key_value, so selective
+        filters stay fast on large tables.
+        """
+        import pandas as pd # only the analysis path needs pandas
+
+        conds, args = [], []
+        if not include_unfinished:
+            conds.append("r.note IS NOT ?")
+            args.append(RECORDING_NOTE)
+        for name, op, value in where:
+            if op not in QUERY_OPS:
+                raise ValueError(f"Unsupported operator {op!r} (use one of {', '.join(QUERY_OPS)})")
+            if name in RUN_METRICS:
+                conds.append(f"r.{RUN_METRICS[name]} {op} ?")
+                args.append(value)
+            else:
+                ref, ref_args = self._param_ref(name)
+                conds.append(f"r.id IN (SELECT run_id FROM sim_params WHERE {ref} AND param_value {op} ?)")
+                args += ref_args + [value]
+
+        # Param sort key joined once (a correlated subquery per run is slow on big tables)
+        join, join_args = "", []
+        if order_by in RUN_METRICS:
+            order = f"r.{RUN_METRICS[order_by]}"
+        else:
+            ref, join_args = self._param_ref(order_by)
+            join = (" LEFT JOIN (SELECT run_id, MAX(param_value) AS value FROM sim_params"
+                    f" WHERE {ref} GROUP BY run_id) o ON o.run_id = r.id")
+            order = "o.value"
+        runs_sql = ("SELECT r.id, r.timestamp, r.duration, r.total_striker_score AS score, "
+                    "r.pass_success_rate, r.note FROM sim_runs r" + join
+                    + (" WHERE " + " AND ".join(conds) if conds else "")
+                    + f" ORDER BY {order} {'DESC' if descending else 'ASC'}, r.id DESC"
+                    + (" LIMIT ?" if limit is not None else ""))
+        runs_args = join_args + args + ([int(limit)] if limit is not None else [])
+
+        param_sql = ("SELECT p.run_id, p.param_type || '.' || p.param_key AS param, p.param_value "
+                     f"FROM sim_params p WHERE p.run_id IN (SELECT id FROM ({runs_sql}))")
+        param_args = list(runs_args)
+        if params is not None:
+            refs = [self._param_ref(name) for name in params] or [("0", [])]
+            param_sql += " AND (" + " OR ".join(f"({ref})" for ref, _ in refs) + ")"
+            for _, ref_args in refs:
+                param_args += ref_args
+
+        conn = self._reader()
+        conn.execute("BEGIN") # one snapshot for both queries
+        try:
+            runs = pd.read_sql_query(runs_sql, conn, params=runs_args, index_col="id")
+            long = pd.read_sql_query(param_sql, conn, params=param_args)
+        finally:
+            conn.execute("COMMIT")
+        if long.empty:
+            return runs
+        wide = long.pivot_table(index="run_id", columns="param", values="param_value", aggfunc="last")
+        wide.columns.name = None
+        return runs.join(wide)
+
+    def get_ticks(self, run_id, t_from=None, t_to=None):
+        """(t, ofb_score, striker_x, striker_y) rows of a run, optionally only t_from <= t < t_to."""
+        sql = 'SELECT t, ofb_score, striker_x, striker_y FROM sim_ticks WHERE run_id = ?'
+        args = [run_id]
+        if t_from is not None:
+            sql += ' AND t >= ?'
+            args.append(t_from)
+        if t_to is not None:
+            sql += ' AND t < ?'
+            args.append(t_to)
+        return self._reader().execute(sql + ' ORDER BY t', args).fetchall()
+
+    def get_log(self, run_id, t_from=None, t_to=None):
+        """Ticks of a run in the recorder's format ({"t", "ofb_score", "striker"} dicts)."""
+        return [{"t": t, "ofb_score": score, "striker": (sx, sy)}
+                for t, score, sx, sy in self.get_ticks(run_id, t_from, t_to)]
+
+
+class _Transaction:
+    """Holds the manager's lock for one transaction on the shared connection."""
+    def __init__(self, manager):
+        self.manager = manager
+
+    def __enter__(self):
+        self.manager._lock.acquire()
+        self.cursor = self.manager._conn.cursor()
+        self.cursor.execute("BEGIN")
+        return self.cursor
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.manager._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.cursor.close()
+            self.manager._lock.release()
+        return False
+
+
+class RunRecorder:
+    """
+    Streams the ticks of one recording to sim_ticks from a writer thread.
+    append() only queues (blocking the caller only if the writer is
+    REC_QUEUE_SIZE ticks behind, and then for at most REC_PUT_TIMEOUT_SEC
+    before ticks are dropped), the writer commits batches of up to REC_BATCH
+    ticks at least every REC_FLUSH_SEC, so memory stays bounded and a crash
+    loses at most the last unflushed batch.
+    """
+    _STOP = object()
+
+    def __init__(self, manager, run_id):
+        self.manager = manager
+        self.run_id = run_id
+        self.count = 0   # ticks written
+        self.dropped = 0 # ticks dropped (writer behind or failing)
+        self._behind = False
+        self._abandoned = False # close() gave up waiting: the writer exits once the queue is empty
+        self._queue = queue.Queue(maxsize=REC_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name=f"db-rec-{run_id}", daemon=True)
+        self._thread.start()
+        print(f"[DB] Recording run {run_id}")
+
+    def append(self, entry):
+        """One log entry ({"t", "ofb_score", "striker"}), as the old rec_data lists held."""
+        try:
+            # Once a put timed out, drop without waiting until the writer catches up
+            # (the caller may be a sim tick holding its engine lock)
+            self._queue.put(entry, block=not self._behind, timeout=REC_PUT_TIMEOUT_SEC)
+            self._behind = False
+        except queue.Full:
+            if not self._behind:
+                print(f"[DB] Recorder {self.run_id} is behind, dropping ticks")
+            self._behind = True
+            self.dropped += 1
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            try:
+                batch = [self._queue.get(timeout=REC_FLUSH_SEC)]
+            except queue.Empty:
+                if self._abandoned:
+                    break
+                continue
+            while len(batch) < REC_BATCH and batch[-1] is not self._STOP:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is self._STOP:
+                batch.pop()
+                stop = True
+            if batch:
+                try:
+                    with self.manager.transaction() as cursor:
+                        self.count += self.manager._insert_ticks(cursor, self.run_id, batch)
+                except Exception as e: # keep draining: a dead writer would block append() for good
+                    self.dropped += len(batch)
+                    print(f"[DB] Recorder write failed (run {self.run_id}, {len(batch)} ticks lost): {e}")
+
+    def close(self):
+        """Writes everything queued and stops the writer (the run stays unfinished)."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(self._STOP, timeout=REC_PUT_TIMEOUT_SEC)
+        except queue.Full:
+            # Writer stalled (e.g. a locked db): don't hang the caller, it exits once it drains
+            print(f"[DB] Recorder {self.run_id} writer stalled, {self._queue.qsize()} ticks unwritten")
+            self._abandoned = True
+            return
+        self._thread.join()
+
+    def discard(self):
+        """Drops the recording (ticks + run row), e.g. when the sim is stopped without saving."""
+        self.close()
+        with self.manager.transaction() as cursor:
+            cursor.execute('DELETE FROM sim_ticks WHERE run_id = ?', (self.run_id,))
+            cursor.execute('DELETE FROM sim_runs WHERE id = ?', (self.run_id,))
+        print(f"[DB] Recording {self.run_id} discarded")
+
+    def finish(self, duration, config_pass, config_st, pass_success_rate=0.0):
+        """Flushes the ticks, saves the run metadata + params, queues the cloud upload. Returns the run id."""
+        self.close()
+        timestamp, avg_score = self.manager._finalize_run(self.run_id, duration, config_pass, config_st,
+                                                          pass_success_rate)
+        lost = f", {self.dropped} dropped" if self.dropped else ""
+        print(f"[DB] Local Run saved with ID: {self.run_id} ({self.count} ticks{lost})")
+        self.manager._sync_cloud(self.run_id, timestamp, duration, avg_score, config_pass, config_st,
+                                 self.manager.get_log(self.run_id))
+        return self.run_id
@@ -0,0 +1,453 @@
+"""
+Layered Field Rendering (PyGame)
+
+Static layers (pitch lines, penalty areas, panel chrome, legends, slider
+tracks) are pre-rendered once into a cached surface. Cached layers that only
+change on edits (sliders, heatmap panels) are redrawn into a background copy
+when they change. Everything else is a dynamic layer redrawn every frame, and
+only the rectangles touched are pushed with pygame.display.update.
+"""
+
+import pygame
+import config as CFG
+from sim_logic import Pose2D
+
+# --- Layout ---
+WIDTH, HEIGHT = 1400, 850  # Compact Layout
+FIELD_WIDTH_PX = 600
+FIELD_HEIGHT_PX = 400
+FIELD_CENTER = (350, 425)
+PANEL_X = 700
+PANEL_BG = (30, 30, 30)
+HEATMAP_W, HEATMAP_H = 300, 210 # Heatmap panel size (rendered 1:1)
+STRIKER_HM_POS = (730, 30)
+PASS_HM_POS = (1050, 30)
+
+# Colors
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GREEN = (34, 139, 34)
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+CYAN = (0, 255, 255)
+ORANGE = (255, 165, 0)
+YELLOW = (255, 255, 0)
+DARK_RED = (139, 0, 0)
+GRAY = (100, 100, 100)
+LIGHT_GRAY = (200, 200, 200)
+
+SCALE = FIELD_WIDTH_PX / 9.0 # Fits 9m field into 600px width
+
+
+def world_to_screen(x, y):
+    """Convert world coordinates (meters) to screen coordinates (pixels)."""
+    # Centered in Field Rect which is (350, 425) center.
+    center_x, center_y = FIELD_CENTER
+    sx = center_x + int(x * SCALE)
+    sy = center_y - int(y * SCALE)
+    return sx, sy
+
+
+def field_rect():
+    return pygame.Rect(
+        FIELD_CENTER[0] - FIELD_WIDTH_PX//2,
+        FIELD_CENTER[1] - FIELD_HEIGHT_PX//2,
+        FIELD_WIDTH_PX,
+        FIELD_HEIGHT_PX
+    )
+
+
+def field_view_rect():
+    """Screen area of the field view (field plus the grass border strip), left of the panel."""
+    border_px = int(CFG.FIELD_DIMS["border_strip_min"] * SCALE)
+    return field_rect().inflate(2*border_px, 2*border_px).clip(pygame.Rect(0, 0, PANEL_X, HEIGHT))
+
+
+def draw_ruler(surf, rect, bounds, font, color=WHITE):
+    min_x, max_x, min_y, max_y = bounds
+    w, h = rect.width, rect.height
+
+    # Draw Border
+    pygame.draw.rect(surf, color, rect, 1)
+
+    # Center Cross
+    cx = rect.x + (0 - min_x)/(max_x-min_x) * w
+    cy = rect.y + (max_y - 0)/(max_y-min_y) * h
+    if rect.left <= cx <= rect.right and rect.top <= cy <= rect.bottom:
+         pygame.draw.line(surf, GRAY, (cx, rect.top), (cx, rect.bottom), 1)
+         pygame.draw.line(surf, GRAY, (rect.left, cy), (rect.right, cy), 1)
+
+    # Labels (corners)
+    if font:
+        # TL
+        lbl = font.render(f"{min_x:.1f},{max_y:.1f}", True, color)
+        surf.blit(lbl, (rect.x + 2, rect.y + 2))
+        # BR
+        lbl = font.render(f"{max_x:.1f},{min_y:.1f}", True, color)
+        surf.blit(lbl, (rect.right - lbl.get_width() - 2, rect.bottom - lbl.get_height() - 2))
+    return rect
+
+
+def draw_field(screen, font):
+    """Pitch: grass, boundary, center line / circle, areas, goals and the field ruler."""
+    f_rect = field_rect()
+    f_len = CFG.FIELD_DIMS["length"]
+    cy = FIELD_CENTER[1]
+
+    # Draw Border Strip (Grass outside lines) based on Border Strip Min
+    pygame.draw.rect(screen, GREEN, field_view_rect()) # Full Grass
+
+    # Draw Field Boundary Lines (White)
+    pygame.draw.rect(screen, WHITE, f_rect, 2)
+
+    # Center Line
+    mid_x = (f_rect.left + f_rect.right) // 2
+    pygame.draw.line(screen, WHITE, (mid_x, f_rect.top), (mid_x, f_rect.bottom), 2)
+
+    # Center Circle
+    cc_radius_px = int(CFG.FIELD_DIMS["center_circle_diameter"] / 2.0 * SCALE)
+    pygame.draw.circle(screen, WHITE, (mid_x, cy), cc_radius_px, 2)
+
+    # Helper for Areas (Left side, then flip for Right)
+    def draw_field_areas(is_left):
+        # Base X (Goal Line X on screen)
+        base_x = f_rect.left if is_left else f_rect.right
+
+        # 1. Penalty Area
+        pa_w_px = int(CFG.FIELD_DIMS["penalty_area_depth"] * SCALE)
+        pa_h_px = int(CFG.FIELD_DIMS["penalty_area_width"] * SCALE)
+        pa_top_px = cy - pa_h_px // 2
+        # If left: x is base_x. If right: x is base_x - width.
+        rx = base_x if is_left else base_x - pa_w_px
+        pygame.draw.rect(screen, WHITE, (rx, pa_top_px, pa_w_px, pa_h_px), 2)
+
+        # 2. Goal Area
+        ga_w_px = int(CFG.FIELD_DIMS["goal_area_depth"] * SCALE)
+        ga_h_px = int(CFG.FIELD_DIMS["goal_area_width"] * SCALE)
+        ga_top_px = cy - ga_h_px // 2
+        rx = base_x if is_left else base_x - ga_w_px
+        pygame.draw.rect(screen, WHITE, (rx, ga_top_px, ga_w_px, ga_h_px), 2)
+
+        # 3. Penalty Mark
+        pm_dist = CFG.FIELD_DIMS["penalty_mark_dist"]
+        pm_x_m = (f_len/2.0 - pm_dist) * -1 if is_left else (f_len/2.0 - pm_dist)
+        pm_sx, pm_sy = world_to_screen(pm_x_m, 0)
+        # Ensure at least 2px visible
+        pm_rad_px = max(2, int(CFG.FIELD_DIMS["penalty_mark_size"] / 2.0 * SCALE))
+        pygame.draw.circle(screen, WHITE, (pm_sx, pm_sy), pm_rad_px)
+
+        # 4. Goal Structure (Outside field)
+        gw_px = int(CFG.FIELD_DIMS["goal_width"] * SCALE)
+        gd_px = int(CFG.FIELD_DIMS["goal_depth"] * SCALE)
+        gx = base_x - gd_px if is_left else base_x
+        gy = cy - gw_px // 2
+        # Draw Goal Depth Box
+        pygame.draw.rect(screen, WHITE, (gx, gy, gd_px, gw_px), 2)
+
+    draw_field_areas(is_left=True)
+    draw_field_areas(is_left=False)
+
+    # Ruler and Costmap Bounds Visualization (User Request)
+    draw_ruler(screen, f_rect, CFG.VIEW_BOUNDS, font, LIGHT_GRAY)
+
+
+def draw_panel_chrome(screen, font):
+    """Right panel background, headers and the team legend."""
+    pygame.draw.rect(screen, PANEL_BG, (PANEL_X, 0, WIDTH-PANEL_X, HEIGHT))
+    pygame.draw.line(screen, WHITE, (PANEL_X, 0), (PANEL_X, HEIGHT))
+
+    if font:
+        # Headers
+        screen.blit(font.render("Striker Optimization", True, WHITE), (730, 10))
+        screen.blit(font.render("Pass Decision", True, WHITE), (1050, 10))
+        screen.blit(font.render("Optimization Weights", True, YELLOW), (730, 280))
+        screen.blit(font.render("Pass Logic Params", True, YELLOW), (1050, 280))
+
+        # Team Legend
+        start_y = 110
+        screen.blit(font.render("Team A:", True, WHITE), (10, start_y))
+        pygame.draw.circle(screen, BLUE, (91, start_y + 5), 7)
+        screen.blit(font.render("Team B:", True, WHITE), (10, start_y + 25))
+        pygame.draw.circle(screen, RED, (91, start_y + 30), 7)
+
+
+def build_static_layer(font, sliders=()):
+    """Pre-renders everything that never changes into one cached surface."""
+    layer = pygame.Surface((WIDTH, HEIGHT))
+    layer.fill(BLACK)
+    draw_field(layer, font)
+    draw_panel_chrome(layer, font)
+    for s in sliders:
+        s.draw_track(layer)
+    return layer
+
+
+class LayeredRenderer:
+    """
+    Composites cached layers and dirty-rect updates the dynamic layer.
+
+    Per frame:
+        begin_frame()                      - erase last frame's dynamic rects
+        update_layer(rect, draw_fn)        - redraw a cached layer region (sliders, heatmaps)
+        mark(rect)                         - record a rect drawn by the dynamic layer
+        end_frame()                        - display.update(old + new dirty rects)
+    """
+    def __init__(self, screen, static_layer):
+        self.screen = screen
+        self.static = static_layer
+        self.background = static_layer.copy() # static + cached layers
+        self._prev = []
+        self._cur = []
+        self._layer_rects = []
+        self._full = True
+
+    def invalidate(self):
+        """Forces a full redraw and flip on the next frame (e.g. after a resize)."""
+        self._full = True
+
+    def begin_frame(self):
+        if self._full:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for r in self._prev:
+                self.screen.blit(self.background, r, r)
+
+    def update_layer(self, rect, draw_fn):
+        """Redraws one cached layer region onto the background and the screen."""
+        rect = pygame.Rect(rect)
+        self.background.blit(self.static, rect, rect)
+        self.background.set_clip(rect)
+        draw_fn(self.background)
+        self.background.set_clip(None)
+        self.screen.blit(self.background, rect, rect)
+        self._layer_rects.append(rect)
+
+    def mark(self, rect):
+        if rect is not None:
+            self._cur.append(pygame.Rect(rect))
+        return rect
+
+    def blit(self, surf, pos):
+        return self.mark(self.screen.blit(surf, pos))
+
+    def end_frame(self):
+        if self._full:
+            pygame.display.flip()
+            self._full = False
+        else:
+            pygame.display.update(self._prev + self._cur + self._layer_rects)
+        self._prev = self._cur
+        self._cur = []
+        self._layer_rects = []
+
+
+# ============================================================
+# Frame Drawing (shared by the window and the offscreen renderer)
+# ============================================================
+
+def draw_heatmap_panel(surf, heatmap_surf, bounds, font, pos, color):
+    """Heatmap surface (already HEATMAP_W x HEATMAP_H) plus its ruler."""
+    r = pygame.Rect(pos, (HEATMAP_W, HEATMAP_H))
+    surf.blit(heatmap_surf, r.topleft)
+    draw_ruler(surf, r, bounds, font, color)
+    return r
+
+
+def draw_frame(screen, font, state, mark=None, fps=None, recording=False, status=None,
+               to_screen=world_to_screen, clip=None):
+    """
+    Dynamic layer for a sim_engine.FrameState: costmap windows, players, ball,
+    pass line, pause overlay and the text overlay. mark(rect) is called with
+    every drawn rect (dirty rects). fps=None shows the sim time instead
+    (offscreen rendering). to_screen / clip place the field part in a zoomed view.
+    """
+    mark = mark or (lambda r: r)
+    screen.set_clip(clip)
+
+    def draw_bounds_rect(bounds, color):
+        mx, Mx, my, My = bounds
+        # Convert to screen coords
+        x1, y1 = to_screen(mx, My) # TL
+        x2, y2 = to_screen(Mx, my) # BR
+        r = pygame.Rect(x1, y1, x2-x1, y2-y1)
+        mark(pygame.draw.rect(screen, color, r, 2))
+
+    draw_bounds_rect(state.striker_bounds, CYAN)
+    draw_bounds_rect(state.pass_bounds, YELLOW)
+
+    # Entities Drawing
+    def draw_entity(pose, color, radius=10, shape="circle", text=None, text_color=WHITE):
+        sx, sy = to_screen(pose.x, pose.y)
+
+        # User requested ALL players as circles, but we keep shape logic just in case
+        if shape == "circle":
+            mark(pygame.draw.circle(screen, color, (sx, sy), radius))
+        elif shape == "rect":
+            mark(pygame.draw.rect(screen, color, (sx-radius, sy-radius, radius*2, radius*2)))
+        elif shape == "diamond":
+            points = [(sx, sy-radius), (sx+radius, sy), (sx, sy+radius), (sx-radius, sy)]
+            mark(pygame.draw.polygon(screen, color, points))
+
+        if text and font:
+            # heuristic centering for 5x7 font (approx)
+            lbl = font.render(str(text), True, text_color)
+            mark(screen.blit(lbl, (sx - lbl.get_width()//2, sy - lbl.get_height()//2)))
+
+    # Striker (Cyan) - ID 2
+    draw_entity(state.striker, CYAN, 12, "circle", "2", BLACK)
+    # Passer (Blue) - ID 1
+    draw_entity(state.passer, BLUE, 12, "circle", "1", WHITE)
+    # Ball (Orange)
+    draw_entity(state.ball, ORANGE, 8, "circle")
+
+    # Opponent User (Red) - ID 1
+    draw_entity(state.opp_user, RED, 14, "circle", "1", WHITE)
+
+    # Extras - Teammates (Blue) from ID 3, Opponents (Red) from ID 2
+    for tm_idx, (tid, tx, ty) in enumerate(state.teammates, start=3):
+        draw_entity(Pose2D(tx, ty), BLUE, 10, "circle", str(tm_idx), WHITE)
+    for opp_idx, (ox, oy) in enumerate(state.opponents, start=2):
+        draw_entity(Pose2D(ox, oy), RED, 10, "circle", str(opp_idx), WHITE)
+
+    if not state.paused and state.best_pos:
+        tx, ty = to_screen(state.best_pos[0], state.best_pos[1])
+        mark(pygame.draw.line(screen, WHITE, (tx-5, ty), (tx+5, ty), 1))
+        mark(pygame.draw.line(screen, WHITE, (tx, ty-5), (tx, ty+5), 1))
+
+    if state.flight_target:
+        # Pass in flight: kick point -> target
+        tx, ty = to_screen(*state.flight_target)
+        mark(pygame.draw.circle(screen, YELLOW, (tx, ty), 5))
+        px, py = to_screen(*state.flight_start)
+        mark(pygame.draw.line(screen, YELLOW, (px, py), (tx, ty), 1))
+
+    # Pause Overlay
+    if state.paused:
+        cx, cy = FIELD_CENTER
+        mark(pygame.draw.rect(screen, WHITE, (cx - 20, cy - 30, 10, 60)))
+        mark(pygame.draw.rect(screen, WHITE, (cx + 10, cy - 30, 10, 60)))
+        mark(pygame.draw.rect(screen, RED, (cx - 300, cy - 200, 600, 400), 5))
+
+    screen.set_clip(None)
+
+    # Text overlay
+    if font:
+        head = f"FPS: {fps:.1f}" if fps is not None else f"T: {state.t:.2f}s"
+        mark(screen.blit(font.render(head, True, WHITE), (10, 10)))
+        mark(screen.blit(font.render(f"OFB Score: {state.ofb_score:.2f}", True, WHITE), (10, 35)))
+        mark(screen.blit(font.render(f"Pass Score: {state.pass_score:.2f}", True, WHITE), (10, 60)))
+
+        mark(screen.blit(font.render(f"Passes OK: {state.goals}  Cut: {state.fails}", True, WHITE), (400, 10)))
+        if status:
+            mark(screen.blit(font.render(status, True, GRAY), (400, 35)))
+
+        if recording:
+            mark(screen.blit(font.render("● RECORDING", True, RED), (10, 85)))
+
+
+class FrameRenderer:
+    """
+    Offscreen full-frame renderer: sim_engine.FrameState + heatmap panels -> Surface.
+    Needs no display (works with the SDL dummy driver).
+    """
+    def __init__(self, font, sliders=()):
+        self.font = font
+        self.sliders = list(sliders)
+        self.static = build_static_layer(font, self.sliders)
+        self.surface = pygame.Surface((WIDTH, HEIGHT))
+
+    def render(self, state, heatmaps=None, status=None):
+        """heatmaps: {"striker" / "pass": (surface, bounds)}. Returns the (reused) frame surface."""
+        surf = self.surface
+        surf.blit(self.static, (0, 0))
+        for s in self.sliders:
+            s.draw(surf, self.font)
+        heatmaps = heatmaps or {}
+        for name, pos, color in (("striker", STRIKER_HM_POS, CYAN), ("pass", PASS_HM_POS, YELLOW)):
+            if name in heatmaps:
+                hm_surf, bounds = heatmaps[name]
+                draw_heatmap_panel(surf, hm_surf, bounds, self.font, pos, color)
+        draw_frame(surf, self.font, state, status=status)
+        return surf
+
+
+# ============================================================
+# Param Sliders
+# ============================================================
+
+class Slider:
+    def __init__(self, x, y, w, h, min_val, max_val, initial_val, label, param_key, dict_ref):
+        self.rect = pygame.Rect(x, y, w, h)
+        self.min_val = min_val
+        self.max_val = max_val
+        self.val = initial_val
+        self.label = label
+        self.param_key = param_key
+        self.dict_ref = dict_ref # Reference to params dict (st_params or pass_params)
+        self.dragging = False
+        
+        # Handle
+        self.handle_width = 10
+        self.update_handle_pos()
+
+        # Cached layer area (label above the bar + handle overhang); redrawn only when dirty
+        self.layer_rect = pygame.Rect(x - self.handle_width, y - 17, w + 2*self.handle_width, h + 23)
+        self.dirty = True
+
+    def update_handle_pos(self):
+        ratio = (self.val - self.min_val) / (self.max_val - self.min_val)
+        handle_x = self.rect.x + ratio * self.rect.width - self.handle_width // 2
+        self.handle_rect = pygame.Rect(handle_x, self.rect.y - 5, self.handle_width, self.rect.height + 10)
+
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if self.handle_rect.collidepoint(event.pos) or self.rect.collidepoint(event.pos):
+                self.dragging = True
+                self.update_val_from_pos(event.pos[0])
+        elif event.type == pygame.MOUSEBUTTONUP:
+            self.dragging = False
+        elif event.type == pygame.MOUSEMOTION:
+            if self.dragging:
+                self.update_val_from_pos(event.pos[0])
+
+    def update_val_from_pos(self, mouse_x):
+        rel_x = mouse_x - self.rect.x
+        rel_x = max(0, min(rel_x, self.rect.width))
+        ratio = rel_x / self.rect.width
+        self.val = self.min_val + ratio * (self.max_val - self.min_val)
+        self.update_handle_pos()
+        self.dirty = True
+        # Update Dictionary in Real-time
+        self.dict_ref[self.param_key] = self.val
+
+    def draw_track(self, screen):
+        # Static part (pre-rendered once into the static layer)
+        pygame.draw.rect(screen, GRAY, self.rect)
+
+    def draw(self, screen, font):
+        # Draw Label & Value
+        if font:
+            label_surf = font.render(f"{self.label}: {self.val:.2f}", True, WHITE)
+            screen.blit(label_surf, (self.rect.x, self.rect.y - 17))
+        
+        # Draw Bar
+        pygame.draw.rect(screen, GRAY, self.rect)
+        # Draw Filled Part
+        filled_w = self.handle_rect.centerx - self.rect.x
+        pygame.draw.rect(screen, CYAN, (self.rect.x, self.rect.y, filled_w, self.rect.height))
+        # Draw Handle
+        pygame.draw.rect(screen, WHITE, self.handle_rect)
+
+def build_sliders(st_params, pass_params):
+    """Slider panel for all tunable params (CFG.PARAM_SLIDERS, edits the param dicts in place)."""
+    sliders = []
+    col_x = {"st": 730, "pass": 1050}
+    sy = 320 # Start below heatmaps
+    sw = 280
+    sh = 10
+    gap = 33 # Adjustment: -5px
+
+    for layer, ref in (("st", st_params), ("pass", pass_params)):
+        for i, (key, label, minv, maxv) in enumerate(CFG.PARAM_SLIDERS[layer]):
+            sliders.append(Slider(col_x[layer], sy + i*gap, sw, sh, minv, maxv, ref[key], label, key, ref))
+    return sliders
@@ -0,0 +1,139 @@
+"""
+Frame Profiler
+
+Named spans timed with perf_counter, kept per frame in a rolling window so we
+can see where frame time goes (events, costmaps, heatmap upload, drawing,
+flip, ...) and report p50 / p95 / max per span.
+
+    prof = FrameProfiler()
+    with prof.span("striker_cmap"):
+        ...
+    prof.add("hm_worker", sec)        # time measured elsewhere (e.g. another thread)
+    prof.end_frame()                  # also records "frame" (time since the last end_frame)
+
+Spans may nest; each span reports its inclusive time. Spans hit several times
+in one frame are summed.
+"""
+
+import csv
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pygame
+
+FRAME = "frame"
+
+WHITE = (255, 255, 255)
+GRAY = (100, 100, 100)
+BAR_P50 = (0, 200, 255)
+BAR_P95 = (0, 90, 130)
+BAR_MAX = (255, 80, 80)
+BUDGET_LINE = (255, 255, 0)
+BG = (20, 20, 20)
+
+
+class FrameProfiler:
+    def __init__(self, window=240, stats_every=15):
+        self.window = window
+        self.stats_every = stats_every  # frames between recomputing the overlay stats
+        self.frames = deque(maxlen=window)  # (frame_index, {span: sec})
+        self.order = []                     # span names in first-seen order
+        self.frame_index = 0
+        self._cur = {}
+        self._last_end = None
+        self._stats = {}
+
+    @contextmanager
+    def span(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def add(self, name, sec):
+        if name not in self._cur and name not in self.order:
+            self.order.append(name)
+        self._cur[name] = self._cur.get(name, 0.0) + sec
+
+    def current(self, name):
+        """Seconds recorded for a span so far in the current frame."""
+        return self._cur.get(name, 0.0)
+
+    def end_frame(self):
+        now = time.perf_counter()
+        if self._last_end is not None:
+            self._cur[FRAME] = now - self._last_end
+        self._last_end = now
+        self.frames.append((self.frame_index, self._cur))
+        self._cur = {}
+        self.frame_index += 1
+        if self.frame_index % self.stats_every == 0:
+            self._stats = self.stats()
+
+    def names(self):
+        return [FRAME] + [n for n in self.order if n != FRAME]
+
+    def stats(self):
+        """{span: (p50, p95, max)} in seconds over the rolling window (frames without the span are skipped)."""
+        out = {}
+        for name in self.names():
+            vals = np.array([f[name] for _, f in self.frames if name in f])
+            if vals.size:
+                p50, p95 = np.percentile(vals, [50, 95])
+                out[name] = (float(p50), float(p95), float(vals.max()))
+        return out
+
+    def dump_csv(self, path):
+        """Writes one row per frame in the window (milliseconds, empty where a span didn't run)."""
+        names = self.names()
+        with open(path, "w", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["frame"] + [f"{n}_ms" for n in names])
+            for idx, spans in self.frames:
+                w.writerow([idx] + [f"{spans[n] * 1000.0:.3f}" if n in spans else "" for n in names])
+        print(f"[Profiler] {len(self.frames)} frames written to {path}")
+        return path
+
+    def draw(self, surf, font, rect, budget_sec):
+        """
+        Bar graph per span: p50 (bright), p95 (dark), max (red tick), scaled so the
+        frame budget (yellow line) sits at half the bar width. Values are p50 p95 max
+        in ms. Returns the drawn rect.
+        """
+        rect = pygame.Rect(rect)
+        pygame.draw.rect(surf, BG, rect)
+        pygame.draw.rect(surf, GRAY, rect, 1)
+        if not font or not self._stats:
+            return rect
+
+        label_w, value_w = 170, 190
+        bar_x = rect.x + label_w
+        bar_w = rect.width - label_w - value_w
+        full_scale = 2.0 * budget_sec
+        row_h = 15
+
+        def px(sec):
+            return int(min(sec / full_scale, 1.0) * bar_w)
+
+        y = rect.y + 4
+        for name in self.names():
+            if y + row_h > rect.bottom:
+                break
+            if name not in self._stats:
+                continue
+            p50, p95, mx = self._stats[name]
+            surf.blit(font.render(name[:13], True, WHITE), (rect.x + 4, y))
+            pygame.draw.rect(surf, BAR_P95, (bar_x, y + 2, max(px(p95), 1), row_h - 5))
+            pygame.draw.rect(surf, BAR_P50, (bar_x, y + 2, max(px(p50), 1), row_h - 5))
+            mx_x = bar_x + px(mx)
+            pygame.draw.line(surf, BAR_MAX, (mx_x, y), (mx_x, y + row_h - 3), 2)
+            txt = f"{p50*1000:.1f} {p95*1000:.1f} {mx*1000:.1f}"
+            surf.blit(font.render(txt, True, WHITE), (bar_x + bar_w + 8, y))
+            y += row_h
+
+        budget_x = bar_x + px(budget_sec)
+        pygame.draw.line(surf, BUDGET_LINE, (budget_x, rect.y + 2), (budget_x, y), 1)
+        return rect
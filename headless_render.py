@@ -0,0 +1,179 @@
+"""
+Headless Rendering (PNG sequences / video)
+
+Runs a scenario through the SimEngine without a window (SDL dummy driver) as
+fast as it can compute, renders every frame with the same field / heatmap
+drawing as game_main, and hands the pixels to FrameWriter threads that encode
+PNGs (png_codec, zlib releases the GIL) or stream raw RGB into an encoder
+subprocess (ffmpeg). Rendering only waits on the writer when its queue is full.
+
+    python headless_render.py --scenario scenarios/defender.toml --frames 600 --png out/frames
+    python headless_render.py --frames 600 --video out/run.mp4
+"""
+
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+# No window: must be set before pygame initializes the display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import scenario as Scenario
+import heatmap as Heatmap
+from png_codec import encode_png_rgb_bytes
+from sim_engine import SimEngine
+from field_render import WIDTH, HEIGHT, HEATMAP_W, HEATMAP_H, FrameRenderer, build_sliders
+from vector_font import VectorFont
+
+
+def ffmpeg_command(path, fps, size=(WIDTH, HEIGHT)):
+    """Encoder reading raw RGB frames from stdin."""
+    exe = shutil.which("ffmpeg")
+    if exe is None:
+        raise RuntimeError("ffmpeg not found on PATH (use --png for image sequences)")
+    w, h = size
+    return [exe, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{w}x{h}", "-r", str(fps), "-i", "-",
+            "-c:v", "libx264", "-pix_fmt", "yuv420p", path]
+
+
+class FrameWriter:
+    """
+    Writes frames on background threads. write() copies the surface pixels and
+    returns immediately unless `depth` frames are already waiting.
+    Exactly one of png_dir / encoder_cmd must be given. PNGs are encoded by
+    `threads` workers in parallel; the encoder pipe gets one writer (frame order).
+    """
+    def __init__(self, png_dir=None, encoder_cmd=None, size=(WIDTH, HEIGHT), depth=32, threads=3):
+        if (png_dir is None) == (encoder_cmd is None):
+            raise ValueError("FrameWriter needs either png_dir or encoder_cmd")
+        self.size = size
+        self.png_dir = png_dir
+        self.proc = None
+        if png_dir:
+            os.makedirs(png_dir, exist_ok=True)
+        else:
+            self.proc = subprocess.Popen(encoder_cmd, stdin=subprocess.PIPE)
+
+        self.count = 0
+        self.error = None
+        self._queue = queue.Queue(maxsize=depth)
+        n = 1 if self.proc else max(1, threads)
+        self._threads = [threading.Thread(target=self._run, name=f"frame-writer-{i}", daemon=True)
+                         for i in range(n)]
+        for t in self._threads:
+            t.start()
+
+    def write(self, surf):
+        if self.error:
+            raise self.error
+        self._queue.put((self.count, pygame.image.tobytes(surf, "RGB")))
+        self.count += 1
+
+    def close(self):
+        """Flushes queued frames, finishes the encoder. Re-raises a writer failure."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        if self.proc:
+            self.proc.stdin.close()
+            if self.proc.wait() != 0 and self.error is None:
+                self.error = RuntimeError(f"encoder exited with {self.proc.returncode}")
+        if self.error:
+            raise self.error
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self.error:
+                continue # keep draining so write() never blocks forever
+            idx, data = item
+            try:
+                if self.proc:
+                    self.proc.stdin.write(data)
+                else:
+                    with open(os.path.join(self.png_dir, f"frame_{idx:06d}.png"), "wb") as f:
+                        f.write(encode_png_rgb_bytes(data, self.size))
+            except Exception as e:
+                self.error = e
+
+
+def heatmap_panels(engine, state):
+    """Heatmap surfaces from the engine's decision costmaps (same as the window, full size)."""
+    panels = {}
+    for name, grid, bounds in (("striker", engine.st_grid, state.striker_bounds),
+                               ("pass", engine.pass_grid, state.pass_bounds)):
+        rgb, max_pos = Heatmap.compute_heatmap_array(
+            HEATMAP_W, HEATMAP_H, Heatmap.costmap_grid_func, bounds, (grid,), grid.best)
+        panels[name] = (Heatmap.rgb_to_surface(rgb, max_pos), bounds)
+    return panels
+
+
+def render_run(world, frames, writer, fps=60, every=1, sliders=True):
+    """
+    Steps the simulation `frames` ticks at 1/fps and writes every `every`-th frame.
+    Returns the engine (for goals / fails etc.).
+    """
+    pygame.init()
+    pygame.display.set_mode((1, 1)) # dummy display, some surface ops want one
+    font = VectorFont()
+
+    engine = SimEngine(world)
+    panel = []
+    if sliders:
+        panel = build_sliders(engine.st_params, engine.pass_params)
+    renderer = FrameRenderer(font, panel)
+
+    for i in range(frames):
+        engine.step(1.0 / fps)
+        if i % every:
+            continue
+        state = engine.frame_state()
+        surf = renderer.render(state, heatmap_panels(engine, state), status=f"Frame {i}")
+        writer.write(surf)
+    return engine
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Render a scenario offscreen to PNGs or video")
+    parser.add_argument("--scenario", help="Scenario file (.json / .toml), default: config positions")
+    parser.add_argument("--frames", type=int, default=600, help="Simulation ticks to run")
+    parser.add_argument("--fps", type=int, default=60, help="Simulation ticks per second (and video rate)")
+    parser.add_argument("--every", type=int, default=1, help="Write every N-th tick")
+    out = parser.add_mutually_exclusive_group(required=True)
+    out.add_argument("--png", metavar="DIR", help="Write frame_000000.png ... into DIR")
+    out.add_argument("--video", metavar="FILE", help="Encode with ffmpeg into FILE (e.g. run.mp4)")
+    parser.add_argument("--no-sliders", action="store_true", help="Leave the param panel empty")
+    args = parser.parse_args()
+
+    world = Scenario.load_scenario(args.scenario) if args.scenario else Scenario.default_world()
+    if args.png:
+        writer = FrameWriter(png_dir=args.png)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(args.video)), exist_ok=True)
+        writer = FrameWriter(encoder_cmd=ffmpeg_command(args.video, args.fps / args.every))
+
+    t0 = time.perf_counter()
+    try:
+        engine = render_run(world, args.frames, writer, args.fps, args.every, not args.no_sliders)
+    finally:
+        writer.close()
+        pygame.quit()
+    secs = time.perf_counter() - t0
+    sim_secs = args.frames / args.fps
+    print(f"[Headless] {writer.count} frames in {secs:.1f}s ({sim_secs / secs:.1f}x real time), "
+          f"passes ok {engine.goals} / cut {engine.fails}")
+
+
+if __name__ == "__main__":
+    main()
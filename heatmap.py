@@ -0,0 +1,164 @@
+"""
+Heatmap Rendering (NumPy + pygame.surfarray)
+
+Score grids are evaluated as whole arrays, mapped through a precomputed RGB
+lookup table of the heatmap gradient and blitted with pygame.surfarray
+(or encoded as PNG for front ends without pygame, e.g. the web dashboard).
+"""
+
+import numpy as np
+
+try:
+    import pygame
+except ImportError:
+    pygame = None # arrays / PNGs only (web dashboard)
+
+import sim_logic as Logic
+from png_codec import encode_png
+
+# Gradient Stops: (Score, Color)
+# -15 (Black) -> -3 (Purple) -> 8 (Pastel Orange) -> 15 (Bright Yellow)
+C_HIGH = (240, 229, 115)
+C_MID_HIGH = (216, 105, 69)
+C_MID_LOW = (62, 15, 101)
+C_LOW = (0, 0, 0)
+GRADIENT_STOPS = [(-15.0, C_LOW), (-3.0, C_MID_LOW), (8.0, C_MID_HIGH), (15.0, C_HIGH)]
+
+LUT_MIN, LUT_MAX = -15.0, 15.0
+LUT_SIZE = 1024
+
+# Score used for pass targets outside the allowed pass distance
+PASS_OUT_OF_RANGE_SCORE = -20.0
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+
+
+def build_color_lut(size=LUT_SIZE):
+    """(size, 3) uint8 table sampling the gradient between LUT_MIN and LUT_MAX."""
+    vals = np.linspace(LUT_MIN, LUT_MAX, size)
+    xs = [v for v, _ in GRADIENT_STOPS]
+    lut = np.empty((size, 3), dtype=np.uint8)
+    for ch in range(3):
+        # Truncate like the original int(...) per-pixel conversion
+        lut[:, ch] = np.floor(np.interp(vals, xs, [c[ch] for _, c in GRADIENT_STOPS]))
+    return lut
+
+
+COLOR_LUT = build_color_lut()
+
+
+def scores_to_rgb(scores, lut=COLOR_LUT):
+    """(h, w) scores -> (h, w, 3) uint8 colors. NaN maps to the lowest color."""
+    scale = (len(lut) - 1) / (LUT_MAX - LUT_MIN)
+    idx = np.nan_to_num((scores - LUT_MIN) * scale, nan=0.0)
+    idx = np.clip(idx, 0, len(lut) - 1).astype(np.intp)
+    return lut[idx]
+
+
+def pixel_grid(bounds, width, height):
+    """World coordinates (X, Y) of each heatmap pixel, shape (height, width). Row 0 is max_y."""
+    min_x, max_x, min_y, max_y = bounds
+    xs = min_x + np.arange(width) * ((max_x - min_x) / width)
+    ys = max_y - np.arange(height) * ((max_y - min_y) / height)
+    return np.meshgrid(xs, ys)
+
+
+def striker_grid_func(X, Y, robot, ball, opponents, params, confidences=None):
+    return Logic.compute_striker_score_grid(X, Y, robot, ball, opponents, params, confidences)
+
+
+def pass_grid_func(X, Y, ball, opponents, params, reference_tm, confidences=None):
+    # Enforce Pass Distance Constraints
+    scores = Logic.compute_pass_score_grid(X, Y, ball, reference_tm, opponents, params, confidences)
+    return np.where(Logic.pass_distance_mask(X, Y, ball, params), scores, PASS_OUT_OF_RANGE_SCORE)
+
+
+def sample_costmap(X, Y, grid, fill=PASS_OUT_OF_RANGE_SCORE):
+    """
+    Bilinearly resamples a Logic.CostmapGrid at world coordinates X, Y.
+    Cells outside grid.valid (nearest cell) and points outside the grid get fill.
+    """
+    xs, ys = grid.xs, grid.ys
+    S = np.where(grid.valid, grid.scores, fill)
+    fx = np.interp(X, xs, np.arange(len(xs), dtype=float))
+    fy = np.interp(Y, ys, np.arange(len(ys), dtype=float))
+    x0 = np.floor(fx).astype(np.intp); y0 = np.floor(fy).astype(np.intp)
+    x1 = np.minimum(x0 + 1, len(xs) - 1); y1 = np.minimum(y0 + 1, len(ys) - 1)
+    wx = fx - x0; wy = fy - y0
+    scores = ((S[y0, x0] * (1 - wx) + S[y0, x1] * wx) * (1 - wy)
+              + (S[y1, x0] * (1 - wx) + S[y1, x1] * wx) * wy)
+
+    valid = grid.valid[np.rint(fy).astype(np.intp), np.rint(fx).astype(np.intp)]
+    inside = (X >= xs[0]) & (X <= xs[-1]) & (Y >= ys[0]) & (Y <= ys[-1])
+    return np.where(valid & inside, scores, fill)
+
+
+def costmap_grid_func(X, Y, grid, fill=PASS_OUT_OF_RANGE_SCORE):
+    # Display the decision costmap instead of re-scoring every pixel
+    return sample_costmap(X, Y, grid, fill)
+
+
+def world_to_pixel(pos, bounds, width, height):
+    """Inverse of pixel_grid for one world point -> (px, py) clamped into the map."""
+    min_x, max_x, min_y, max_y = bounds
+    px = int((pos[0] - min_x) / (max_x - min_x) * width) if max_x > min_x else 0
+    py = int((max_y - pos[1]) / (max_y - min_y) * height) if max_y > min_y else 0
+    return (min(max(px, 0), width - 1), min(max(py, 0), height - 1))
+
+
+def compute_heatmap_array(width, height, grid_func, bounds, args, peak=None):
+    """
+    Evaluates grid_func(X, Y, *args) over the bounds.
+    peak: world (x, y) to mark instead of the brightest pixel (e.g. the costmap decision).
+    Returns (rgb (h, w, 3) uint8, max_pixel (px, py) or None).
+    """
+    X, Y = pixel_grid(bounds, width, height)
+    scores = grid_func(X, Y, *args)
+    rgb = scores_to_rgb(scores)
+    max_pos = None
+    if peak is not None:
+        max_pos = world_to_pixel(peak, bounds, width, height)
+    elif scores.size and np.isfinite(scores).any():
+        py, px = np.unravel_index(np.nanargmax(scores), scores.shape)
+        max_pos = (int(px), int(py))
+    return rgb, max_pos
+
+
+def rgb_to_surface(rgb, max_pos=None):
+    """Blits an (h, w, 3) array into a new surface and draws the max peak marker."""
+    surf = pygame.surfarray.make_surface(rgb.swapaxes(0, 1))
+    if max_pos:
+        mx, my = max_pos
+        pygame.draw.circle(surf, WHITE, (mx, my), 2)
+        pygame.draw.line(surf, BLACK, (mx-3, my), (mx+3, my), 1)
+        pygame.draw.line(surf, BLACK, (mx, my-3), (mx, my+3), 1)
+    return surf
+
+
+def mark_peak(rgb, max_pos):
+    """Draws the rgb_to_surface peak marker (white dot, black cross) into a copy of rgb."""
+    rgb = rgb.copy()
+    if max_pos:
+        mx, my = max_pos
+        h, w = rgb.shape[:2]
+        yy, xx = np.ogrid[:h, :w]
+        rgb[(xx - mx) ** 2 + (yy - my) ** 2 <= 4] = WHITE
+        rgb[my, max(mx - 3, 0):mx + 4] = BLACK
+        rgb[max(my - 3, 0):my + 4, mx] = BLACK
+    return rgb
+
+
+def costmap_png(grid, bounds, width, height):
+    """PNG bytes of a Logic.CostmapGrid resampled to width x height over bounds, decision marked."""
+    rgb, max_pos = compute_heatmap_array(width, height, costmap_grid_func, bounds, (grid,), grid.best)
+    return encode_png(mark_peak(rgb, max_pos))
+
+
+def compute_heatmap_surface(width, height, grid_func, bounds, args):
+    """
+    Generates a heatmap surface with gradient colors and max peak marker.
+    bounds: (min_x, max_x, min_y, max_y)
+    """
+    rgb, max_pos = compute_heatmap_array(width, height, grid_func, bounds, args)
+    return rgb_to_surface(rgb, max_pos)
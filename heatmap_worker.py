@@ -0,0 +1,112 @@
+"""
+Background Heatmap Worker
+
+The render loop submits world-state snapshots; a worker thread turns them into
+heatmap color arrays and publishes them into a double buffer. Only the newest
+snapshot is kept: submitting while the worker is busy replaces (drops) the
+older pending one instead of queueing it. The render loop always reads the
+latest completed maps.
+"""
+
+import threading
+import time
+
+import heatmap as Heatmap
+
+
+class HeatmapJob:
+    """One map to compute: grid_func(X, Y, *args) over bounds at width x height."""
+    def __init__(self, grid_func, bounds, args, width, height, peak=None):
+        self.grid_func = grid_func
+        self.bounds = tuple(bounds)
+        self.args = args
+        self.width = width
+        self.height = height
+        self.peak = peak # world (x, y) to mark, default is the brightest pixel
+
+
+class HeatmapResult:
+    def __init__(self, rgb, max_pos, bounds, seq):
+        self.rgb = rgb           # (h, w, 3) uint8
+        self.max_pos = max_pos   # (px, py) or None
+        self.bounds = bounds     # bounds the map was computed for
+        self.seq = seq           # snapshot sequence number
+
+
+class HeatmapWorker:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending = None # (seq, {name: HeatmapJob}), newest only
+        self._seq = 0
+        self._dropped = 0
+
+        # Double buffer: worker fills the back slot, then flips under the lock
+        self._buffers = [{}, {}]
+        self._front = 0
+
+        self.last_compute_sec = 0.0
+        self.last_compute_pixels = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="heatmap-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, jobs):
+        """Hands a snapshot {name: HeatmapJob} to the worker (replacing any stale one)."""
+        with self._cond:
+            self._seq += 1
+            if self._pending is not None:
+                self._dropped += 1
+            self._pending = (self._seq, jobs)
+            self._cond.notify()
+        return self._seq
+
+    @property
+    def busy(self):
+        with self._cond:
+            return self._pending is not None
+
+    @property
+    def dropped(self):
+        return self._dropped
+
+    def latest(self):
+        """{name: HeatmapResult} of the most recently completed snapshot."""
+        with self._cond:
+            return self._buffers[self._front]
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._thread.join(timeout=1.0)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and self._running:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                seq, jobs = self._pending
+                self._pending = None
+
+            t0 = time.perf_counter()
+            back = {}
+            for name, job in jobs.items():
+                try:
+                    rgb, max_pos = Heatmap.compute_heatmap_array(
+                        job.width, job.height, job.grid_func, job.bounds, job.args, job.peak)
+                except Exception as e:
+                    print(f"[Heatmap] {name} failed: {e}")
+                    continue
+                back[name] = HeatmapResult(rgb, max_pos, job.bounds, seq)
+            self.last_compute_sec = time.perf_counter() - t0
+            self.last_compute_pixels = sum(job.width * job.height for job in jobs.values())
+
+            with self._cond:
+                # Keep maps that failed this round from the previous front buffer
+                merged = dict(self._buffers[self._front])
+                merged.update(back)
+                back_idx = 1 - self._front
+                self._buffers[back_idx] = merged
+                self._front = back_idx
@@ -0,0 +1,31 @@
+"""
+Dashboard Input Pad (Streamlit custom component)
+
+Keyboard + drag-pad control for the user defender. Movement is buffered in
+the browser (components/input_pad/index.html) and sent at most every
+`send_every_ms` as one summed delta, so fast input costs one small rerun per
+interval instead of one full rerun per key event / joystick move.
+"""
+
+import os
+
+import streamlit.components.v1 as components
+
+_component = components.declare_component(
+    "input_pad", path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "input_pad"))
+
+
+def input_pad(key, speed=0.5, tap_step=0.1, send_every_ms=150):
+    """
+    Returns the newest buffered move {"seq", "dx", "dy"} (meters) or None.
+    The value sticks across reruns: apply a seq only once (see new_move).
+    """
+    return _component(key=key, speed=speed, tap_step=tap_step, send_every_ms=send_every_ms, default=None)
+
+
+def new_move(value, state, seq_key):
+    """(dx, dy) of a move not applied yet, else None. state is st.session_state."""
+    if not value or value.get("seq") == state.get(seq_key):
+        return None
+    state[seq_key] = value["seq"]
+    return float(value["dx"]), float(value["dy"])
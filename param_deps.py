@@ -0,0 +1,189 @@
+"""
+Param Dependency Graph + Costmap Cache
+
+Every costmap is built from a few intermediate nodes, and every param only
+feeds some of them:
+
+    axes   -> sample coordinates (grid_step, costmap_step, reach, ...)
+    terms  -> unweighted term grids (state + geometry: margins, goal, caps)
+    scores -> weighted sum of the terms (the *_weight / w_* params)
+    mask   -> eligible cells (pass field / distance limits)
+    best   -> the decision (scores + mask)
+    tiles  -> full-field tiles (re-score everywhere, so no axes)
+
+PARAM_GRAPH maps each param key to the (layer, node) pairs it invalidates.
+CostmapCache keeps the nodes of one layer and rebuilds only the ones whose
+params (or the world state feeding them) changed, so dragging a weight slider
+just re-sums the cached term grids, and an unused key (penalty_weight)
+rebuilds nothing.
+"""
+
+import hashlib
+import pickle
+
+import numpy as np
+
+import sim_logic as Logic
+
+STRIKER_WEIGHTS = ("base_x_weight", "center_y_weight", "hysteresis_x_weight", "hysteresis_y_weight",
+                   "defender_dist_weight", "symmetry_weight", "ball_dist_weight", "forward_weight",
+                   "pass_penalty_weight", "shot_penalty_weight", "movement_penalty_weight",
+                   "post_avoid_weight")
+PASS_WEIGHTS = ("base_score", "w_abs_dx", "w_abs_dy", "w_x", "w_y", "opp_penalty")
+
+# Params read by each node itself (upstream nodes are added by node_params)
+NODE_KEYS = {
+    "striker": {
+        "axes": ("field_length", "dist_from_goal", "search_x_margin", "grid_step", "field_width"),
+        "terms": ("field_length", "dist_from_goal", "defender_dist_cap", "path_margin",
+                  "goal_width", "post_avoid_dist", "opp_memory_sec"),
+        "scores": STRIKER_WEIGHTS,
+        "mask": (),
+        "best": ("field_length", "dist_from_goal"),
+        "tiles": (),
+    },
+    "pass": {
+        "axes": ("costmap_step", "max_pass_reach_x", "max_pass_reach_y"),
+        "terms": ("receive_pass_margin", "opp_memory_sec"),
+        "scores": PASS_WEIGHTS,
+        "mask": ("field_half_length", "field_half_width", "min_pass_threshold", "max_pass_threshold"),
+        "best": (),
+        "tiles": ("min_pass_threshold", "max_pass_threshold"), # tiles only apply the distance mask
+        # Not cached, listed so the graph knows about them:
+        "select": ("tm_select_w_dist", "tm_select_w_x", "min_pass_threshold", "max_pass_threshold"),
+        "decision": ("score_threshold",),
+    },
+}
+
+NODE_INPUTS = {
+    "axes": (),
+    "terms": ("axes",),
+    "scores": ("terms",),
+    "mask": ("axes",),
+    "best": ("scores", "mask"),
+    "tiles": ("scores",),
+    "select": (),
+    "decision": ("best",),
+}
+
+def _upstream(node):
+    nodes = {node}
+    for up in NODE_INPUTS[node]:
+        nodes |= _upstream(up)
+    return nodes
+
+def node_params(layer, node):
+    """All param keys a node depends on, including its upstream nodes."""
+    keys = set()
+    for n in _upstream(node):
+        if n == "axes" and node == "tiles":
+            continue # tiles pick their own pixel coordinates
+        keys.update(NODE_KEYS[layer].get(n, ()))
+    return tuple(sorted(keys))
+
+def _build_graph():
+    graph = {}
+    for layer, nodes in NODE_KEYS.items():
+        for node in nodes:
+            for key in node_params(layer, node):
+                graph.setdefault(key, set()).add((layer, node))
+    return graph
+
+PARAM_GRAPH = _build_graph() # param key -> {(layer, node)}
+
+def affected(key):
+    """(layer, node) pairs an edit of `key` invalidates (empty for keys nothing reads)."""
+    return PARAM_GRAPH.get(key, set())
+
+def params_key(params, keys):
+    """Hashable snapshot of the given params (missing keys are None)."""
+    return tuple(params.get(k) for k in keys)
+
+def args_hash(*objs):
+    """Stable digest of plain data (poses, params dicts, numpy arrays) for cache keys."""
+    return hashlib.blake2b(pickle.dumps(objs, protocol=4), digest_size=16).hexdigest()
+
+
+# ============================================================
+# Costmap Cache
+# ============================================================
+
+class CostmapCache:
+    """
+    Incremental CostmapGrid for one layer ("striker" or "pass"). get() returns
+    the previous grid object when nothing it depends on changed, otherwise a
+    new grid with only the invalidated nodes rebuilt. Grids are never mutated.
+    """
+    def __init__(self, layer):
+        self.layer = layer
+        self._keys = {n: node_params(layer, n) for n in ("axes", "terms", "scores", "mask", "best")}
+        self.params = None # params of the current get()
+        self._stamp = {}   # node -> key it was built for
+        self._axes = None  # (xs, ys, X, Y)
+        self._terms = None
+        self._scores = None
+        self._valid = None
+        self.grid = None
+        self.rebuilt = {n: 0 for n in self._keys} # rebuild counts per node
+
+    def _stale(self, node, extra=()):
+        """Key the node has to be built for, None if it is up to date (stamp it with _built after the build)."""
+        stamp = (params_key(self.params, self._keys[node]),) + tuple(extra)
+        return None if self._stamp.get(node) == stamp else stamp
+
+    def _built(self, node, stamp):
+        # Only after a successful build: a failed one is retried on the next get()
+        self._stamp[node] = stamp
+        self.rebuilt[node] += 1
+
+    def get(self, params, ball, opponents, confidences, robot=None, tm=None):
+        """Striker layer: robot is the striker pose. Pass layer: tm is the target teammate."""
+        self.params = params
+        striker = self.layer == "striker"
+
+        # Axes (the pass grid follows its teammate)
+        stamp = self._stale("axes", () if striker else (tm.pos.x, tm.pos.y))
+        if stamp is not None:
+            xs, ys = Logic.striker_costmap_axes(params) if striker else Logic.pass_costmap_axes(tm, params)
+            X, Y = np.meshgrid(xs, ys)
+            self._axes = (xs, ys, X, Y)
+            self._stamp.pop("terms", None)
+            self._stamp.pop("mask", None)
+            self.grid = None
+            self._built("axes", stamp)
+        xs, ys, X, Y = self._axes
+
+        # Terms (everything that depends on the world state)
+        state = args_hash(robot if striker else tm, ball, opponents, np.asarray(confidences))
+        stamp = self._stale("terms", (state,))
+        if stamp is not None:
+            if striker:
+                self._terms = Logic.striker_term_grids(X, Y, robot, ball, opponents, params, confidences)
+            else:
+                self._terms = Logic.pass_term_grids(X, Y, ball, tm, opponents, params, confidences)
+            self._stamp.pop("scores", None)
+            self._built("terms", stamp)
+
+        stamp = self._stale("scores")
+        if stamp is not None:
+            self._scores = Logic.combine_term_grids(self._terms, params, X.shape)
+            self.grid = None
+            self._built("scores", stamp)
+
+        stamp = self._stale("mask", () if striker else (ball.x, ball.y))
+        if stamp is not None:
+            if striker:
+                self._valid = np.ones(X.shape, dtype=bool)
+            else:
+                self._valid = Logic.pass_costmap_mask(X, Y, ball, params)
+            self.grid = None
+            self._built("mask", stamp)
+
+        if self.grid is None:
+            if striker:
+                best, best_score = Logic.pick_striker_best(xs, ys, self._scores, params)
+            else:
+                best, best_score = Logic.pick_pass_best(xs, ys, self._scores, self._valid)
+            self.grid = Logic.CostmapGrid(xs, ys, self._scores, self._valid, best, best_score)
+            self.rebuilt["best"] += 1
+        return self.grid
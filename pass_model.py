@@ -0,0 +1,174 @@
+"""
+Ball Flight & Pass Outcome Model
+
+The ball rolls along the pass with constant deceleration (rolling friction):
+    v(t) = v0 - a*t,  s(t) = v0*t - a*t^2/2,  range = v0^2 / (2a)
+so the time for the ball to reach distance s has the closed form
+    t_ball(s) = (v0 - sqrt(v0^2 - 2*a*s)) / a.
+
+An opponent at O running at SIM["player_speed"] reaches a point P after
+    t_opp(P) = reaction_time + max(0, |P - O| - capture_radius) / player_speed.
+A pass is intercepted if any opponent reaches any checked point on the path
+no later than the ball. Checks are vectorized over (targets, opponents, points).
+At kick-off the engine passes to the best costmap cell this check predicts to
+be safe (choose_pass_target); the flight itself then plays out against the
+live opponent poses (BallFlight).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+import config as CFG
+import sim_logic as Logic
+
+PASS_CANDIDATES = 16 # best-scoring pass cells checked for interception at kick-off
+
+
+def ball_params(**overrides):
+    params = dict(CFG.BALL_PARAMS)
+    params["player_speed"] = CFG.SIM["player_speed"]
+    params.update(overrides)
+    return params
+
+
+def ball_distance(t, v0, decel):
+    """Distance travelled after t seconds (ball stops at t = v0 / decel)."""
+    t = np.asarray(t, dtype=float)
+    if decel <= 0.0:
+        return v0 * t
+    t = np.minimum(t, v0 / decel)
+    return v0 * t - 0.5 * decel * t * t
+
+
+def ball_time_to_reach(s, v0, decel):
+    """Closed-form time for the ball to cover distance s (inf if it stops short)."""
+    s = np.asarray(s, dtype=float)
+    if decel <= 0.0:
+        return s / v0 if v0 > 0.0 else np.full_like(s, np.inf)
+    disc = v0 * v0 - 2.0 * decel * s
+    with np.errstate(invalid="ignore"):
+        t = (v0 - np.sqrt(np.maximum(disc, 0.0))) / decel
+    return np.where(disc >= 0.0, t, np.inf)
+
+
+def opponent_time_to_reach(points, opponents, params):
+    """
+    points: (..., 2), opponents: (M, 2) -> (..., M) closed-form arrival times.
+    """
+    d = np.linalg.norm(points[..., None, :] - opponents, axis=-1)
+    d = np.maximum(d - params["capture_radius"], 0.0)
+    return params["reaction_time"] + d / params["player_speed"]
+
+
+def evaluate_passes(ball, targets, opponents, params=None):
+    """
+    Vectorized pass outcome for K candidate targets against M opponents.
+
+    ball: (2,), targets: (K, 2), opponents: (M, 2)
+    Returns a dict of (K,) arrays:
+        success   - ball reaches the target and no opponent gets there first
+        margin    - min over opponents / points of (t_opp - t_ball); +inf without opponents
+        t_arrive  - ball time to the target (inf if it stops short)
+    """
+    params = params or ball_params()
+    ball = np.asarray(ball, dtype=float).reshape(2)
+    targets = np.asarray(targets, dtype=float).reshape(-1, 2)
+    opponents = np.asarray(opponents, dtype=float).reshape(-1, 2)
+    v0, decel = params["pass_speed"], params["decel"]
+
+    vec = targets - ball                                  # (K, 2)
+    length = np.linalg.norm(vec, axis=1)                  # (K,)
+    t_arrive = ball_time_to_reach(length, v0, decel)
+    reachable = np.isfinite(t_arrive)
+
+    if len(opponents) == 0:
+        margin = np.full(len(targets), np.inf)
+        return {"success": reachable, "margin": margin, "t_arrive": t_arrive}
+
+    n = int(params["path_samples"])
+    frac = np.arange(1, n + 1) / n                        # (J,) skip the kick point itself
+    points = ball + frac[None, :, None] * vec[:, None, :] # (K, J, 2)
+    t_ball = ball_time_to_reach(frac[None, :] * length[:, None], v0, decel)  # (K, J)
+    t_opp = opponent_time_to_reach(points, opponents, params)                # (K, J, M)
+
+    slack = t_opp - t_ball[..., None]
+    # Points the ball never reaches cannot be intercepted (they already failed via reachable)
+    slack = np.where(np.isfinite(t_ball)[..., None], slack, np.inf)
+    margin = slack.min(axis=(1, 2))
+    return {"success": reachable & (margin > 0.0), "margin": margin, "t_arrive": t_arrive}
+
+
+def choose_pass_target(ball, grid, opponents, threshold, params=None, k=PASS_CANDIDATES):
+    """
+    Best cell of a pass CostmapGrid (valid, score >= threshold) that
+    evaluate_passes predicts to beat every opponent, checking the top k in
+    score order (ties as grid.best: row-major). opponents: Opponent list.
+    Returns ((x, y), margin), or None if all of them would be intercepted.
+    """
+    scores = np.where(grid.valid, grid.scores, -np.inf).ravel()
+    order = np.argsort(-scores, kind="stable")[:k]
+    order = order[scores[order] >= threshold]
+    if len(order) == 0:
+        return None
+    iy, ix = np.unravel_index(order, grid.scores.shape)
+    targets = np.stack([grid.xs[ix], grid.ys[iy]], axis=1)
+    opps = [(o.pos.x, o.pos.y) for o in opponents]
+    res = evaluate_passes((ball.x, ball.y), targets, opps, params)
+    ok = np.flatnonzero(res["success"])
+    if len(ok) == 0:
+        return None
+    i = ok[0]
+    return (float(targets[i, 0]), float(targets[i, 1])), float(res["margin"][i])
+
+
+# ============================================================
+# Live Pass Execution (one ball in flight)
+# ============================================================
+
+@dataclass
+class BallFlight:
+    start: Logic.Pose2D
+    target: Logic.Pose2D
+    v0: float
+    decel: float
+    capture_radius: float
+    t: float = 0.0
+    status: str = "flying"  # flying | received | intercepted | stopped
+
+    @classmethod
+    def launch(cls, ball, target, params=None):
+        params = params or ball_params()
+        return cls(Logic.Pose2D(ball.x, ball.y), Logic.Pose2D(target.x, target.y),
+                   params["pass_speed"], params["decel"], params["capture_radius"])
+
+    @property
+    def length(self):
+        return float(np.hypot(self.target.x - self.start.x, self.target.y - self.start.y))
+
+    @property
+    def pos(self):
+        L = self.length
+        if L < 1e-9:
+            return Logic.Pose2D(self.target.x, self.target.y)
+        s = min(float(ball_distance(self.t, self.v0, self.decel)), L)
+        r = s / L
+        return Logic.Pose2D(self.start.x + r * (self.target.x - self.start.x),
+                            self.start.y + r * (self.target.y - self.start.y))
+
+    def step(self, dt, opponents):
+        """Advances the ball by dt against live opponent poses. Returns the status."""
+        if self.status != "flying":
+            return self.status
+        self.t += dt
+        b = self.pos
+        for opp in opponents:
+            if np.hypot(opp.pos.x - b.x, opp.pos.y - b.y) <= self.capture_radius:
+                self.status = "intercepted"
+                return self.status
+        s = float(ball_distance(self.t, self.v0, self.decel))
+        if s >= self.length - 1e-9:
+            self.status = "received"
+        elif self.decel > 0.0 and self.t >= self.v0 / self.decel:
+            self.status = "stopped"
+        return self.status
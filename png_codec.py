@@ -0,0 +1,50 @@
+"""
+Minimal PNG Encoder (zlib + struct, no extra dependency)
+
+Encodes 8-bit RGB / grayscale images. Compression runs in zlib, which releases
+the GIL, so encoding on worker threads does not stall the main loop the way
+pygame.image.save does.
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+COLOR_TYPES = {1: 0, 3: 2} # channels -> PNG color type (gray, RGB)
+
+
+def _chunk(tag, data):
+    return (struct.pack(">I", len(data)) + tag + data
+            + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+
+def encode_png(pixels, level=1):
+    """
+    pixels: (h, w, 3) or (h, w) uint8 array, row 0 on top. Returns PNG bytes.
+    level: zlib level (1 = fast, 9 = small).
+    """
+    pixels = np.asarray(pixels, dtype=np.uint8)
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, None]
+    h, w, ch = pixels.shape
+    if ch not in COLOR_TYPES:
+        raise ValueError(f"encode_png expects 1 or 3 channels, got {ch}")
+
+    # Filter type 0 (None) byte in front of every scanline
+    raw = np.empty((h, w * ch + 1), dtype=np.uint8)
+    raw[:, 0] = 0
+    raw[:, 1:] = pixels.reshape(h, w * ch)
+
+    header = struct.pack(">IIBBBBB", w, h, 8, COLOR_TYPES[ch], 0, 0, 0)
+    return (PNG_SIGNATURE
+            + _chunk(b"IHDR", header)
+            + _chunk(b"IDAT", zlib.compress(raw.tobytes(), level))
+            + _chunk(b"IEND", b""))
+
+
+def encode_png_rgb_bytes(data, size, level=1):
+    """PNG from packed RGB rows (e.g. pygame.image.tobytes(surf, "RGB")), size = (w, h)."""
+    w, h = size
+    return encode_png(np.frombuffer(data, dtype=np.uint8).reshape(h, w, 3), level)
@@ -0,0 +1,306 @@
+"""
+Scenario Files -> Compiled World States
+
+A scenario describes an initial setup (ball, passer, striker, user opponent,
+extra teammates / opponents and optional param overrides) as JSON or TOML:
+
+    {
+        "name": "defender",
+        "ball": [-3.0, 2.5],
+        "passer": [-3.0, 2.6],
+        "striker": [0.0, 0.0],
+        "opp_user": [-1.8, 0.5],
+        "teammates": [[1, -3.5, 0.0]],          # (id, x, y) or {"id", "pos"}
+        "opponents": [[3.5, 0.0], [0.0, 1.0, 2.0]],  # (x, y[, last_seen_sec_ago])
+        "st_params": {"forward_weight": 0.5},
+        "pass_params": {}
+    }
+
+Scenarios are validated and compiled into an array-backed WorldState.
+Compiled scenarios are cached on disk by content hash (.npz, keyed on the file
+bytes plus the config validation uses), so batch runs over thousands of files
+skip parsing and validation on the next start.
+"""
+
+import hashlib
+import json
+import math
+import os
+try:
+    import tomllib
+except ImportError: # Python < 3.11
+    import tomli as tomllib
+from dataclasses import dataclass, field
+
+import numpy as np
+
+import config as CFG
+import sim_logic as Logic
+
+# Bump when the compiled layout changes (invalidates every cached entry)
+COMPILED_VERSION = 1
+
+POSE_KEYS = ("ball", "passer", "striker", "opp_user")
+OPTIONAL_KEYS = ("name", "description", "teammates", "opponents", "st_params", "pass_params")
+
+
+class ScenarioError(ValueError):
+    """Raised when a scenario file is malformed or out of bounds."""
+
+
+@dataclass
+class WorldState:
+    name: str
+    ball: np.ndarray            # (2,)
+    passer: np.ndarray          # (2,)
+    striker: np.ndarray         # (2,)
+    opp_user: np.ndarray        # (2,)
+    teammate_ids: np.ndarray    # (N,) int
+    teammates: np.ndarray       # (N, 2)
+    opponents: np.ndarray       # (M, 2)
+    opp_last_seen: np.ndarray   # (M,)
+    st_overrides: dict = field(default_factory=dict)
+    pass_overrides: dict = field(default_factory=dict)
+
+    def pose(self, key):
+        x, y = getattr(self, key)
+        return Logic.Pose2D(float(x), float(y))
+
+    def teammate_list(self):
+        """Extra teammates as (id, x, y) tuples (same shape as CFG.INITIAL_TEAMMATES)."""
+        return [(int(i), float(x), float(y)) for i, (x, y) in zip(self.teammate_ids, self.teammates)]
+
+    def opponent_list(self):
+        """Extra opponents as (x, y) tuples (same shape as CFG.INITIAL_OPPONENTS)."""
+        return [(float(x), float(y)) for x, y in self.opponents]
+
+    def st_params(self):
+        return {**CFG.ST_PARAMS, **self.st_overrides}
+
+    def pass_params(self):
+        return {**CFG.PASS_PARAMS, **self.pass_overrides}
+
+    def copy(self):
+        return WorldState(
+            self.name,
+            self.ball.copy(), self.passer.copy(), self.striker.copy(), self.opp_user.copy(),
+            self.teammate_ids.copy(), self.teammates.copy(),
+            self.opponents.copy(), self.opp_last_seen.copy(),
+            dict(self.st_overrides), dict(self.pass_overrides),
+        )
+
+
+# ============================================================
+# Validation / Compilation
+# ============================================================
+
+def _check_xy(value, where):
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        raise ScenarioError(f"{where}: expected [x, y], got {value!r}")
+    x, y = value
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (x, y)):
+        raise ScenarioError(f"{where}: coordinates must be numbers, got {value!r}")
+    if not (math.isfinite(x) and math.isfinite(y)):
+        raise ScenarioError(f"{where}: coordinates must be finite, got {value!r}")
+    lim_x, lim_y = CFG.SCENARIO["field_x_limit"], CFG.SCENARIO["field_y_limit"]
+    if abs(x) > lim_x or abs(y) > lim_y:
+        raise ScenarioError(f"{where}: ({x}, {y}) outside field limits (+-{lim_x}, +-{lim_y})")
+    return float(x), float(y)
+
+
+def _check_overrides(overrides, defaults, where):
+    if not isinstance(overrides, dict):
+        raise ScenarioError(f"{where}: expected a table of param overrides")
+    unknown = sorted(set(overrides) - set(defaults))
+    if unknown:
+        raise ScenarioError(f"{where}: unknown params {unknown}")
+    for k, v in overrides.items():
+        if not isinstance(v, (int, float)) or isinstance(v, bool) or not math.isfinite(v):
+            raise ScenarioError(f"{where}.{k}: expected a finite number, got {v!r}")
+    return {k: float(v) for k, v in overrides.items()}
+
+
+def compile_scenario(data, name="scenario"):
+    """Validates a parsed scenario dict and returns a WorldState."""
+    if not isinstance(data, dict):
+        raise ScenarioError(f"{name}: top level must be a table/object")
+    unknown = sorted(set(data) - set(POSE_KEYS) - set(OPTIONAL_KEYS))
+    if unknown:
+        raise ScenarioError(f"{name}: unknown keys {unknown}")
+    missing = [k for k in POSE_KEYS if k not in data]
+    if missing:
+        raise ScenarioError(f"{name}: missing keys {missing}")
+
+    poses = {k: np.array(_check_xy(data[k], k), dtype=float) for k in POSE_KEYS}
+
+    tm_ids, tm_pos = [], []
+    for i, tm in enumerate(data.get("teammates", [])):
+        where = f"teammates[{i}]"
+        if isinstance(tm, dict):
+            tid, xy = tm.get("id"), tm.get("pos")
+        elif isinstance(tm, (list, tuple)) and len(tm) == 3:
+            tid, xy = tm[0], tm[1:]
+        else:
+            raise ScenarioError(f"{where}: expected [id, x, y] or {{id, pos}}, got {tm!r}")
+        if not isinstance(tid, int) or isinstance(tid, bool):
+            raise ScenarioError(f"{where}: id must be an integer, got {tid!r}")
+        if tid in tm_ids:
+            raise ScenarioError(f"{where}: duplicate teammate id {tid}")
+        tm_ids.append(tid)
+        tm_pos.append(_check_xy(list(xy) if xy is not None else None, where))
+
+    opp_pos, opp_seen = [], []
+    for i, opp in enumerate(data.get("opponents", [])):
+        where = f"opponents[{i}]"
+        if isinstance(opp, dict):
+            xy, seen = opp.get("pos"), opp.get("last_seen", 0.0)
+        elif isinstance(opp, (list, tuple)) and len(opp) in (2, 3):
+            xy, seen = opp[:2], (opp[2] if len(opp) == 3 else 0.0)
+        else:
+            raise ScenarioError(f"{where}: expected [x, y(, last_seen)] or {{pos, last_seen}}, got {opp!r}")
+        if not isinstance(seen, (int, float)) or isinstance(seen, bool) or not seen >= 0.0:
+            raise ScenarioError(f"{where}: last_seen must be a number >= 0, got {seen!r}")
+        opp_pos.append(_check_xy(list(xy) if xy is not None else None, where))
+        opp_seen.append(float(seen))
+
+    return WorldState(
+        name=str(data.get("name", name)),
+        teammate_ids=np.array(tm_ids, dtype=np.int64),
+        teammates=np.array(tm_pos, dtype=float).reshape(-1, 2),
+        opponents=np.array(opp_pos, dtype=float).reshape(-1, 2),
+        opp_last_seen=np.array(opp_seen, dtype=float),
+        st_overrides=_check_overrides(data.get("st_params", {}), CFG.ST_PARAMS, "st_params"),
+        pass_overrides=_check_overrides(data.get("pass_params", {}), CFG.PASS_PARAMS, "pass_params"),
+        **poses,
+    )
+
+
+def default_world():
+    """The built-in setup from CFG.INITIAL_POSITIONS / INITIAL_TEAMMATES / INITIAL_OPPONENTS."""
+    data = {k: list(CFG.INITIAL_POSITIONS[k]) for k in POSE_KEYS}
+    data["name"] = "default"
+    data["teammates"] = [list(t) for t in CFG.INITIAL_TEAMMATES]
+    data["opponents"] = [list(o) for o in CFG.INITIAL_OPPONENTS]
+    return compile_scenario(data, "default")
+
+
+def parse_scenario(raw, path):
+    """Parses file bytes as TOML (.toml) or JSON (anything else)."""
+    try:
+        if path.endswith(".toml"):
+            return tomllib.loads(raw.decode("utf-8"))
+        return json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ScenarioError(f"{path}: parse error: {e}") from e
+
+
+# ============================================================
+# Compiled Cache (content hash -> .npz)
+# ============================================================
+
+def _validation_config():
+    """The config validation depends on: a change here must not serve stale compiled entries."""
+    return json.dumps({
+        "field_x_limit": CFG.SCENARIO["field_x_limit"],
+        "field_y_limit": CFG.SCENARIO["field_y_limit"],
+        "st_params": sorted(CFG.ST_PARAMS),
+        "pass_params": sorted(CFG.PASS_PARAMS),
+    }, sort_keys=True)
+
+
+def content_hash(raw):
+    h = hashlib.sha256()
+    h.update(f"v{COMPILED_VERSION}:".encode())
+    h.update(_validation_config().encode())
+    h.update(raw)
+    return h.hexdigest()
+
+
+def _cache_path(digest, cache_dir):
+    return os.path.join(cache_dir, digest[:2], digest + ".npz")
+
+
+def _save_compiled(world, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    meta = json.dumps({
+        "name": world.name,
+        "st_overrides": world.st_overrides,
+        "pass_overrides": world.pass_overrides,
+    })
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            meta=np.array(meta),
+            ball=world.ball, passer=world.passer, striker=world.striker, opp_user=world.opp_user,
+            teammate_ids=world.teammate_ids, teammates=world.teammates,
+            opponents=world.opponents, opp_last_seen=world.opp_last_seen,
+        )
+    os.replace(tmp, path) # Atomic, so parallel batch workers never see half-written files
+
+
+def _load_compiled(path):
+    with np.load(path, allow_pickle=False) as z:
+        meta = json.loads(str(z["meta"]))
+        return WorldState(
+            name=meta["name"],
+            ball=z["ball"], passer=z["passer"], striker=z["striker"], opp_user=z["opp_user"],
+            teammate_ids=z["teammate_ids"], teammates=z["teammates"],
+            opponents=z["opponents"], opp_last_seen=z["opp_last_seen"],
+            st_overrides=meta["st_overrides"], pass_overrides=meta["pass_overrides"],
+        )
+
+
+def load_scenario(path, cache_dir=None, use_cache=True):
+    """Loads a scenario file, returning the cached compiled WorldState when available."""
+    cache_dir = cache_dir or CFG.SCENARIO["cache_dir"]
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    digest = content_hash(raw)
+    cached = _cache_path(digest, cache_dir)
+    if use_cache and os.path.exists(cached):
+        try:
+            return _load_compiled(cached)
+        except Exception as e:
+            print(f"[Scenario] Ignoring broken cache entry {cached}: {e}")
+
+    default_name = os.path.splitext(os.path.basename(path))[0]
+    world = compile_scenario(parse_scenario(raw, path), default_name)
+    if use_cache:
+        try:
+            _save_compiled(world, cached)
+        except OSError as e:
+            print(f"[Scenario] Could not write cache {cached}: {e}")
+    return world
+
+
+def find_scenarios(directory=None):
+    directory = directory or CFG.SCENARIO["dir"]
+    paths = []
+    for root, _, files in os.walk(directory):
+        for fn in files:
+            if fn.endswith((".json", ".toml")):
+                paths.append(os.path.join(root, fn))
+    return sorted(paths)
+
+
+def load_scenarios(paths_or_dir=None, cache_dir=None):
+    """Loads many scenarios (a directory or a list of paths) for batch runs."""
+    if paths_or_dir is None or isinstance(paths_or_dir, str):
+        paths = find_scenarios(paths_or_dir)
+    else:
+        paths = list(paths_or_dir)
+    return [load_scenario(p, cache_dir) for p in paths]
+
+
+if __name__ == "__main__":
+    # Validate (and pre-compile) every scenario: python scenario.py [dir]
+    import sys
+    target = sys.argv[1] if len(sys.argv) > 1 else None
+    for p in find_scenarios(target):
+        try:
+            w = load_scenario(p)
+            print(f"[OK] {p}: {w.name} ({len(w.teammates)} teammates, {len(w.opponents)} opponents)")
+        except ScenarioError as e:
+            print(f"[ERR] {e}")
@@ -0,0 +1,384 @@
+"""
+Simulation Service Client
+
+Thin-client side of sim_service.py. SimClient keeps one connection, reads
+snapshots on a daemon thread (only the newest one is kept) and sends input /
+param / run commands. On top of it:
+
+    RemoteEngine -> looks like a SimEngine to the PyGame window / matplotlib view
+    RemoteLoop   -> looks like an EngineLoop to the Streamlit dashboard
+    RemoteRoom   -> looks like a sim_rooms.Room
+
+so the front ends draw what the service computed instead of simulating
+themselves, and any number of them can watch one room.
+"""
+
+import json
+import queue
+import socket
+import threading
+import time
+
+import numpy as np
+
+import sim_logic as Logic
+from sim_engine import FrameState, LoopSnapshot, SimEngine
+from sim_service import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_RATE
+
+CONNECT_TIMEOUT_SEC = 5.0
+REPLY_TIMEOUT_SEC = 5.0
+
+
+def parse_address(addr):
+    """'host:port', ':port' or 'port' -> (host, port)."""
+    host, _, port = str(addr).rpartition(":")
+    return host or DEFAULT_HOST, int(port or DEFAULT_PORT)
+
+def grid_from_json(payload):
+    xs, ys = np.array(payload["xs"]), np.array(payload["ys"])
+    shape = (len(ys), len(xs))
+    valid = np.frombuffer(payload["valid"].encode(), dtype=np.uint8).reshape(shape) == ord("1")
+    best = tuple(payload["best"]) if payload["best"] is not None else None
+    return Logic.CostmapGrid(xs, ys, np.array(payload["scores"]).reshape(shape), valid, best, payload["best_score"])
+
+def _pose(xy):
+    return Logic.Pose2D(xy[0], xy[1])
+
+def _pair(xy):
+    return tuple(xy) if xy is not None else None
+
+def state_from_json(s):
+    return FrameState(
+        ball=_pose(s["ball"]), passer=_pose(s["passer"]), striker=_pose(s["striker"]), opp_user=_pose(s["opp_user"]),
+        teammates=[tuple(t) for t in s["teammates"]], opponents=[tuple(o) for o in s["opponents"]],
+        striker_bounds=tuple(s["striker_bounds"]), pass_bounds=tuple(s["pass_bounds"]),
+        best_pos=_pair(s["best_pos"]),
+        flight_start=_pair(s["flight_start"]), flight_target=_pair(s["flight_target"]),
+        paused=s["paused"], t=s["t"], ofb_score=s["ofb_score"], pass_score=s["pass_score"],
+        goals=s["goals"], fails=s["fails"],
+    )
+
+
+class SimClient:
+    def __init__(self, address=None, room="default", rate=DEFAULT_RATE, costmaps=True):
+        host, port = parse_address(address or f"{DEFAULT_HOST}:{DEFAULT_PORT}")
+        self.sock = socket.create_connection((host, port), timeout=CONNECT_TIMEOUT_SEC)
+        self.sock.settimeout(None)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._rfile = self.sock.makefile("rb")
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._replies = queue.Queue()
+        self._welcome = threading.Event()
+        self._first = threading.Event()
+
+        self.session = None
+        self.room = room
+        self.welcome = None
+        self.snapshot = None # newest snapshot message (costmaps / params stripped off)
+        self.grids = {}      # layer -> CostmapGrid, replaced only when the service sent a new version
+        self.versions = {}   # layer -> version of that grid
+        self.params = None   # {"st": {...}, "pass": {...}} as last sent by the service
+        self.seq = 0         # snapshots received
+        self.connected = True
+
+        self._thread = threading.Thread(target=self._read, name="sim-client", daemon=True)
+        self._thread.start()
+        self.send(op="hello", room=room, rate=rate, costmaps=costmaps)
+        if not self._welcome.wait(CONNECT_TIMEOUT_SEC):
+            self.close()
+            raise ConnectionError(f"No welcome from sim service at {host}:{port}")
+        print(f"[Client] Connected to {host}:{port}, room '{self.room}' as {self.session}")
+
+    def _read(self):
+        try:
+            for line in self._rfile:
+                msg = json.loads(line)
+                kind = msg.get("type")
+                if kind == "snapshot":
+                    payloads = msg.pop("costmaps", {})
+                    grids = {layer: grid_from_json(p) for layer, p in payloads.items()}
+                    params = msg.pop("params", None)
+                    with self._lock:
+                        self.grids.update(grids)
+                        self.versions.update({layer: p["version"] for layer, p in payloads.items()})
+                        if params is not None:
+                            self.params = params
+                        self.snapshot = msg
+                        self.seq += 1
+                    self._first.set()
+                elif kind == "welcome":
+                    self.welcome, self.session, self.room = msg, msg["session"], msg["room"]
+                    self.params = {"st": msg["st_params"], "pass": msg["pass_params"]}
+                    self._welcome.set()
+                elif kind == "error":
+                    print(f"[Client] Service error: {msg.get('msg')}")
+                else:
+                    self._replies.put(msg)
+        except (OSError, ValueError) as e:
+            print(f"[Client] Connection lost: {e}")
+        finally:
+            self.connected = False
+            self._first.set()
+
+    def latest(self, wait=False):
+        """(snapshot, grids, grid versions, params) of the newest snapshot; wait blocks until the first one arrives."""
+        if wait:
+            self._first.wait(CONNECT_TIMEOUT_SEC)
+        with self._lock:
+            return self.snapshot, dict(self.grids), dict(self.versions), self.params
+
+    def send(self, **msg):
+        data = (json.dumps(msg) + "\n").encode()
+        with self._send_lock:
+            self.sock.sendall(data)
+
+    def request(self, reply_type, **msg):
+        """Sends a command and waits for its reply (other replies are discarded). None on timeout."""
+        self.send(**msg)
+        while True:
+            try:
+                reply = self._replies.get(timeout=REPLY_TIMEOUT_SEC)
+            except queue.Empty:
+                print(f"[Client] No '{reply_type}' reply within {REPLY_TIMEOUT_SEC:.0f}s")
+                return None
+            if reply.get("type") == reply_type:
+                return reply
+
+    def move(self, dx, dy):
+        self.send(op="move", dx=dx, dy=dy)
+
+    def set_params(self, st=None, pass_=None):
+        self.send(op="params", st=st or {}, **{"pass": pass_ or {}})
+
+    def set_running(self, running):
+        self.send(op="run", running=bool(running))
+
+    def set_rate(self, rate):
+        self.send(op="rate", rate=rate)
+
+    def start_recording(self):
+        self.send(op="record", action="start")
+
+    def save_recording(self):
+        """Saves the service's recording to its db. Returns the run id, None if the save failed."""
+        r = self.request("recording", op="record", action="save")
+        return r["run_id"] if r else None
+
+    def stop_recording(self):
+        self.send(op="record", action="stop")
+
+    def claim_control(self):
+        r = self.request("control", op="control")
+        return bool(r and r["granted"])
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+# ============================================================
+# Engine / Loop / Room Look-alikes
+# ============================================================
+
+class RemoteEngine:
+    """
+    SimEngine stand-in fed by a SimClient. step() sends the pause state and any
+    params edited in place (sliders write st_params / pass_params directly),
+    then takes over the newest snapshot; nothing is simulated locally.
+    Grids stay the same objects until the service sends a new version, so the
+    identity checks of the heatmap code keep working.
+    """
+    # Same hashing / score args as the real engine, on the mirrored state
+    score_args = SimEngine.score_args
+    costmap_version = SimEngine.costmap_version
+    tile_version = SimEngine.tile_version
+
+    def __init__(self, client):
+        self.client = client
+        params = client.params
+        self.st_params = dict(params["st"])
+        self.pass_params = dict(params["pass"])
+        self._sent = {"st": dict(self.st_params), "pass": dict(self.pass_params)}
+        self._pending = {"st": {}, "pass": {}} # key -> (value, sent at) not echoed by the service yet
+        self._server_params = params
+        self._running = None
+        self._seq = -1
+        self.state = None
+        self.running = False
+        self.recording = False
+        self.controller = False
+        self.viewers = 0
+        self.ticks = 0
+        self.published = None # LoopSnapshot of the newest snapshot
+        client.latest(wait=True)
+        self.refresh()
+
+    def move_user(self, dx, dy):
+        if dx or dy:
+            self.client.move(dx, dy)
+
+    def push_params(self):
+        """Sends params edited locally since the last push."""
+        changes = {}
+        now = time.monotonic()
+        for key, params in (("st", self.st_params), ("pass", self.pass_params)):
+            sent = self._sent[key]
+            diff = {k: v for k, v in params.items() if sent.get(k) != v}
+            if diff:
+                changes[key] = diff
+                sent.update(diff)
+                self._pending[key].update({k: (v, now) for k, v in diff.items()})
+        if changes:
+            self.client.set_params(changes.get("st"), changes.get("pass"))
+
+    def set_running(self, running):
+        if running != self._running:
+            self._running = running
+            self.client.set_running(running)
+
+    def step(self, dt=None, paused=False):
+        """Front-end tick: pause state + param edits out, newest snapshot in (dt is the service's)."""
+        self.set_running(not paused)
+        self.push_params()
+        self.refresh()
+
+    def refresh(self):
+        snap, grids, versions, params = self.client.latest()
+        if params is not self._server_params:
+            # Edits from other clients (or our own echoed back): mirror them in place, except
+            # keys with a local edit the service hasn't echoed yet (an older echo during a
+            # slider drag would jump the value back)
+            self._server_params = params
+            now = time.monotonic()
+            for key, local in (("st", self.st_params), ("pass", self.pass_params)):
+                sent, pending = self._sent[key], self._pending[key]
+                for k, v in params[key].items():
+                    if local.get(k) != sent.get(k):
+                        continue # edited locally, not pushed yet
+                    if k in pending:
+                        value, at = pending[k]
+                        if v != value and now - at < REPLY_TIMEOUT_SEC:
+                            continue
+                        del pending[k]
+                    local[k] = sent[k] = v
+        if snap is None or self.client.seq == self._seq:
+            return
+        self._seq = self.client.seq
+        s, e = snap["state"], snap["engine"]
+        self.state = state_from_json(s)
+        self.ticks, self.running, self.recording = snap["tick"], snap["running"], snap["recording"]
+        self.controller, self.viewers = snap["controller"], snap["viewers"]
+        self.ball, self.passer, self.striker, self.opp_user = (
+            self.state.ball, self.state.passer, self.state.striker, self.state.opp_user)
+        self.extra_teammates, self.extra_opponents = self.state.teammates, self.state.opponents
+        self.t, self.paused, self.goals, self.fails = s["t"], s["paused"], s["goals"], s["fails"]
+        self.best_pos, self.best_score, self.pass_score = self.state.best_pos, e["best_score"], s["pass_score"]
+        self.opponents = [Logic.Opponent(Logic.Pose2D(x, y), seen, label) for x, y, seen, label in e["opponents"]]
+        self.st_conf, self.pass_conf = np.array(e["st_conf"]), np.array(e["pass_conf"])
+        tm = e["pass_tm"]
+        self.pass_tm = Logic.Teammate(tm[0], Logic.Pose2D(tm[1], tm[2])) if tm else None
+        self.st_grid = grids.get("striker")
+        self.pass_grid = grids.get("pass")
+        self.published = LoopSnapshot(
+            tick=self.ticks, running=self.running, recording=self.recording, state=self.state,
+            grids={"striker": (versions.get("striker"), self.st_grid), "pass": (versions.get("pass"), self.pass_grid)},
+            params=params, inputs=e,
+        )
+
+    def frame_state(self):
+        return self.state
+
+
+class RemoteLoop:
+    """EngineLoop stand-in (lock / state / running / recording / ticks / recording calls) for the dashboard."""
+    def __init__(self, client):
+        self.client = client
+        self.engine = RemoteEngine(client)
+        self.lock = threading.RLock()
+        self.dt = client.welcome["dt"]
+
+    @property
+    def state(self):
+        with self.lock:
+            self.engine.push_params()
+            self.engine.refresh()
+            return self.engine.state
+
+    @property
+    def running(self):
+        self.engine.refresh()
+        return self.engine.running
+
+    @property
+    def recording(self):
+        self.engine.refresh()
+        return self.engine.recording
+
+    @property
+    def ticks(self):
+        self.engine.refresh()
+        return self.engine.ticks
+
+    def published(self):
+        """LoopSnapshot of the newest snapshot from the service."""
+        with self.lock:
+            self.engine.push_params()
+            self.engine.refresh()
+            return self.engine.published
+
+    def set_param(self, params, key, value):
+        with self.lock:
+            params[key] = value
+            self.engine.push_params()
+
+    def set_running(self, running):
+        self.engine._running = running
+        self.client.set_running(running)
+
+    def start_recording(self, sink=None):
+        # The service streams the ticks to its own db (sink stays None)
+        self.client.start_recording()
+
+    def stop_recording(self):
+        self.client.stop_recording()
+
+    def save_recording(self):
+        return self.client.save_recording()
+
+    def close(self):
+        self.client.close()
+
+
+class RemoteRoom:
+    """sim_rooms.Room stand-in: the service tracks subscribers and control per connection."""
+    def __init__(self, client):
+        self.client = client
+        self.name = client.room
+        self.loop = RemoteLoop(client)
+
+    def touch(self, session_id):
+        pass # the connection itself is the subscription
+
+    def snapshot(self, session_id):
+        return self.loop.state
+
+    def is_controller(self, session_id):
+        self.loop.engine.refresh()
+        return self.loop.engine.controller
+
+    def claim_control(self, session_id):
+        return self.client.claim_control()
+
+    def move_user(self, session_id, dx, dy):
+        if not self.is_controller(session_id):
+            return False
+        self.client.move(dx, dy)
+        return True
+
+    def viewers(self):
+        self.loop.engine.refresh()
+        return self.loop.engine.viewers
@@ -0,0 +1,428 @@
+"""
+Simulation Engine
+
+One running simulation built from a scenario WorldState: striker / passer /
+user opponent poses, opponent memory, the ball in flight and the decision
+costmaps of the current tick. Front ends (PyGame window, headless renderer)
+drive it with step() and draw frame_state(); EngineLoop ticks it on its own
+thread for front ends that only poll (Streamlit dashboard).
+"""
+
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+
+import config as CFG
+import sim_logic as Logic
+import pass_model as Pass
+from param_deps import CostmapCache, args_hash, node_params, params_key
+
+STRIKER_SPEED = 3.0 # m/s towards the costmap optimum
+# Viewed area; the user opponent is clamped to it and costmap windows are clipped to it
+VIEW_BOUNDS = CFG.VIEW_BOUNDS
+VIEW_X, VIEW_Y = VIEW_BOUNDS[1], VIEW_BOUNDS[3]
+
+
+@dataclass
+class FrameState:
+    """Everything the field view draws for one frame (see SimEngine.frame_state)."""
+    ball: object      # Pose2D
+    passer: object
+    striker: object
+    opp_user: object
+    teammates: list   # [(tid, x, y)] scenario teammates
+    opponents: list   # [(x, y)] scenario opponents
+    striker_bounds: tuple
+    pass_bounds: tuple
+    best_pos: tuple = None
+    flight_start: tuple = None
+    flight_target: tuple = None
+    paused: bool = False
+    t: float = 0.0
+    ofb_score: float = 0.0
+    pass_score: float = 0.0
+    goals: int = 0
+    fails: int = 0
+
+
+@dataclass(frozen=True)
+class LoopSnapshot:
+    """What EngineLoop published after one tick; readers never need the engine lock for it."""
+    tick: int
+    running: bool
+    recording: bool
+    state: FrameState
+    grids: dict   # layer -> (costmap version, CostmapGrid)
+    params: dict  # {"st": {...}, "pass": {...}} copies
+    inputs: dict  # SimEngine.decision_inputs()
+
+
+class SimEngine:
+    def __init__(self, world, profiler=None, striker_speed=STRIKER_SPEED):
+        self.world = world
+        self.profiler = profiler # optional FrameProfiler, costmaps are timed as spans
+        self.striker_speed = striker_speed
+
+        # Cached Params (config defaults + scenario overrides), edited in place by sliders
+        self.st_params = world.st_params()
+        self.pass_params = world.pass_params()
+
+        # Initial Positions from Scenario
+        self.ball = world.pose("ball")
+        self.passer = world.pose("passer")
+        self.striker = world.pose("striker")
+        self.opp_user = world.pose("opp_user")
+        self.extra_teammates = world.teammate_list()
+        self.extra_opponents = world.opponent_list()
+
+        # Opponent Memory: scenario opponents with last_seen > 0 are only remembered
+        # (they age every tick and get forgotten), the rest are observed every tick.
+        self.tracker = Logic.OpponentTracker(max(self.st_params["opp_memory_sec"], self.pass_params["opp_memory_sec"]))
+        self.visible_opps = [("user", self.opp_user)]
+        for i, ((ox, oy), seen) in enumerate(zip(self.extra_opponents, world.opp_last_seen)):
+            if seen > 0.0:
+                self.tracker.remember(f"opp{i}", Logic.Pose2D(ox, oy), seen)
+            else:
+                self.visible_opps.append((f"opp{i}", Logic.Pose2D(ox, oy)))
+        for key, pose in self.visible_opps:
+            self.tracker.observe(key, pose)
+
+        # Stats
+        self.t = 0.0
+        self.goals = 0
+        self.fails = 0
+
+        # Pass Execution (ball in flight, returns to its kick-off spot afterwards)
+        self.ball_home = Logic.Pose2D(self.ball.x, self.ball.y)
+        self.ball_cfg = Pass.ball_params()
+        self.flight = None
+        self.reset_timer = 0.0
+
+        # Outputs of the last step
+        self.paused = False
+        self.st_grid = None
+        self.pass_grid = None # decision costmap, also shown as the pass heatmap
+        self.best_pos = (0, 0)
+        self.best_score = 0.0
+        self.best_tm = None
+        self.pass_tm = None   # teammate the pass grid was evaluated around
+        self.pass_score = 0.0
+        self.opponents = []   # remembered opponents of the last step and their confidences
+        self.st_conf = self.pass_conf = None
+
+        # Costmaps rebuilt incrementally: slider edits only redo the nodes they feed
+        self.st_cache = CostmapCache("striker")
+        self.pass_cache = CostmapCache("pass")
+
+    def _span(self, name):
+        return self.profiler.span(name) if self.profiler else nullcontext()
+
+    def move_user(self, dx, dy):
+        """Moves the user-controlled opponent, clamped to the view."""
+        self.opp_user.x = Logic.clamp(self.opp_user.x + dx, -VIEW_X, VIEW_X)
+        self.opp_user.y = Logic.clamp(self.opp_user.y + dy, -VIEW_Y, VIEW_Y)
+
+    def teammates(self):
+        # Passer + Striker + Scenario Teammates (ids offset to avoid passer(1) / striker(2))
+        tms = [Logic.Teammate(1, self.passer), Logic.Teammate(2, self.striker)]
+        for (tid, tx, ty) in self.extra_teammates:
+            tms.append(Logic.Teammate(10 + tid, Logic.Pose2D(tx, ty)))
+        return tms
+
+    def step(self, dt, paused=False):
+        """
+        Advances one tick (or only re-evaluates the costmaps while paused).
+        Returns the flight outcome if a pass finished this tick, else None.
+        """
+        self.paused = paused
+        self.pass_grid = None
+        self.pass_score = 0.0
+        outcome = None
+
+        # Opponents aged once per tick
+        if not paused:
+            self.t += dt
+            self.tracker.memory_sec = max(self.st_params["opp_memory_sec"], self.pass_params["opp_memory_sec"])
+            self.tracker.tick(dt)
+            for key, pose in self.visible_opps:
+                self.tracker.observe(key, pose)
+        self.opponents = opponents = self.tracker.opponents
+        self.st_conf = st_conf = self.tracker.confidences(self.st_params["opp_memory_sec"])
+        self.pass_conf = pass_conf = self.tracker.confidences(self.pass_params["opp_memory_sec"])
+
+        if not paused:
+            # Ball Flight (Pass Execution)
+            if self.flight:
+                status = self.flight.step(dt, opponents)
+                self.ball = self.flight.pos
+                if status != "flying":
+                    if status == "received": self.goals += 1
+                    else: self.fails += 1
+                    outcome = status
+                    self.flight = None
+                    self.reset_timer = self.ball_cfg["reset_delay"]
+            elif self.reset_timer > 0.0:
+                self.reset_timer -= dt
+                if self.reset_timer <= 0.0:
+                    self.ball = Logic.Pose2D(self.ball_home.x, self.ball_home.y)
+
+        # AI Logic (Movement), also evaluated while paused for the view
+        with self._span("striker_cmap"):
+            self.st_grid = self.st_cache.get(self.st_params, self.ball, opponents, st_conf, robot=self.striker)
+        self.best_pos, self.best_score = self.st_grid.best, self.st_grid.best_score
+
+        if not paused:
+            target = Logic.Pose2D(self.best_pos[0], self.best_pos[1])
+            self.striker = Logic.move_towards(self.striker, target, self.striker_speed, dt)
+
+        # Pass Logic
+        self.best_tm = Logic.select_best_teammate(self.ball, self.teammates(), 1, self.pass_params)
+        self.pass_tm = self.best_tm
+        if not paused and self.best_tm:
+            # Evaluated even while the ball is in flight: the grid is also the pass heatmap
+            with self._span("pass_cmap"):
+                self.pass_grid = self.pass_cache.get(self.pass_params, self.ball, opponents, pass_conf, tm=self.best_tm)
+            if self.flight is None and self.reset_timer <= 0.0:
+                self.pass_score = self.pass_grid.best_score
+                threshold = self.pass_params["score_threshold"]
+                if self.pass_grid.best is not None and self.pass_score >= threshold:
+                    # Kick to the best cell the closed-form check predicts to arrive first
+                    # (hold the ball if every candidate would be cut); the live flight decides
+                    choice = Pass.choose_pass_target(self.ball, self.pass_grid, opponents, threshold, self.ball_cfg)
+                    if choice is not None:
+                        self.flight = Pass.BallFlight.launch(self.ball, Logic.Pose2D(*choice[0]), self.ball_cfg)
+
+        if self.pass_grid is None:
+            # No pass decision this tick: costmap around the reference teammate for the view
+            self.pass_tm = self.best_tm or Logic.Teammate(99, Logic.Pose2D(self.ball.x, self.ball.y))
+            with self._span("pass_cmap"):
+                self.pass_grid = self.pass_cache.get(self.pass_params, self.ball, opponents, pass_conf, tm=self.pass_tm)
+        return outcome
+
+    def score_args(self, layer):
+        """Args of heatmap.striker_grid_func / pass_grid_func for the current state."""
+        if layer == "striker":
+            return (self.striker, self.ball, self.opponents, self.st_params, self.st_conf)
+        return (self.ball, self.opponents, self.pass_params, self.pass_tm, self.pass_conf)
+
+    def costmap_version(self, layer, node="best"):
+        """Hash of the world state + only the params `node` of the layer depends on (see param_deps)."""
+        if layer == "striker":
+            state, params = (self.striker, self.ball, self.opponents, self.st_conf), self.st_params
+        else:
+            state, params = (self.ball, self.opponents, self.pass_tm, self.pass_conf), self.pass_params
+        return args_hash(layer, node, state, params_key(params, node_params(layer, node)))
+
+    def tile_version(self, layer):
+        """Tile cache version: world state + only the params the layer's tiles depend on."""
+        return self.costmap_version(layer, "tiles")
+
+    def decision_inputs(self):
+        """Inputs of the score functions a client needs to re-score locally, as plain values."""
+        tm = self.pass_tm
+        return {
+            "opponents": [[float(o.pos.x), float(o.pos.y), float(o.last_seen_sec_ago), o.label] for o in self.opponents],
+            "st_conf": [float(c) for c in self.st_conf],
+            "pass_conf": [float(c) for c in self.pass_conf],
+            "pass_tm": None if tm is None else [int(tm.player_id), float(tm.pos.x), float(tm.pos.y)],
+            "best_score": float(self.best_score),
+        }
+
+    def frame_state(self):
+        """Snapshot of everything the field view draws."""
+        flight = self.flight
+        return FrameState(
+            ball=Logic.Pose2D(self.ball.x, self.ball.y),
+            passer=Logic.Pose2D(self.passer.x, self.passer.y),
+            striker=Logic.Pose2D(self.striker.x, self.striker.y),
+            opp_user=Logic.Pose2D(self.opp_user.x, self.opp_user.y),
+            teammates=list(self.extra_teammates),
+            opponents=list(self.extra_opponents),
+            striker_bounds=self.st_grid.bounds_within(VIEW_BOUNDS),
+            pass_bounds=self.pass_grid.bounds_within(VIEW_BOUNDS),
+            best_pos=self.best_pos,
+            flight_start=(flight.start.x, flight.start.y) if flight else None,
+            flight_target=(flight.target.x, flight.target.y) if flight else None,
+            paused=self.paused,
+            t=self.t,
+            ofb_score=self.best_score,
+            pass_score=self.pass_score,
+            goals=self.goals,
+            fails=self.fails,
+        )
+
+
+# ============================================================
+# Background Tick Loop
+# ============================================================
+
+class EngineLoop:
+    """
+    Ticks a SimEngine every `dt` sim seconds on a daemon thread, at real time
+    (or `speed` times real time). While not running the engine is stepped
+    paused, so param edits still show up in the costmaps. Anything touching
+    the engine from another thread must hold `lock`; readers just take
+    `state`, the FrameState of the last tick (replaced, never mutated), or
+    published(), the LoopSnapshot of the last tick (state, grids, params).
+    With threaded=False nothing ticks on its own: a scheduler calls tick()
+    every `period` seconds (see sim_rooms.RoomServer).
+    """
+    def __init__(self, engine, dt=0.1, speed=1.0, threaded=True):
+        self.engine = engine
+        self.dt = dt
+        self.speed = speed
+        self.lock = threading.RLock()
+        self.running = False
+        self.ticks = 0
+        self.state = None
+        self._published = None
+        self._pub_lock = threading.Lock() # never held while ticking
+
+        # Recording (log entries appended by the tick thread while running, to
+        # rec_data or streamed to rec_sink, e.g. a db_manager.RunRecorder)
+        self.recording = False
+        self.rec_data = []
+        self.rec_sink = None
+        self.rec_start_time = 0.0
+        self.rec_stats_start = (0, 0)
+
+        # User input queued by other threads, applied (summed) at the start of the next tick
+        self._move = [0.0, 0.0]
+        self._move_lock = threading.Lock()
+
+        self.tick() # first (paused) evaluation, so state is ready for the first reader
+        self._stop = threading.Event()
+        self._thread = None
+        if threaded:
+            self._thread = threading.Thread(target=self._run, name="sim-engine", daemon=True)
+            self._thread.start()
+
+    @property
+    def period(self):
+        """Wall-clock seconds between ticks."""
+        return self.dt / self.speed
+
+    def set_running(self, running):
+        with self.lock:
+            self.running = running
+            dropped = None if running else self._end_recording()
+        _drop_sink(dropped) # stopping without a save drops the recording
+
+    def queue_move(self, dx, dy):
+        """Adds to the user opponent move applied by the next tick (no engine lock needed)."""
+        with self._move_lock:
+            self._move[0] += dx
+            self._move[1] += dy
+
+    def set_param(self, params, key, value):
+        """Edits one of the engine's params dicts (read by the tick thread)."""
+        with self.lock:
+            params[key] = value
+
+    def start_recording(self, sink=None):
+        """sink: object with append(entry) that takes the log entries instead of rec_data."""
+        with self.lock:
+            replaced = self._end_recording()
+            self.recording = True
+            self.rec_sink = sink
+            self.rec_start_time = time.time()
+            self.rec_stats_start = (self.engine.goals, self.engine.fails)
+        _drop_sink(replaced)
+
+    def _end_recording(self):
+        """Ends the recording (lock held) and lets go of its sink, which is returned."""
+        sink, self.rec_sink = self.rec_sink, None
+        self.recording = False
+        self.rec_data = []
+        return sink
+
+    def stop_recording(self):
+        """Ends the recording. Returns (duration, log entries, passes ok, passes cut); a sink is dropped."""
+        with self.lock:
+            goals0, fails0 = self.rec_stats_start
+            result = (time.time() - self.rec_start_time, self.rec_data,
+                      self.engine.goals - goals0, self.engine.fails - fails0)
+            dropped = self._end_recording()
+        _drop_sink(dropped)
+        return result
+
+    def save_recording(self):
+        """
+        Ends a sink recording and saves it with the current params and pass
+        rate (sink.finish, e.g. db_manager.RunRecorder). Returns the run id,
+        None if nothing was being recorded or the save failed.
+        """
+        with self.lock:
+            sink = self.rec_sink if self.recording else None
+            goals0, fails0 = self.rec_stats_start
+            duration = time.time() - self.rec_start_time
+            goals, fails = self.engine.goals - goals0, self.engine.fails - fails0
+            config_pass, config_st = dict(self.engine.pass_params), dict(self.engine.st_params)
+            self._end_recording()
+        if sink is None:
+            return None
+        rate = goals / (goals + fails) if (goals + fails) else 0.0
+        try:
+            return sink.finish(duration, config_pass, config_st, rate)
+        except Exception as e:
+            print(f"[Engine] Saving the recording failed: {e}")
+            return None
+
+    def tick(self):
+        with self._move_lock:
+            (dx, dy), self._move = self._move, [0.0, 0.0]
+        with self.lock:
+            engine = self.engine
+            if dx or dy:
+                engine.move_user(dx, dy)
+            engine.step(self.dt, paused=not self.running)
+            if self.recording and self.running:
+                (self.rec_sink or self.rec_data).append({
+                    "t": time.time(),
+                    "ofb_score": float(engine.best_score),
+                    "striker": (float(engine.striker.x), float(engine.striker.y))
+                })
+            self.ticks += 1
+            self.state = engine.frame_state()
+            snapshot = LoopSnapshot(
+                tick=self.ticks, running=self.running, recording=self.recording, state=self.state,
+                grids={"striker": (engine.costmap_version("striker"), engine.st_grid),
+                       "pass": (engine.costmap_version("pass"), engine.pass_grid)},
+                params={"st": dict(engine.st_params), "pass": dict(engine.pass_params)},
+                inputs=engine.decision_inputs(),
+            )
+        with self._pub_lock:
+            self._published = snapshot
+
+    def published(self):
+        """LoopSnapshot of the last tick (waits only for the publish, not for a running tick)."""
+        with self._pub_lock:
+            return self._published
+
+    def _run(self):
+        period = self.period
+        next_t = time.perf_counter()
+        while not self._stop.is_set():
+            self.tick()
+            next_t += period
+            delay = next_t - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                next_t = time.perf_counter() # fell behind: don't try to catch up in a burst
+
+    def close(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        with self.lock:
+            sink = self._end_recording()
+        if sink is not None and hasattr(sink, "close"):
+            sink.close() # flushed but not saved: kept as an unfinished run
+
+
+def _drop_sink(sink):
+    """Drops a recording sink that will never be saved (RunRecorder.discard), if it can be."""
+    if sink is not None and hasattr(sink, "discard"):
+        sink.discard()
@@ -38,6 +38,63 @@ def confidence_factor(last_seen_sec_ago, memory_sec):
     if last_seen_sec_ago < 3.0: return 1.0
     return max(0.0, (memory_sec - last_seen_sec_ago) / (memory_sec - 3.0)) if memory_sec > 3.0 else 0.0
 
+def confidence_factors(last_seen_sec_ago, memory_sec):
+    """Vectorized confidence_factor over an array of last-seen ages."""
+    ages = np.asarray(last_seen_sec_ago, dtype=float)
+    if memory_sec > 3.0:
+        fading = np.maximum(0.0, (memory_sec - ages) / (memory_sec - 3.0))
+    else:
+        fading = np.zeros_like(ages)
+    return np.where(ages < 3.0, 1.0, fading)
+
+def opponent_confidences(opponents, memory_sec):
+    return confidence_factors([opp.last_seen_sec_ago for opp in opponents], memory_sec)
+
+class OpponentTracker:
+    """
+    Opponent memory: ages last_seen_sec_ago every tick, forgets opponents after
+    memory_sec and precomputes their confidences once per tick.
+    """
+    def __init__(self, memory_sec):
+        self.memory_sec = memory_sec
+        self.tracks = {} # key -> Opponent
+        self._conf_cache = {}
+
+    def observe(self, key, pos, label="Opponent"):
+        # Seen this tick: (re)start its memory
+        opp = self.tracks.get(key)
+        if opp is None:
+            self.tracks[key] = Opponent(pos, 0.0, label)
+        else:
+            opp.pos = pos
+            opp.last_seen_sec_ago = 0.0
+        self._conf_cache.clear()
+
+    def remember(self, key, pos, last_seen_sec_ago, label="Opponent"):
+        # Known from an earlier sighting (e.g. scenario setup), keeps aging
+        self.tracks[key] = Opponent(pos, float(last_seen_sec_ago), label)
+        self._conf_cache.clear()
+
+    def tick(self, dt):
+        for opp in self.tracks.values():
+            opp.last_seen_sec_ago += dt
+        forgotten = [k for k, opp in self.tracks.items() if opp.last_seen_sec_ago > self.memory_sec]
+        for k in forgotten:
+            del self.tracks[k]
+        self._conf_cache.clear()
+
+    @property
+    def opponents(self):
+        return list(self.tracks.values())
+
+    def confidences(self, memory_sec):
+        """(M,) confidences in `opponents` order, computed once per tick and memory setting."""
+        cf = self._conf_cache.get(memory_sec)
+        if cf is None:
+            cf = opponent_confidences(self.tracks.values(), memory_sec)
+            self._conf_cache[memory_sec] = cf
+        return cf
+
 def move_towards(cur, target, speed, dt):
     dx, dy = target.x - cur.x, target.y - cur.y
     d = np.hypot(dx, dy)
@@ -61,7 +118,7 @@ def select_best_teammate(ball, teammates, my_player_id, params):
             best = tm
     return best
 
-def compute_pass_score_for_target(ball, tm, tx, ty, opponents, params):
+def compute_pass_score_for_target(ball, tm, tx, ty, opponents, params, confidences=None):
     score = (params["base_score"]
              - (abs(tx - tm.pos.x) * params["w_abs_dx"])
              - (abs(ty - tm.pos.y) * params["w_abs_dy"])
@@ -72,9 +129,11 @@ def compute_pass_score_for_target(ball, tm, tx, ty, opponents, params):
     bx, by = tx, ty
     margin = params["receive_pass_margin"]
     
-    for opp in opponents:
+    if confidences is None:
+        confidences = opponent_confidences(opponents, params["opp_memory_sec"])
+
+    for opp, cf in zip(opponents, confidences):
         if opp.label != "Opponent": continue
-        cf = confidence_factor(opp.last_seen_sec_ago, params["opp_memory_sec"])
         if cf <= 0.0: continue
         
         d = point_to_segment_distance(opp.pos.x, opp.pos.y, ax, ay, bx, by)
@@ -84,34 +143,13 @@ def compute_pass_score_for_target(ball, tm, tx, ty, opponents, params):
             
     return score
 
-def compute_pass_costmap(ball, tm, opponents, params):
-    hlx = params["field_half_length"]; hly = params["field_half_width"]
-    Rx, Ry = params["max_pass_reach_x"], params["max_pass_reach_y"]
-    step = params["costmap_step"]
-    
-    xs = np.arange(tm.pos.x - Rx, tm.pos.x + Rx + 1e-9, step)
-    ys = np.arange(tm.pos.y - Ry, tm.pos.y + Ry + 1e-9, step)
-    X, Y = np.meshgrid(xs, ys)
-    best_score = -1e18
-    best_tx, best_ty = float("nan"), float("nan")
-    
-    # Vectorization optimized for standard numpy usage within reason
-    # To keep identical logic to Pygame version, we iterate or use careful broadcasting
-    # Let's keep loop for safety to ensure identical matching logic with previously tested code
-    for iy in range(Y.shape[0]):
-        for ix in range(X.shape[1]):
-            tx, ty = float(X[iy, ix]), float(Y[iy, ix])
-            if abs(tx) > hlx or abs(ty) > hly: continue
-            pass_dist = np.hypot(tx - ball.x, ty - ball.y)
-            if pass_dist < params["min_pass_threshold"] or pass_dist > params["max_pass_threshold"]: continue
-            
-            score = compute_pass_score_for_target(ball, tm, tx, ty, opponents, params)
-            
-            if score > best_score:
-                best_score = score; best_tx, best_ty = tx, ty
-    return (best_tx, best_ty, best_score)
+def compute_pass_costmap(ball, tm, opponents, params, confidences=None):
+    grid = compute_pass_costmap_grid(ball, tm, opponents, params, confidences)
+    if grid.best is None:
+        return (float("nan"), float("nan"), -1e18)
+    return (grid.best[0], grid.best[1], grid.best_score)
 
-def compute_striker_score(tx, ty, robot, ball, opponents, params):
+def compute_striker_score(tx, ty, robot, ball, opponents, params, confidences=None):
     fl = params["field_length"]; 
     goal_x = (fl / 2.0) # Positive X for Defender Full Court
     base_x = goal_x - params["dist_from_goal"] # Base X is slightly left of Goal
@@ -150,9 +188,11 @@ def compute_striker_score(tx, ty, robot, ball, opponents, params):
     pass_path = (ball.x, ball.y, tx, ty)
     shot_path = (base_x, ty, goal_x, 0.0)
 
-    for opp in opponents:
+    if confidences is None:
+        confidences = opponent_confidences(opponents, params["opp_memory_sec"])
+
+    for opp, cf in zip(opponents, confidences):
         if opp.label != "Opponent": continue # Skip GK/Teammates if labeled differently
-        cf = confidence_factor(opp.last_seen_sec_ago, params["opp_memory_sec"])
         if cf <= 0.0: continue
         
         # Pass path penalty
@@ -172,8 +212,7 @@ def compute_striker_score(tx, ty, robot, ball, opponents, params):
     # Movement path penalty
     dist_robot_target = np.hypot(tx - robot.x, ty - robot.y)
     if dist_robot_target > 0.1:
-        for opp in opponents:
-            cf = confidence_factor(opp.last_seen_sec_ago, params["opp_memory_sec"])
+        for opp, cf in zip(opponents, confidences):
             if cf <= 0.0: continue
 
             vec_rt_x = tx - robot.x
@@ -217,22 +256,234 @@ def compute_striker_score(tx, ty, robot, ball, opponents, params):
 
     return score
 
-def compute_striker_costmap(robot, ball, opponents, params):
-    fl = params["field_length"]; 
-    goal_x = (fl / 2.0); # Positive X
-    base_x = goal_x - params["dist_from_goal"] # Base X
+def compute_striker_costmap(robot, ball, opponents, params, confidences=None):
+    grid = compute_striker_costmap_grid(robot, ball, opponents, params, confidences)
+    return grid.best, grid.best_score
+
+# ============================================================
+# Vectorized Score Grids (same terms as the per-cell functions)
+# ============================================================
+
+def point_to_segments_distance(px, py, ax, ay, bx, by):
+    """point_to_segment_distance broadcast over arrays of segment endpoints."""
+    abx, aby = bx - ax, by - ay
+    apx, apy = px - ax, py - ay
+    ab2 = abx * abx + aby * aby
+    degenerate = ab2 < 1e-12
+    t = np.clip((apx * abx + apy * aby) / np.where(degenerate, 1.0, ab2), 0.0, 1.0)
+    t = np.where(degenerate, 0.0, t)
+    return np.hypot(px - (ax + t * abx), py - (ay + t * aby))
+
+def pass_term_grids(X, Y, ball, tm, opponents, params, confidences=None):
+    """
+    Unweighted terms of compute_pass_score_grid as [(op, weight_key, grid, factor)],
+    see combine_term_grids. Only receive_pass_margin / opp_memory_sec (and the
+    state) go into the grids; the weights are applied when combining.
+    """
+    terms = [("set", "base_score", None, None),
+             ("sub", "w_abs_dx", np.abs(X - tm.pos.x), None),
+             ("sub", "w_abs_dy", np.abs(Y - tm.pos.y), None),
+             ("add", "w_x", X, None),
+             ("sub", "w_y", np.abs(Y), None)]
+
+    if confidences is None:
+        confidences = opponent_confidences(opponents, params["opp_memory_sec"])
+
+    margin = params["receive_pass_margin"]
+    for opp, cf in zip(opponents, confidences):
+        if opp.label != "Opponent": continue
+        if cf <= 0.0: continue
+        d = point_to_segments_distance(opp.pos.x, opp.pos.y, ball.x, ball.y, X, Y)
+        terms.append(("sub", "opp_penalty", np.where(d < margin, margin - d, 0.0), cf))
+    return terms
+
+def compute_pass_score_grid(X, Y, ball, tm, opponents, params, confidences=None):
+    """compute_pass_score_for_target evaluated on whole coordinate arrays X, Y."""
+    return combine_term_grids(pass_term_grids(X, Y, ball, tm, opponents, params, confidences), params, X.shape)
+
+def pass_distance_mask(X, Y, ball, params):
+    """True where a pass target is within [min_pass_threshold, max_pass_threshold] of the ball."""
+    d = np.hypot(X - ball.x, Y - ball.y)
+    return (d >= params["min_pass_threshold"]) & (d <= params["max_pass_threshold"])
+
+def striker_term_grids(X, Y, robot, ball, opponents, params, confidences=None):
+    """
+    Unweighted terms of compute_striker_score_grid as [(op, weight_key, grid, factor)],
+    see combine_term_grids. Geometry params (goal / margins / caps) and the state
+    go into the grids; the *_weight params are applied when combining.
+    """
+    fl = params["field_length"]
+    goal_x = (fl / 2.0)
+    base_x = goal_x - params["dist_from_goal"]
+
+    terms = [("neg", "base_x_weight", np.abs(X - base_x), None),
+             ("sub", "center_y_weight", np.abs(Y), None),
+             ("sub", "hysteresis_x_weight", np.abs(X - robot.x), None),
+             ("sub", "hysteresis_y_weight", np.abs(Y - robot.y), None)]
+
+    # Defender avoidance
+    defenders = [opp for opp in opponents if abs(opp.pos.x - goal_x) < 4.0]
+    dist_to_defender = np.zeros(X.shape)
+    normalizer = max(1.0, float(len(defenders)))
+    for opp in defenders:
+        dist_to_defender += np.minimum(np.hypot(Y - opp.pos.y, X - opp.pos.x), params["defender_dist_cap"])
+    dist_to_defender /= normalizer
+    terms.append(("add", "defender_dist_weight", dist_to_defender, None))
+
+    if defenders:
+        avg_opp_y = sum(d.pos.y for d in defenders) / len(defenders)
+        terms.append(("sub", "symmetry_weight", np.abs(Y + avg_opp_y), None))
+
+    full_dist_ball = np.hypot(X - ball.x, Y - ball.y)
+    terms.append(("sub", "ball_dist_weight", np.abs(full_dist_ball - 2.5), None))
+    terms.append(("add", "forward_weight", X, None))
+
+    if confidences is None:
+        confidences = opponent_confidences(opponents, params["opp_memory_sec"])
+
+    margin = params["path_margin"]
+    for opp, cf in zip(opponents, confidences):
+        if opp.label != "Opponent": continue
+        if cf <= 0.0: continue
+        dist_pass = point_to_segments_distance(opp.pos.x, opp.pos.y, ball.x, ball.y, X, Y)
+        terms.append(("sub", "pass_penalty_weight", np.where(dist_pass < margin, margin - dist_pass, 0.0), cf))
+        dist_shot = point_to_segments_distance(opp.pos.x, opp.pos.y, base_x, Y, goal_x, 0.0)
+        terms.append(("sub", "shot_penalty_weight", np.where(dist_shot < margin, margin - dist_shot, 0.0), cf))
+
+    # Movement path penalty (only the projection inside the segment counts)
+    vec_rt_x = X - robot.x
+    vec_rt_y = Y - robot.y
+    len_sq = vec_rt_x**2 + vec_rt_y**2
+    moving = np.sqrt(len_sq) > 0.1
+    safe_len_sq = np.where(len_sq > 1e-9, len_sq, 1.0)
+    for opp, cf in zip(opponents, confidences):
+        if cf <= 0.0: continue
+        vec_ro_x = opp.pos.x - robot.x
+        vec_ro_y = opp.pos.y - robot.y
+        t = np.where(len_sq > 1e-9, (vec_ro_x * vec_rt_x + vec_ro_y * vec_rt_y) / safe_len_sq, 0.0)
+        dist_to_path = np.hypot(opp.pos.x - (robot.x + t * vec_rt_x), opp.pos.y - (robot.y + t * vec_rt_y))
+        hit = moving & (t > 0.0) & (t < 1.0) & (dist_to_path < margin)
+        terms.append(("sub", "movement_penalty_weight", np.where(hit, margin - dist_to_path, 0.0), cf))
+
+    # Goal Post Avoidance
+    half_goal_w = params["goal_width"] / 2.0
+    threshold = params["post_avoid_dist"]
+    for post_y in (half_goal_w, -half_goal_w):
+        d = np.hypot(X - goal_x, Y - post_y)
+        terms.append(("sub", "post_avoid_weight", np.where(d < threshold, threshold - d, 0.0), None))
+    return terms
+
+def combine_term_grids(terms, params, shape):
+    """
+    Weighted sum of term grids, applied in order (same arithmetic as the direct formulas):
+        set: score = w      neg: score = -grid * w
+        add: score += grid * w [* factor]      sub: score -= grid * w [* factor]
+    """
+    score = np.zeros(shape)
+    for op, key, grid, factor in terms:
+        w = params[key]
+        if op == "set":
+            score = np.full(shape, float(w))
+            continue
+        val = -grid * w if op == "neg" else grid * w
+        if factor is not None:
+            val = val * factor
+        if op == "neg":
+            score = val
+        elif op == "add":
+            score = score + val
+        else:
+            score = score - val
+    return score
+
+def compute_striker_score_grid(X, Y, robot, ball, opponents, params, confidences=None):
+    """compute_striker_score evaluated on whole coordinate arrays X, Y."""
+    return combine_term_grids(striker_term_grids(X, Y, robot, ball, opponents, params, confidences), params, X.shape)
+
+# ============================================================
+# Costmap Grids (decision + display share one evaluation)
+# ============================================================
+
+@dataclass
+class CostmapGrid:
+    """
+    Scores of one costmap evaluation. xs / ys are the ascending sample coordinates,
+    scores / valid have shape (len(ys), len(xs)); cells outside valid were not
+    eligible for the decision. best is the chosen (x, y) or None.
+    """
+    xs: np.ndarray
+    ys: np.ndarray
+    scores: np.ndarray
+    valid: np.ndarray
+    best: tuple = None
+    best_score: float = -1e18
+
+    @property
+    def bounds(self):
+        """(min_x, max_x, min_y, max_y) of the sample points."""
+        return (float(self.xs[0]), float(self.xs[-1]), float(self.ys[0]), float(self.ys[-1]))
+
+    def bounds_within(self, view):
+        """bounds clipped to a view (min_x, max_x, min_y, max_y), e.g. for display."""
+        min_x, max_x, min_y, max_y = self.bounds
+        return (max(min_x, view[0]), min(max_x, view[1]), max(min_y, view[2]), min(max_y, view[3]))
+
+def _pick_best(xs, ys, scores, valid, floor):
+    # First maximum in row-major order, like the per-cell loops (strictly greater wins)
+    masked = np.where(valid, scores, -np.inf)
+    if masked.size == 0:
+        return None, floor
+    iy, ix = np.unravel_index(np.argmax(masked), masked.shape)
+    best_score = float(masked[iy, ix])
+    if not best_score > floor:
+        return None, floor
+    return (float(xs[ix]), float(ys[iy])), best_score
+
+def pass_costmap_axes(tm, params):
+    """Sample coordinates of the pass costmap around tm."""
+    Rx, Ry = params["max_pass_reach_x"], params["max_pass_reach_y"]
+    step = params["costmap_step"]
+    xs = np.arange(tm.pos.x - Rx, tm.pos.x + Rx + 1e-9, step)
+    ys = np.arange(tm.pos.y - Ry, tm.pos.y + Ry + 1e-9, step)
+    return xs, ys
+
+def pass_costmap_mask(X, Y, ball, params):
+    """Eligible pass targets: inside the field and within the allowed pass distance."""
+    hlx = params["field_half_length"]; hly = params["field_half_width"]
+    return (np.abs(X) <= hlx) & (np.abs(Y) <= hly) & pass_distance_mask(X, Y, ball, params)
+
+def pick_pass_best(xs, ys, scores, valid):
+    return _pick_best(xs, ys, scores, valid, -1e18)
+
+def compute_pass_costmap_grid(ball, tm, opponents, params, confidences=None):
+    """Pass target costmap around tm, masked to the field and the allowed pass distance."""
+    xs, ys = pass_costmap_axes(tm, params)
+    X, Y = np.meshgrid(xs, ys)
+    valid = pass_costmap_mask(X, Y, ball, params)
+    scores = compute_pass_score_grid(X, Y, ball, tm, opponents, params, confidences)
+    best, best_score = pick_pass_best(xs, ys, scores, valid)
+    return CostmapGrid(xs, ys, scores, valid, best, best_score)
+
+def striker_costmap_axes(params):
+    """Sample coordinates of the striker costmap in front of the opponent goal."""
+    base_x = (params["field_length"] / 2.0) - params["dist_from_goal"]
     max_y = params["field_width"] / 2.0 - 0.5
     xs = np.arange(base_x - params["search_x_margin"], base_x + params["search_x_margin"] + 1e-9, params["grid_step"])
     ys = np.arange(-max_y, max_y + 1e-9, params["grid_step"])
+    return xs, ys
+
+def pick_striker_best(xs, ys, scores, params):
+    # Every cell is eligible; falls back to the base position so best is never None
+    best, best_score = _pick_best(xs, ys, scores, np.ones(scores.shape, dtype=bool), -1e9)
+    if best is None:
+        best = ((params["field_length"] / 2.0) - params["dist_from_goal"], 0.0)
+    return best, best_score
+
+def compute_striker_costmap_grid(robot, ball, opponents, params, confidences=None):
+    """Striker position costmap in front of the opponent goal (every cell is eligible, best is never None)."""
+    xs, ys = striker_costmap_axes(params)
     X, Y = np.meshgrid(xs, ys)
-    best_score = -1e9
-    best_pos = (base_x, 0.0)
-    
-    for iy in range(X.shape[0]):
-        for ix in range(X.shape[1]):
-            tx, ty = float(X[iy, ix]), float(Y[iy, ix])
-            score = compute_striker_score(tx, ty, robot, ball, opponents, params)
-            if score > best_score:
-                best_score = score
-                best_pos = (tx, ty)
-    return best_pos, best_score
+    valid = np.ones(X.shape, dtype=bool)
+    scores = compute_striker_score_grid(X, Y, robot, ball, opponents, params, confidences)
+    best, best_score = pick_striker_best(xs, ys, scores, params)
+    return CostmapGrid(xs, ys, scores, valid, best, best_score)
@@ -0,0 +1,161 @@
+"""
+Shared Simulation Rooms
+
+One SimEngine per named room, shared by every session (browser tab) that
+joins it. A single scheduler thread hands due room ticks to a bounded worker
+pool, so costmap work is capped at `max_workers` threads however many rooms
+or tabs are open; a room whose previous tick is still running skips a beat
+instead of queueing.
+
+Sessions subscribe by calling snapshot() / touch() with their session id.
+The first subscriber controls the user defender; only the controller's
+move_user() input is applied, summed into the room's next tick (control can
+be taken over once the controller has been silent for CONTROL_TIMEOUT_SEC).
+Rooms nobody has looked at for ROOM_IDLE_SEC are closed.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sim_engine import STRIKER_SPEED, SimEngine, EngineLoop
+
+ROOM_IDLE_SEC = 300.0
+CONTROL_TIMEOUT_SEC = 10.0
+
+
+class Room:
+    def __init__(self, name, loop):
+        self.name = name
+        self.loop = loop
+        self.subscribers = {} # session id -> last seen (monotonic)
+        self.controller = None
+        self.future = None    # tick running on the pool
+        self.next_due = time.monotonic()
+        self.created = time.monotonic()
+        self._lock = threading.Lock()
+
+    def touch(self, session_id):
+        """Marks the session as subscribed (call on every render)."""
+        now = time.monotonic()
+        with self._lock:
+            self.subscribers[session_id] = now
+            for sid in [sid for sid, seen in self.subscribers.items() if now - seen > ROOM_IDLE_SEC]:
+                del self.subscribers[sid] # tabs closed long ago
+            if self.controller is None:
+                self.controller = session_id
+
+    def snapshot(self, session_id):
+        """Latest FrameState for a subscribed session."""
+        self.touch(session_id)
+        return self.loop.state
+
+    def is_controller(self, session_id):
+        return self.controller == session_id
+
+    def claim_control(self, session_id):
+        """Takes control if nobody has it or the controller went silent. Returns True if in control."""
+        with self._lock:
+            now = time.monotonic()
+            seen = self.subscribers.get(self.controller)
+            if self.controller is None or seen is None or now - seen > CONTROL_TIMEOUT_SEC:
+                self.controller = session_id
+            return self.controller == session_id
+
+    def release_control(self, session_id):
+        with self._lock:
+            if self.controller == session_id:
+                self.controller = None
+
+    def move_user(self, session_id, dx, dy):
+        """Queues defender input from the controlling session only (applied next tick). Returns True if accepted."""
+        if not self.is_controller(session_id):
+            return False
+        self.loop.queue_move(dx, dy)
+        return True
+
+    def viewers(self, within=CONTROL_TIMEOUT_SEC):
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for seen in self.subscribers.values() if now - seen <= within)
+
+    def last_seen(self):
+        with self._lock:
+            return max(self.subscribers.values(), default=self.created)
+
+
+class RoomServer:
+    def __init__(self, world_factory, max_workers=2, dt=0.1, striker_speed=STRIKER_SPEED, on_close=None):
+        """world_factory(room_name) -> scenario WorldState for a new room; on_close(room) after a room closed."""
+        self.world_factory = world_factory
+        self.on_close = on_close
+        self.dt = dt
+        self.striker_speed = striker_speed
+        self.rooms = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="room-tick")
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="room-scheduler", daemon=True)
+        self._thread.start()
+
+    def get(self, name):
+        """The room called name, created on first use."""
+        with self._lock:
+            room = self.rooms.get(name)
+        if room is not None:
+            return room
+        # Engine + first costmaps are built outside the lock (the scheduler and other sessions keep going)
+        engine = SimEngine(self.world_factory(name), striker_speed=self.striker_speed)
+        new_room = Room(name, EngineLoop(engine, dt=self.dt, threaded=False))
+        with self._lock:
+            room = self.rooms.setdefault(name, new_room)
+            count = len(self.rooms)
+        if room is not new_room:
+            new_room.loop.close() # another session opened it meanwhile
+            return room
+        print(f"[Rooms] Opened room '{name}' ({count} open)")
+        self._wake.set()
+        return room
+
+    def close_room(self, name):
+        with self._lock:
+            room = self.rooms.pop(name, None)
+        if room:
+            room.loop.close()
+            if self.on_close:
+                self.on_close(room)
+            print(f"[Rooms] Closed room '{name}'")
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                rooms = list(self.rooms.values())
+            wait = 0.05
+            for room in rooms:
+                if now - room.last_seen() > ROOM_IDLE_SEC:
+                    self.close_room(room.name)
+                    continue
+                if room.future is not None and not room.future.done():
+                    continue # still ticking: skip, don't queue up
+                if room.future is not None and room.future.exception():
+                    print(f"[Rooms] Tick failed in '{room.name}': {room.future.exception()}")
+                    room.future = None
+                if now >= room.next_due:
+                    room.future = self._pool.submit(room.loop.tick)
+                    # Next slot on the grid, but no catch-up burst after falling behind
+                    room.next_due = max(room.next_due + room.loop.period, now)
+                wait = min(wait, max(room.next_due - now, 0.0))
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=1.0)
+        with self._lock:
+            rooms, self.rooms = list(self.rooms.values()), {}
+        for room in rooms:
+            room.loop.close()
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,333 @@
+"""
+Simulation Service (asyncio, JSON lines over TCP)
+
+Runs the headless engine(s) once and lets any number of front ends attach as
+thin clients (sim_client.py): input and param updates go in, world-state /
+decision snapshots stream out. Rooms are the sim_rooms ones (one engine per
+room, ticks on a bounded pool), so clients watching the same room share one
+simulation and one snapshot per tick.
+
+Protocol: one JSON object per line. The first client line is a hello:
+
+    {"op": "hello", "room": "default", "rate": 30, "costmaps": true}
+    -> {"type": "welcome", "session": "...", "room": "...", "dt": 0.0167, "st_params": {...}, "pass_params": {...}}
+
+then any of
+
+    {"op": "move", "dx": 0.1, "dy": 0.0}          (applied for the room's controller only)
+    {"op": "params", "st": {...}, "pass": {...}}  (unknown keys are reported, not added)
+    {"op": "run", "running": true}
+    {"op": "record", "action": "start" | "save" | "stop"}
+        (ticks stream to the service's SQLite db; save -> {"type": "recording", "run_id": ...},
+         run_id null if the save failed; stop drops the recording)
+    {"op": "control"}                              (-> {"type": "control", "granted": bool})
+    {"op": "rate", "rate": 10}
+
+Snapshots ({"type": "snapshot", ...}) are sent at most `rate` times per second
+and only for new ticks. Costmap grids and params are included only when they
+changed since the last snapshot the client actually received. A slow client
+never queues: its writer always sends the latest snapshot and older unsent
+ones are dropped.
+
+    python sim_service.py --scenario scenarios/integrated.json --port 8765
+"""
+
+import asyncio
+import json
+import time
+import uuid
+
+import numpy as np
+
+import scenario as Scenario
+from db_manager import get_db_manager
+from param_deps import args_hash
+from sim_engine import STRIKER_SPEED
+from sim_rooms import RoomServer
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_RATE = 30.0
+MAX_RATE = 120.0
+
+
+# ============================================================
+# Snapshot Encoding (shared with sim_client)
+# ============================================================
+
+def _xy(p):
+    return [float(p.x), float(p.y)]
+
+def _pair(t):
+    return None if t is None else [float(t[0]), float(t[1])]
+
+def state_to_json(state):
+    """FrameState -> plain JSON types."""
+    return {
+        "ball": _xy(state.ball), "passer": _xy(state.passer),
+        "striker": _xy(state.striker), "opp_user": _xy(state.opp_user),
+        "teammates": [[int(tid), float(x), float(y)] for tid, x, y in state.teammates],
+        "opponents": [[float(x), float(y)] for x, y in state.opponents],
+        "striker_bounds": [float(v) for v in state.striker_bounds],
+        "pass_bounds": [float(v) for v in state.pass_bounds],
+        "best_pos": _pair(state.best_pos),
+        "flight_start": _pair(state.flight_start), "flight_target": _pair(state.flight_target),
+        "paused": bool(state.paused), "t": float(state.t),
+        "ofb_score": float(state.ofb_score), "pass_score": float(state.pass_score),
+        "goals": int(state.goals), "fails": int(state.fails),
+    }
+
+def grid_to_json(grid, version):
+    """CostmapGrid -> JSON (scores rounded to 1e-4, valid as a '0'/'1' string)."""
+    return {
+        "version": version,
+        "xs": np.round(grid.xs, 6).tolist(), "ys": np.round(grid.ys, 6).tolist(),
+        "scores": np.round(grid.scores, 4).ravel().tolist(),
+        "valid": "".join("1" if v else "0" for v in grid.valid.ravel()),
+        "best": _pair(grid.best), "best_score": float(grid.best_score),
+    }
+
+class RoomSnapshots:
+    """
+    Snapshot parts of one room, encoded once per tick and shared by all its
+    clients. Built from the loop's published LoopSnapshot only, so the event
+    loop never waits for the engine lock while a pool thread ticks.
+    """
+    def __init__(self, room):
+        self.room = room
+        self.tick = None
+        self.base = None
+        self.grids = {}  # layer -> (version, payload)
+        self.params = None # (hash, {"st": ..., "pass": ...})
+
+    def update(self):
+        snap = self.room.loop.published()
+        if snap.tick == self.tick:
+            return
+        self.tick = snap.tick
+        self.base = {"tick": snap.tick, "running": snap.running, "recording": snap.recording,
+                     "state": state_to_json(snap.state), "engine": snap.inputs}
+        for layer, (version, grid) in snap.grids.items():
+            if self.grids.get(layer, (None,))[0] != version:
+                self.grids[layer] = (version, grid_to_json(grid, version))
+        h = args_hash(snap.params)
+        if self.params is None or self.params[0] != h:
+            self.params = (h, snap.params)
+
+
+# ============================================================
+# Clients
+# ============================================================
+
+class ClientConn:
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.session = uuid.uuid4().hex[:8]
+        self.room = None
+        self.rate = DEFAULT_RATE
+        self.costmaps = True
+        self.replies = []        # control replies, sent before the next snapshot
+        self.latest = None       # (bytes, versions it carries) newest unsent snapshot
+        self.sent_versions = {}  # layer -> version the client has
+        self.sent_params = None
+        self.last_tick = None
+        self.dropped = 0
+        self.wake = asyncio.Event()
+        self.closed = False
+
+    def reply(self, msg):
+        self.replies.append((json.dumps(msg) + "\n").encode())
+        self.wake.set()
+
+    def build_snapshot(self, snaps):
+        msg = dict(snaps.base)
+        msg["type"] = "snapshot"
+        msg["controller"] = self.room.is_controller(self.session)
+        msg["viewers"] = self.room.viewers()
+        versions = {}
+        if self.costmaps:
+            grids = {}
+            for layer, (version, payload) in snaps.grids.items():
+                if self.sent_versions.get(layer) != version:
+                    grids[layer] = payload
+                versions[layer] = version
+            if grids:
+                msg["costmaps"] = grids
+        params_hash, params = snaps.params
+        if params_hash != self.sent_params:
+            msg["params"] = params
+        versions["params"] = params_hash
+        return (json.dumps(msg) + "\n").encode(), versions
+
+    async def produce(self):
+        """Snapshot at most `rate` per second, for new ticks only; replaces any unsent one."""
+        while not self.closed:
+            self.room.touch(self.session)
+            snaps = self.server.snapshots(self.room)
+            snaps.update()
+            if snaps.tick != self.last_tick:
+                self.last_tick = snaps.tick
+                if self.latest is not None:
+                    self.dropped += 1 # client is behind: drop to latest
+                self.latest = self.build_snapshot(snaps)
+                self.wake.set()
+            await asyncio.sleep(1.0 / self.rate)
+
+    async def write_loop(self):
+        while not self.closed:
+            await self.wake.wait()
+            self.wake.clear()
+            while self.replies:
+                self.writer.write(self.replies.pop(0))
+            if self.latest is not None:
+                data, versions = self.latest
+                self.latest = None
+                self.writer.write(data)
+                # The client has what it was sent: later snapshots only carry newer grids / params
+                self.sent_params = versions.pop("params")
+                self.sent_versions.update(versions)
+            await self.writer.drain()
+
+    def set_params(self, msg):
+        """Applies a params message through the loop (takes the engine lock: run off the event loop)."""
+        loop = self.room.loop
+        known = loop.published().params
+        unknown = []
+        for key, params in (("st", loop.engine.st_params), ("pass", loop.engine.pass_params)):
+            for k, v in (msg.get(key) or {}).items():
+                if k in known[key]:
+                    loop.set_param(params, k, float(v))
+                else:
+                    unknown.append(f"{key}.{k}")
+        return unknown
+
+    def start_recording(self):
+        """Streams the room's ticks to SQLite (bounded memory, kept if the service dies)."""
+        self.room.loop.start_recording(get_db_manager().start_recording())
+
+    async def handle(self, msg):
+        """One client message. Anything taking the engine lock runs in a thread (asyncio.to_thread)."""
+        op = msg.get("op")
+        loop = self.room.loop
+        if op == "move":
+            self.room.move_user(self.session, float(msg.get("dx", 0.0)), float(msg.get("dy", 0.0)))
+        elif op == "params":
+            unknown = await asyncio.to_thread(self.set_params, msg)
+            if unknown:
+                self.reply({"type": "error", "msg": f"unknown params: {', '.join(unknown)}"})
+        elif op == "run":
+            await asyncio.to_thread(loop.set_running, bool(msg.get("running")))
+        elif op == "record":
+            action = msg.get("action")
+            if action == "start":
+                await asyncio.to_thread(self.start_recording)
+            elif action == "save":
+                self.reply({"type": "recording", "run_id": await asyncio.to_thread(loop.save_recording)})
+            else:
+                await asyncio.to_thread(loop.stop_recording)
+        elif op == "control":
+            self.reply({"type": "control", "granted": self.room.claim_control(self.session)})
+        elif op == "rate":
+            self.rate = min(max(float(msg.get("rate", DEFAULT_RATE)), 0.5), MAX_RATE)
+        else:
+            self.reply({"type": "error", "msg": f"unknown op: {op}"})
+
+
+class SimService:
+    def __init__(self, world_factory, workers=2, dt=1.0 / 60, striker_speed=STRIKER_SPEED):
+        self.rooms = RoomServer(world_factory, max_workers=workers, dt=dt, striker_speed=striker_speed,
+                                on_close=self._room_closed)
+        self.dt = dt
+        self._snapshots = {} # room name -> RoomSnapshots
+
+    def _room_closed(self, room):
+        # Scheduler thread: forget the encoded snapshots of an idle room (unless it was reopened)
+        snaps = self._snapshots.get(room.name)
+        if snaps is not None and snaps.room is room:
+            self._snapshots.pop(room.name, None)
+
+    def snapshots(self, room):
+        snaps = self._snapshots.get(room.name)
+        if snaps is None or snaps.room is not room:
+            snaps = self._snapshots[room.name] = RoomSnapshots(room)
+        return snaps
+
+    async def handle_client(self, reader, writer):
+        conn = ClientConn(self, reader, writer)
+        peer = writer.get_extra_info("peername")
+        tasks = []
+        try:
+            try:
+                hello = json.loads(await reader.readline() or b"{}")
+                if not isinstance(hello, dict) or hello.get("op") != "hello":
+                    raise ValueError("expected hello")
+                name = str(hello.get("room") or "default")
+                conn.rate = min(max(float(hello.get("rate", DEFAULT_RATE)), 0.5), MAX_RATE)
+                conn.costmaps = bool(hello.get("costmaps", True))
+            except (ValueError, TypeError) as e:
+                writer.write((json.dumps({"type": "error", "msg": f"bad hello: {e}"}) + "\n").encode())
+                await writer.drain()
+                return
+            # A new room builds its engine and first costmaps: off the event loop
+            conn.room = await asyncio.to_thread(self.rooms.get, name)
+            conn.room.touch(conn.session)
+            params = conn.room.loop.published().params
+            conn.reply({"type": "welcome", "session": conn.session, "room": conn.room.name, "dt": self.dt,
+                        "st_params": params["st"], "pass_params": params["pass"]})
+            print(f"[Service] {peer} joined '{conn.room.name}' as {conn.session}")
+
+            tasks = [asyncio.create_task(conn.produce()), asyncio.create_task(conn.write_loop())]
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    await conn.handle(json.loads(line))
+                except (ValueError, TypeError) as e:
+                    conn.reply({"type": "error", "msg": f"bad message: {e}"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            conn.closed = True
+            for t in tasks:
+                t.cancel()
+            if conn.room:
+                conn.room.release_control(conn.session)
+            writer.close()
+            print(f"[Service] {peer} left ({conn.dropped} snapshots dropped)")
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"[Service] Listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Headless simulation service (JSON lines over TCP)")
+    parser.add_argument("--scenario", help="Scenario file (.json / .toml) for new rooms, default: config positions")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--dt", type=float, default=1.0 / 60, help="Sim seconds per tick (ticks run in real time)")
+    parser.add_argument("--striker-speed", type=float, default=STRIKER_SPEED)
+    parser.add_argument("--workers", type=int, default=2, help="Threads computing room ticks")
+    args = parser.parse_args()
+
+    def world_factory(room):
+        return Scenario.load_scenario(args.scenario) if args.scenario else Scenario.default_world()
+
+    service = SimService(world_factory, args.workers, args.dt, args.striker_speed)
+    t0 = time.time()
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print(f"[Service] Stopped after {time.time() - t0:.0f}s")
+    finally:
+        service.rooms.close()
+
+
+if __name__ == "__main__":
+    main()
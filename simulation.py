@@ -10,6 +10,8 @@ Integrated Simulator
 Fixes:
 - Colorbar is created ONCE and never duplicated.
 - Score colorbar range is fixed to [-30, +10] (static).
+- Blit mode (default): the static background (axes, grid, colorbar) is cached
+  and only the moving artists are redrawn each tick; resizes do a full draw.
 
 Requires: numpy, matplotlib
 """
@@ -391,6 +393,8 @@ class IntegratedSim:
         opp_gk: "Pose2D" = None,      # 고정 골키퍼
         other_opps: "list[tuple[float,float,float]]" = None,
         # other_opps: [(x,y,last_seen_sec_ago), ...]
+        blit: bool = True,
+        client=None,                  # sim_client.SimClient: draw a sim_service room instead
     ):
         # -------- defaults (keeps old behavior) --------
         if ball is None:    ball    = Pose2D(x=-2.0, y=-1.9)
@@ -428,7 +432,13 @@ class IntegratedSim:
         self.st_target = Pose2D(np.nan, np.nan)
         self.st_score = -1e18
 
+        # thin-client mode: positions / decisions come from the service
+        self.client = client
+        self._remote_grid = None
+
         # setup figure
+        self.blit = blit
+        self._bg = None  # cached static background (blit mode), None -> full draw
         self._setup_plot()
 
 
@@ -447,6 +457,14 @@ class IntegratedSim:
         )
         self.cbar = self.fig.colorbar(self.im, ax=self.ax_heat, fraction=0.046, pad=0.04, label="score")
         # NOTE: colorbar created once and never re-created.
+        self.ax_heat.set_title("Pass Score Heatmap (around selected best teammate)")
+        self.ax_heat.set_aspect("equal", adjustable="box")
+        if self.blit:
+            # Fixed limits (whole field) so a moving costmap window never changes the
+            # ticks baked into the cached background
+            self.ax_heat.set_xlim(-PASS_PARAMS["field_half_length"], PASS_PARAMS["field_half_length"])
+            self.ax_heat.set_ylim(-PASS_PARAMS["field_half_width"], PASS_PARAMS["field_half_width"])
+            self.ax_heat.set_autoscale_on(False)
 
         # texts (update-only, never re-create)
         self.text_info = self.ax_field.text(0.01, 0.99, "", transform=self.ax_field.transAxes,
@@ -467,6 +485,9 @@ class IntegratedSim:
 
         # connect key handler
         self.fig.canvas.mpl_connect("key_press_event", self.on_key)
+        if self.blit:
+            self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+            self.fig.canvas.mpl_connect("resize_event", self._on_resize)
 
         # timer loop
         self.timer = self.fig.canvas.new_timer(interval=int(SIM["dt"] * 1000))
@@ -475,6 +496,40 @@ class IntegratedSim:
 
         self._draw_field_static()
 
+        # Moving artists are skipped by normal draws in blit mode and drawn by _blit_frame
+        for a in self._animated_artists():
+            a.set_animated(self.blit)
+
+    def _animated_artists(self):
+        return [self.im, self.text_info, self.l_pass, self.l_st,
+                self.sc_ball, self.sc_def, self.sc_st, self.sc_gk,
+                self.sc_opp_gk, self.sc_opp_user, self.sc_opp_other,
+                self.sc_pass_target, self.sc_st_target]
+
+    def _on_draw(self, event):
+        # Full draw finished (first show, resize, draw_idle): cache the static background.
+        # The whole figure is cached because the info text may reach past its axes.
+        canvas = self.fig.canvas
+        self._bg = canvas.copy_from_bbox(self.fig.bbox)
+        self._draw_animated()
+
+    def _on_resize(self, event):
+        self._bg = None  # wrong size now, the resize redraw recaptures it
+
+    def _draw_animated(self):
+        for a in self._animated_artists():
+            a.axes.draw_artist(a)
+
+    def _blit_frame(self):
+        canvas = self.fig.canvas
+        if self._bg is None or not getattr(canvas, "supports_blit", True):
+            canvas.draw_idle()  # no background yet: full draw (recaptures it)
+            return
+        canvas.restore_region(self._bg)
+        self._draw_animated()
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
     def _draw_field_static(self):
         self.ax_field.clear()
         self.ax_field.set_title("Integrated Field View (Arrow keys: move 1 opponent defender)")
@@ -516,6 +571,15 @@ class IntegratedSim:
         hlx = PASS_PARAMS["field_half_length"]
         hly = PASS_PARAMS["field_half_width"]
 
+        if event.key not in ("up", "down", "left", "right"):
+            return
+        if self.client is not None:
+            # The service moves (and clamps) its own user opponent
+            dx = {"left": -step, "right": step}.get(event.key, 0.0)
+            dy = {"down": -step, "up": step}.get(event.key, 0.0)
+            self.client.move(dx, dy)
+            return
+
         if event.key == "up":
             self.opp_user.pos.y += step
         elif event.key == "down":
@@ -524,8 +588,6 @@ class IntegratedSim:
             self.opp_user.pos.x -= step
         elif event.key == "right":
             self.opp_user.pos.x += step
-        else:
-            return
 
         # clamp to field
         self.opp_user.pos.x = clamp(self.opp_user.pos.x, -hlx, hlx)
@@ -567,6 +629,46 @@ class IntegratedSim:
         self.pass_found = (sc >= PASS_PARAMS["score_threshold"])
         self.last_costmap = (X, Y, S)
 
+    def _update_remote(self):
+        # Thin client: take over the service's newest snapshot (nothing computed here)
+        snap, grids, _, params = self.client.latest()
+        if snap is None:
+            return
+        s, e = snap["state"], snap["engine"]
+        self.ball = Pose2D(*s["ball"])
+        self.defender = Pose2D(*s["passer"])
+        self.striker = Pose2D(*s["striker"])
+        if s["teammates"]:
+            self.gk = Pose2D(*s["teammates"][0][1:])
+        self.opp_user.pos = Pose2D(*s["opp_user"])
+        if s["opponents"]:
+            self.opp_gk.pos = Pose2D(*s["opponents"][0])
+        self.opponents = [self.opp_gk, self.opp_user] + [Opponent(pos=Pose2D(x, y)) for x, y in s["opponents"][1:]]
+
+        best = s["best_pos"]
+        self.st_target = Pose2D(*best) if best else Pose2D(np.nan, np.nan)
+        self.st_score = e["best_score"]
+
+        tm = e["pass_tm"]
+        self.best_tm = Teammate(player_id=tm[0], pos=Pose2D(tm[1], tm[2])) if tm else None
+        grid = grids.get("pass")
+        if s["flight_target"]:
+            self.pass_target, self.pass_found = Pose2D(*s["flight_target"]), True
+        elif grid is not None and grid.best is not None:
+            self.pass_target = Pose2D(*grid.best)
+            self.pass_found = grid.best_score >= params["pass"]["score_threshold"]
+        else:
+            self.pass_target, self.pass_found = Pose2D(np.nan, np.nan), False
+        self.pass_score = grid.best_score if grid is not None else -1e18
+        if grid is not self._remote_grid:
+            # Same grid object until the service sends a new version
+            self._remote_grid = grid
+            if grid is None:
+                self.last_costmap = None
+            else:
+                X, Y = np.meshgrid(grid.xs, grid.ys)
+                self.last_costmap = (X, Y, np.where(grid.valid, grid.scores, np.nan))
+
     def _update_plot(self):
         # --- update field artists ---
         self.sc_ball.set_offsets([[self.ball.x, self.ball.y]])
@@ -612,9 +714,6 @@ class IntegratedSim:
         self.text_info.set_text(info)
 
         # --- update heatmap (NO new colorbar) ---
-        self.ax_heat.set_title("Pass Score Heatmap (around selected best teammate)")
-        self.ax_heat.set_aspect("equal", adjustable="box")
-
         if getattr(self, "last_costmap", None) is None:
             self.im.set_data(np.zeros((10, 10)))
             self.im.set_extent([-1, 1, -1, 1])
@@ -629,27 +728,45 @@ class IntegratedSim:
 
         # NOTE: DO NOT call plt.colorbar / fig.colorbar here.
 
-        self.fig.canvas.draw_idle()
+        if self.blit:
+            self._blit_frame()
+        else:
+            self.fig.canvas.draw_idle()
 
     def on_tick(self):
-        self._update_logic()
+        if self.client is not None:
+            self._update_remote()
+        else:
+            self._update_logic()
         self._update_plot()
 
     def run(self):
         plt.show()
 
 
-def main():
-    # ===== 초기 위치를 여기서 간단히 설정 =====
-    init_ball    = Pose2D(x=0.0, y=0.0)
-    init_passer  = Pose2D(x=0.1, y=0.0)   # 패서(수비수)
-    init_striker = Pose2D(x=-3.0, y=3.0)   # 스트라이커
-    init_gk     = Pose2D(x=3.5,  y=0.0)
-    init_opp_user = Pose2D(x=-1.8, y=0.5)  # 방향키로 조종할 상대 수비 1명
-    init_opp_gk   = Pose2D(x=-3.8, y=0.5)   # 고정 골키퍼(0.0초 관측)
+def main(scenario_path="scenarios/integrated.json", blit=True, connect=None, room="default"):
+    # ===== 초기 위치는 시나리오 파일에서 로드 =====
+    # teammates[0] = 우리 GK, opponents[0] = 고정 골키퍼, 나머지 = 기타 상대
+    import scenario as Scenario
+    world = Scenario.load_scenario(scenario_path)
+
+    client = None
+    if connect:
+        # 씬은 초기 배치용으로만 쓰고, 실제 상태는 서비스에서 받음
+        from sim_client import SimClient
+        client = SimClient(connect, room=room, rate=1.0 / SIM["dt"])
+        client.set_running(True)
+
+    init_ball    = Pose2D(*world.ball)
+    init_passer  = Pose2D(*world.passer)    # 패서(수비수)
+    init_striker = Pose2D(*world.striker)   # 스트라이커
+    init_gk      = Pose2D(*world.teammates[0]) if len(world.teammates) else None
+    init_opp_user = Pose2D(*world.opp_user) # 방향키로 조종할 상대 수비 1명
+    init_opp_gk   = Pose2D(*world.opponents[0]) if len(world.opponents) else None
 
     other_opps = [
-        (-3.4, 2.0, 1.0),  # (x,y,last_seen_sec_ago)
+        (float(x), float(y), float(seen))  # (x,y,last_seen_sec_ago)
+        for (x, y), seen in zip(world.opponents[1:], world.opp_last_seen[1:])
     ]
 
     sim = IntegratedSim(
@@ -660,9 +777,18 @@ def main():
         opp_user=init_opp_user,
         opp_gk=init_opp_gk,
         other_opps=other_opps,
+        blit=blit,
+        client=client,
     )
     sim.run()
 
 
 if __name__ == "__main__":
-    main()
+    import argparse
+    parser = argparse.ArgumentParser(description="Integrated matplotlib simulator")
+    parser.add_argument("scenario", nargs="?", default="scenarios/integrated.json", help="Scenario file (.json / .toml)")
+    parser.add_argument("--no-blit", action="store_true", help="Full figure redraw every tick (old behavior)")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="Draw a sim_service.py room instead of simulating locally")
+    parser.add_argument("--room", default="default", help="Service room to join (with --connect)")
+    args = parser.parse_args()
+    main(args.scenario, blit=not args.no_blit, connect=args.connect, room=args.room)
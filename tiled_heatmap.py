@@ -0,0 +1,217 @@
+"""
+Tiled Full-Field Heatmap (zoom / pan)
+
+A zoomable score view of the whole field backed by a tile pyramid. Level L
+renders SCALE * 2^L pixels per meter; every tile is TILE_PX x TILE_PX pixels
+and world-aligned, so a level-L tile splits into four level-(L+1) tiles.
+
+Tiles are computed lazily (only visible ones, nearest to the view center
+first, within a per-frame time budget) and kept in an LRU cache. Each tile
+remembers the source version it was computed for; when the world state or
+params change the version changes and old tiles are shown as stale
+placeholders until they are recomputed. Missing tiles fall back to a
+coarser cached ancestor, so deep zoom stays interactive.
+"""
+
+import math
+import time
+from collections import OrderedDict
+
+import pygame
+
+import config as CFG
+import heatmap as Heatmap
+from field_render import SCALE
+from param_deps import args_hash
+
+TILE_PX = 128
+MAX_LEVEL = 5        # 32x the default field scale
+FALLBACK_LEVELS = 3  # how many coarser levels to try for a missing tile
+
+
+# ============================================================
+# View Transform
+# ============================================================
+
+class TileView:
+    """Screen rect showing the world around `center` at `zoom` times the field scale."""
+    def __init__(self, rect, bounds=CFG.VIEW_BOUNDS, max_zoom=2 ** MAX_LEVEL):
+        self.rect = pygame.Rect(rect)
+        self.bounds = bounds
+        self.max_zoom = max_zoom
+        self.reset()
+
+    def reset(self):
+        min_x, max_x, min_y, max_y = self.bounds
+        self.center = ((min_x + max_x) / 2.0, (min_y + max_y) / 2.0)
+        self.zoom = 1.0
+
+    @property
+    def px_per_m(self):
+        return SCALE * self.zoom
+
+    @property
+    def level(self):
+        """Pyramid level closest to the current zoom (tiles scale by 0.7x .. 1.4x)."""
+        return max(0, min(MAX_LEVEL, int(round(math.log2(self.zoom)))))
+
+    def to_screen(self, x, y):
+        cx, cy = self.center
+        return (self.rect.centerx + int(round((x - cx) * self.px_per_m)),
+                self.rect.centery - int(round((y - cy) * self.px_per_m)))
+
+    def to_world(self, sx, sy):
+        cx, cy = self.center
+        return (cx + (sx - self.rect.centerx) / self.px_per_m,
+                cy - (sy - self.rect.centery) / self.px_per_m)
+
+    def visible_bounds(self):
+        """(min_x, max_x, min_y, max_y) of the world area inside the rect."""
+        x0, y1 = self.to_world(self.rect.left, self.rect.top)
+        x1, y0 = self.to_world(self.rect.right, self.rect.bottom)
+        return (x0, x1, y0, y1)
+
+    def _clamp_center(self):
+        min_x, max_x, min_y, max_y = self.bounds
+        cx, cy = self.center
+        self.center = (min(max(cx, min_x), max_x), min(max(cy, min_y), max_y))
+
+    def zoom_at(self, screen_pos, factor):
+        """Zooms by factor keeping the world point under screen_pos fixed."""
+        wx, wy = self.to_world(*screen_pos)
+        self.zoom = min(max(self.zoom * factor, 1.0), self.max_zoom)
+        sx, sy = screen_pos
+        self.center = (wx - (sx - self.rect.centerx) / self.px_per_m,
+                       wy + (sy - self.rect.centery) / self.px_per_m)
+        self._clamp_center()
+
+    def pan(self, dx_px, dy_px):
+        """Drags the view by screen pixels."""
+        cx, cy = self.center
+        self.center = (cx - dx_px / self.px_per_m, cy + dy_px / self.px_per_m)
+        self._clamp_center()
+
+
+# ============================================================
+# Tile Pyramid
+# ============================================================
+
+def tile_size_m(level):
+    return TILE_PX / (SCALE * 2 ** level)
+
+
+def tile_bounds(level, ix, iy):
+    t = tile_size_m(level)
+    return (ix * t, (ix + 1) * t, iy * t, (iy + 1) * t)
+
+
+class Tile:
+    def __init__(self, surf, version):
+        self.surf = surf
+        self.version = version
+        self.scaled = None # (size, surface) cached for the current zoom
+
+
+class TiledHeatmap:
+    def __init__(self, capacity=384, budget_sec=0.004):
+        self.capacity = capacity
+        self.budget_sec = budget_sec  # tile compute time per draw() (at least one tile)
+        self.tiles = OrderedDict()    # (layer, level, ix, iy) -> Tile, LRU order
+        self.layer = None
+        self.grid_func = None
+        self.args = ()
+        self.version = None
+        self.computed = 0
+        self.evicted = 0
+
+    def set_source(self, layer, grid_func, args, version=None):
+        """Scores to show: grid_func(X, Y, *args). Tiles of other versions become stale."""
+        self.layer = layer
+        self.grid_func = grid_func
+        self.args = args
+        self.version = version if version is not None else args_hash(layer, args)
+
+    def invalidate(self):
+        self.tiles.clear()
+
+    def _get(self, key):
+        tile = self.tiles.get(key)
+        if tile is not None:
+            self.tiles.move_to_end(key)
+        return tile
+
+    def _compute(self, key):
+        _, level, ix, iy = key
+        rgb, _ = Heatmap.compute_heatmap_array(
+            TILE_PX, TILE_PX, self.grid_func, tile_bounds(level, ix, iy), self.args)
+        self.tiles[key] = Tile(Heatmap.rgb_to_surface(rgb), self.version)
+        self.tiles.move_to_end(key)
+        self.computed += 1
+        while len(self.tiles) > self.capacity:
+            self.tiles.popitem(last=False)
+            self.evicted += 1
+
+    def _visible_keys(self, view):
+        level = view.level
+        t = tile_size_m(level)
+        x0, x1, y0, y1 = view.visible_bounds()
+        # Only tiles over the field view area
+        bx0, bx1, by0, by1 = view.bounds
+        x0, x1, y0, y1 = max(x0, bx0), min(x1, bx1), max(y0, by0), min(y1, by1)
+        cx, cy = view.center
+        keys = []
+        for iy in range(math.floor(y0 / t), math.ceil(y1 / t)):
+            for ix in range(math.floor(x0 / t), math.ceil(x1 / t)):
+                d = ((ix + 0.5) * t - cx) ** 2 + ((iy + 0.5) * t - cy) ** 2
+                keys.append((d, (self.layer, level, ix, iy)))
+        keys.sort()
+        return [k for _, k in keys]
+
+    def _screen_rect(self, view, key):
+        x0, x1, y0, y1 = tile_bounds(*key[1:])
+        sx0, sy0 = view.to_screen(x0, y1)
+        sx1, sy1 = view.to_screen(x1, y0)
+        return pygame.Rect(sx0, sy0, sx1 - sx0, sy1 - sy0)
+
+    def _fallback(self, key, size):
+        """Scaled part of the nearest cached coarser tile covering key, or None."""
+        layer, level, ix, iy = key
+        for k in range(1, FALLBACK_LEVELS + 1):
+            if level - k < 0:
+                break
+            n = 2 ** k
+            parent = self.tiles.get((layer, level - k, ix // n, iy // n))
+            if parent is None:
+                continue
+            sub = TILE_PX // n
+            # Row 0 of a tile is its top (max y)
+            r = pygame.Rect((ix % n) * sub, (n - 1 - iy % n) * sub, sub, sub)
+            return pygame.transform.scale(parent.surf.subsurface(r), size)
+        return None
+
+    def draw(self, surf, view):
+        """Draws the visible tiles into view.rect, computing missing / stale ones within budget."""
+        if self.grid_func is None:
+            return view.rect
+        surf.set_clip(view.rect)
+        t0 = time.perf_counter()
+        first = True
+        for key in self._visible_keys(view):
+            r = self._screen_rect(view, key)
+            tile = self._get(key)
+            stale = tile is None or tile.version != self.version
+            if stale and (first or time.perf_counter() - t0 < self.budget_sec):
+                self._compute(key)
+                tile = self.tiles[key]
+                first = False
+            if tile is not None:
+                if tile.scaled is None or tile.scaled[0] != r.size:
+                    img = tile.surf if r.size == (TILE_PX, TILE_PX) else pygame.transform.scale(tile.surf, r.size)
+                    tile.scaled = (r.size, img)
+                surf.blit(tile.scaled[1], r.topleft)
+            else:
+                img = self._fallback(key, r.size)
+                if img is not None:
+                    surf.blit(img, r.topleft)
+        surf.set_clip(None)
+        return view.rect